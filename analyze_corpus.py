@@ -0,0 +1,41 @@
+import json
+import sys
+import time
+from db import get_connection, analyze_corpus
+from db.analyzer import tokenize
+
+def fetch_example_words():
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT tamayame_text
+        FROM tamayame_dictionary.examples
+        WHERE tamayame_text IS NOT NULL
+    """)
+    words = []
+    for (text,) in cur.fetchall():
+        words.extend(tokenize(text))
+    cur.close()
+    conn.close()
+    return words
+
+def run(out_path="analyses.jsonl", processes=None):
+    words = fetch_example_words()
+    print(f"Analyzing {len(words)} tokens ({len(set(words))} distinct)...")
+
+    started = time.time()
+    results = analyze_corpus(words, processes=processes)
+    elapsed = time.time() - started
+
+    unanalyzed = 0
+    with open(out_path, "w", encoding="utf-8") as out:
+        for word, analyses in sorted(results.items()):
+            if not analyses:
+                unanalyzed += 1
+            out.write(json.dumps({"word": word, "analyses": analyses}, ensure_ascii=False) + "\n")
+
+    print(f"✅ {len(results)} distinct words in {elapsed:.1f}s; {unanalyzed} without a segmentation.")
+    print(f"Wrote {out_path}")
+
+if __name__ == "__main__":
+    run(*(sys.argv[1:2]))
@@ -2,14 +2,18 @@
 from flask import (
     jsonify, Flask, render_template, request,
     redirect, url_for, flash, abort,
+    Response, stream_with_context, send_file, Request,
 )
 import os
 import re
+import csv
+import io
+import itertools
 from werkzeug.utils import secure_filename
 
 import math
 from math import ceil
-from db.core import normalize_morpheme
+from db.core import normalize_morpheme, fold_search_key, like_prefix
 from psycopg2.extras import RealDictCursor
 from db.intransitive import fetch_entry_intransitive_classes
 from template_defs import TEMPLATES
@@ -23,6 +27,9 @@ from db import (
     fetch_related_entries_by_segment,
     fetch_entries_with_template,
     get_entry_by_id,
+    get_media_for_entry,
+    fetch_subclass_allomorphs,
+    fetch_headword,
     fetch_prmp_allomorphs_for_class,
     fetch_morpheme_index,
     fetch_all_allomorphs,
@@ -45,6 +52,34 @@ from db import (
     fetch_morpheme_usage,
     fetch_template_by_id,
     fetch_examples_using_template,
+
+    # paradigm
+    PARADIGM_COLUMNS,
+    load_paradigm_inventories,
+    iter_paradigm_cells,
+
+    # analyzer
+    analyze_word,
+)
+from db.analyzer import tokenize
+from db.fuzzy import suggest_headwords
+from db.autocomplete import AUTOCOMPLETE_KINDS, autocomplete, get_autocomplete_index
+from db.collation import ALPHABET, split_letters, fetch_letter_counts
+from db.slotsig import search_slot_signatures
+from db.postings import get_usage_index
+from db.cooccur import parse_chosen, rank_options, note_example_saved
+from db.coverage import (
+    COVERAGE_COLUMNS,
+    get_paradigm_coverage,
+    coverage_matrix,
+    iter_coverage_rows,
+)
+from db.fts import search_fulltext, reverse_lookup_english
+from db.textindex import index_example_tokens, search_examples_by_tokens
+from db.autolink import (
+    fetch_link_candidates,
+    fetch_link_candidate_summary,
+    confirm_link_candidates,
 )
 
 # summaries live in entries_dal
@@ -63,13 +98,40 @@ from db.mutations import (
 )
 
 from db.examples_dal import fetch_stem_report_rows
+from db.media_store import (
+    MEDIA_ROOT, HashingSpool, store_upload, attach_media, fetch_media, media_file_path,
+)
+from db.media_worker import enqueue_media
+from db.export import EXPORT_FORMATS, export_chunks, gzip_chunks
 
 # ── Flask setup ──────────────────────────────────────────────────
+class MediaRequest(Request):
+    """
+    Media uploads are written straight into a HashingSpool in the media
+    store while the multipart body is parsed: constant memory, SHA-256
+    computed on the way in, and storing the blob is a rename. Every spool
+    is remembered so discard_unused_spools() can drop the ones not stored.
+    """
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.path.startswith('/upload-media/'):
+            spool = HashingSpool(MEDIA_ROOT)
+            self.media_spools = getattr(self, 'media_spools', []) + [spool]
+            return spool
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
 app = Flask(__name__)
+app.request_class = MediaRequest
 app.secret_key = 'a-unique-and-secret-key'
 
+@app.teardown_request
+def discard_unused_spools(exc=None):
+    # Empty or rejected file fields, a missing type, a failed or aborted
+    # request: whatever store_upload() didn't rename away is deleted here
+    for spool in getattr(request, 'media_spools', ()):
+        spool.discard()
+
 # ── Uploads ──────────────────────────────────────────────────────
-UPLOAD_FOLDER = 'static/uploads'
+UPLOAD_FOLDER = MEDIA_ROOT
 ALLOWED_EXTENSIONS = {
     'mp3','wav','jpg','jpeg','png','mp4',
     'webm','pdf','docx','txt','rtf','mov'
@@ -79,6 +141,32 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 def allowed_file(filename):
     return ('.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS)
 
+# /media/<id> byte pushing: "" (Flask streams it), "x-sendfile" (Apache/lighttpd)
+# or "x-accel" (nginx; MEDIA_ACCEL_PREFIX is an internal location aliased to MEDIA_ROOT)
+MEDIA_SENDFILE      = os.environ.get("TAMAYAME_MEDIA_SENDFILE", "").lower()
+MEDIA_ACCEL_PREFIX  = os.environ.get("TAMAYAME_MEDIA_ACCEL_PREFIX", "/_media/")
+app.config['USE_X_SENDFILE'] = MEDIA_SENDFILE == "x-sendfile"
+
+def media_url(m, thumbnail=False):
+    """
+    URL for a media row: /media/<id> when it has one, else the legacy static
+    path. With MEDIA_STATIC_URLS set (the static-site export, which copies
+    the files) every row gets its store path under /static/uploads/.
+    """
+    if m.get('media_id') and not app.config.get('MEDIA_STATIC_URLS'):
+        if thumbnail and m.get('thumbnail_path'):
+            return url_for('serve_media_thumbnail', media_id=m['media_id'])
+        return url_for('serve_media', media_id=m['media_id'])
+    if thumbnail and m.get('thumbnail_path'):
+        return url_for('static', filename='uploads/' + m['thumbnail_path'])
+    return url_for('static', filename='uploads/' + (m.get('filename') or ''))
+
+def format_duration(seconds):
+    if seconds is None:
+        return ''
+    seconds = int(round(seconds))
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
 def format_headword(headword, affix_position):
     if affix_position == 'prefix':
         return f"{headword}-"
@@ -86,7 +174,29 @@ def format_headword(headword, affix_position):
         return f"-{headword}"
     return headword
 
-app.jinja_env.globals.update(format_headword=format_headword)
+app.jinja_env.globals.update(format_headword=format_headword, media_url=media_url,
+                             format_duration=format_duration)
+
+def csv_response(columns, rows, filename):
+    """
+    Stream dict rows as a CSV download without building the file in memory.
+    """
+    def generate():
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            if buf.tell() > 64 * 1024:
+                yield buf.getvalue()
+                buf.seek(0); buf.truncate(0)
+        yield buf.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Entry: Add
@@ -379,8 +489,18 @@ def home():
     )
     words_pages = max(1, ceil(words_total / word_per_page))
 
+    # Nothing matched a typed query → offer close spellings
+    suggestions = []
+    if search and not (total or roots_total or words_total):
+        try:
+            suggestions = suggest_headwords(search, limit=8)
+        except Exception as e:
+            print("⚠️ suggestions unavailable:", e)
+
     return render_template(
         "home.html",
+        suggestions=suggestions,
+        letter_counts=fetch_letter_counts(),
         search=search, entry_type=entry_type, pos=pos, status=status, startswith=startswith,
         entries=entries, page=page, per_page=per_page, total=total, total_pages=total_pages,
         roots=roots, roots_total=roots_total, roots_pages=roots_pages,
@@ -396,12 +516,8 @@ def morpheme_index():
 # ─────────────────────────────────────────────────────────────────────────────
 # Entry detail
 # ─────────────────────────────────────────────────────────────────────────────
-@app.route('/entry/<int:entry_id>')
-def entry_detail(entry_id):
-    entry, morphemes, examples, allomorphs, template = fetch_entry(entry_id)
-    if not entry:
-        return "Entry not found", 404
-
+def entry_view_for(entry):
+    """fetch_entry()'s entry dict with the keys entry_detail.html expects (also used by export_site.py)."""
     # Start with the raw entry dict we got back
     entry_view = dict(entry)
 
@@ -421,6 +537,15 @@ def entry_detail(entry_id):
         first = next(iter(entry["intransitive_classes"].values()), {})
         entry_view["intransitive_class_code"] = first.get("class_code")
         entry_view["intransitive_number_usage"] = first.get("number_usage")
+    return entry_view
+
+
+@app.route('/entry/<int:entry_id>')
+def entry_detail(entry_id):
+    entry, morphemes, examples, allomorphs, template = fetch_entry(entry_id)
+    if not entry:
+        return "Entry not found", 404
+    entry_view = entry_view_for(entry)
 
     # Related entries by headword segment
     segment_key = entry.get("headword")
@@ -442,59 +567,18 @@ def entry_detail(entry_id):
             if e['entry_id'] != entry_id
         ]
 
-    # Media + Suffix Subclass allomorphs (for transitive entries)
-    conn = get_connection(); cur = conn.cursor(cursor_factory=RealDictCursor)
-    try:
-        # Media
-        cur.execute("""
-            SELECT type, filename, notes
-            FROM tamayame_dictionary.media
-            WHERE entry_id = %s
-        """, (entry_id,))
-        media = cur.fetchall()
-
-        # Suffix Subclass details (transitives only)
-        subclass_allos = []
-        if (entry_view.get("transitivity") or "").lower() == "transitive":
-            subclass_id = entry_view.get("suffix_subclass_id")
-            if subclass_id:
-                # Backfill human label if missing
-                if not entry_view.get("suffix_subclass"):
-                    cur.execute("""
-                        SELECT name
-                        FROM tamayame_dictionary.suffix_subclasses
-                        WHERE id = %s
-                        LIMIT 1
-                    """, (subclass_id,))
-                    row = cur.fetchone()
-                    if row and row.get("name"):
-                        entry_view["suffix_subclass"] = row["name"]
-
-                # Fetch subclass-linked allomorphs
-                cur.execute("""
-                    SELECT a.allomorph_id, a.form, a.ur_gloss, a.davis_id
-                    FROM tamayame_dictionary.subclass_allomorphs s
-                    JOIN tamayame_dictionary.allomorphs a
-                      ON a.allomorph_id = s.allomorph_id
-                    WHERE s.subclass_id = %s
-                    ORDER BY COALESCE(a.davis_id,'ZZZ'), a.form
-                """, (subclass_id,))
-                rows = cur.fetchall() or []
-                subclass_allos = [
-                    {
-                        "allomorph_id": r["allomorph_id"],
-                        "form": r["form"],
-                        "ur_gloss": r.get("ur_gloss"),
-                        "davis_id": r.get("davis_id"),
-                    }
-                    for r in rows
-                ]
+    media = get_media_for_entry(entry_id)
 
-        # Make available to the template (your HTML already checks this key)
-        entry_view["suffix_subclass_allomorphs"] = subclass_allos
+    # Suffix Subclass allomorphs (transitives only); the subclass name
+    # already comes from fetch_entry()'s join
+    subclass_allos = []
+    if (entry_view.get("transitivity") or "").lower() == "transitive":
+        subclass_id = entry_view.get("suffix_subclass_id")
+        if subclass_id:
+            subclass_allos = fetch_subclass_allomorphs(subclass_id)
 
-    finally:
-        cur.close(); conn.close()
+    # Make available to the template (your HTML already checks this key)
+    entry_view["suffix_subclass_allomorphs"] = subclass_allos
 
     return render_template(
         "entry_detail.html",
@@ -510,6 +594,88 @@ def entry_detail(entry_id):
         media=media,
     )
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Entry paradigm (all templates × cached inventories)
+# ─────────────────────────────────────────────────────────────────────────────
+@app.route('/entry/<int:entry_id>/paradigm')
+def entry_paradigm(entry_id):
+    fmt         = (request.args.get("format") or "json").lower()
+    template_id = request.args.get("template_id", type=int)
+    limit       = request.args.get("limit", type=int)
+
+    inv = load_paradigm_inventories(entry_id)
+    if not inv:
+        return "Entry not found", 404
+
+    cells = iter_paradigm_cells(inv, TEMPLATES, template_id=template_id)
+    if limit:
+        cells = itertools.islice(cells, limit)
+
+    if fmt == "csv":
+        return csv_response(PARADIGM_COLUMNS, cells, f"paradigm_{entry_id}.csv")
+
+    rows = list(cells)
+    return jsonify({
+        "entry_id": entry_id,
+        "headword": inv["entry"].get("headword"),
+        "transitivity": inv["transitivity"] or None,
+        "count": len(rows),
+        "cells": rows,
+    })
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Paradigm coverage heatmap (attested cells per entry / class; see db/coverage.py)
+# ─────────────────────────────────────────────────────────────────────────────
+@app.route('/coverage')
+def paradigm_coverage():
+    entry_id = request.args.get("entry_id", type=int)
+    class_id = request.args.get("class_id", type=int)
+    fmt      = (request.args.get("format") or "html").lower()
+    cov = get_paradigm_coverage(refresh=request.args.get("refresh") == "1")
+
+    if fmt == "csv":
+        name = (f"coverage_entry_{entry_id}.csv" if entry_id else
+                f"coverage_class_{class_id}.csv" if class_id else "coverage.csv")
+        return csv_response(COVERAGE_COLUMNS,
+                            iter_coverage_rows(cov, entry_id=entry_id, class_id=class_id), name)
+
+    matrix, title = None, None
+    if entry_id or class_id:
+        matrix = coverage_matrix(cov, entry_id=entry_id, class_id=class_id)
+        if matrix is None:
+            abort(404)
+        if entry_id:
+            info = cov["entry_info"][entry_id]
+            class_id = info["class_id"]
+            title = info["headword"]
+        else:
+            title = cov["class_names"].get(class_id) or f"Class {class_id}"
+
+    if fmt == "json":
+        if matrix is None:
+            return jsonify({"error": "Provide ?entry_id= or ?class_id="}), 400
+        return jsonify(dict(matrix, entry_id=entry_id, class_id=class_id, title=title))
+
+    summary = []
+    if matrix is None:
+        per_class = {}
+        for e, info in cov["entry_info"].items():
+            n, attested = per_class.get(info["class_id"], (0, 0))
+            per_class[info["class_id"]] = (n + 1, attested + (e in cov["entries"]))
+        for cid in sorted(set(cov["classes"]) | set(cov["class_names"])):
+            m = coverage_matrix(cov, class_id=cid)
+            n, attested = per_class.get(cid, (0, 0))
+            summary.append({
+                "class_id": cid,
+                "name": cov["class_names"].get(cid) or f"Class {cid}",
+                "filled": m["filled"], "total": m["total"],
+                "entries": n, "entries_attested": attested,
+            })
+
+    return render_template("coverage.html", matrix=matrix, title=title,
+                           entry_id=entry_id, class_id=class_id, summary=summary,
+                           computed_at=cov["computed_at"])
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Reports & helpers
 # ─────────────────────────────────────────────────────────────────────────────
@@ -525,6 +691,23 @@ def morpheme_report():
                            entries=data["entries"],
                            examples=data["examples"])
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Dictionary export (streamed; see db/export.py and export_dictionary.py)
+# ─────────────────────────────────────────────────────────────────────────────
+@app.route("/export/<fmt>")
+def export_dictionary(fmt):
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    mimetype, ext = EXPORT_FORMATS[fmt]
+    chunks = export_chunks(fmt)
+    headers = {"Content-Disposition": f'attachment; filename="tamayame.{ext}"'}
+    # gzip on the fly when the client takes it; never buffers the whole file
+    if "gzip" in (request.headers.get("Accept-Encoding") or ""):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Example: Add (builder)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -646,7 +829,10 @@ def add_example(entry_id):
                 WHERE category = %s
                 ORDER BY form
             """, (s,))
-            slot_allomorphs[s] = [{'id': r[0], 'label': f"{r[1]} ({r[2] or ''})"} for r in cur.fetchall()]
+            # ranked by co-occurrence with this entry (the builder uses these lists as-is)
+            slot_allomorphs[s] = rank_options(
+                [{'id': r[0], 'label': f"{r[1]} ({r[2] or ''})"} for r in cur.fetchall()],
+                s, [("ENTRY", entry_id)], id_key="id")
 
         # B (Benefactive) options
         cur.execute("""
@@ -752,6 +938,7 @@ def add_example(entry_id):
 
         conn.commit()
         cur.close(); conn.close()
+        note_example_saved()
         return redirect(url_for('example_detail', example_id=example_id))
 
     # ── GET: load data for builder ───────────────────────────────
@@ -852,7 +1039,10 @@ def add_example(entry_id):
             WHERE category = %s
             ORDER BY form
         """, (s,))
-        slot_allomorphs[s] = [{'id': r[0], 'label': f"{r[1]} ({r[2] or ''})"} for r in cur.fetchall()]
+        # ranked by co-occurrence with this entry (the builder uses these lists as-is)
+        slot_allomorphs[s] = rank_options(
+            [{'id': r[0], 'label': f"{r[1]} ({r[2] or ''})"} for r in cur.fetchall()],
+            s, [("ENTRY", entry_id)], id_key="id")
 
     # B (Benefactive) options (GET)
     cur.execute("""
@@ -890,6 +1080,18 @@ def add_example(entry_id):
 
     cur.close(); conn.close()
 
+    # Optional: prefill the builder from the analyzer's best segmentation
+    prefill = None
+    analyze_q = (request.args.get('analyze') or '').strip()
+    if analyze_q:
+        ranked = analyze_word(analyze_q, entry_id=entry_id, limit=1)
+        prefill = {"text": analyze_q, "template_ids": [], "slots": []}
+        if ranked:
+            prefill["template_ids"] = ranked[0]["template_ids"]
+            prefill["slots"] = [
+                {"slot": seg["slot"], "id": seg["id"]} for seg in ranked[0]["segments"]
+            ]
+
     return render_template(
         'add_example.html',
         entry_id=entry_id,
@@ -904,8 +1106,164 @@ def add_example(entry_id):
         INTRANS_MAP=INTRANS_MAP,
         INTRANS_TA_PREFS=INTRANS_TA_PREFS,
         B_500_MAP=B_500_MAP,
+        PREFILL=prefill,
     )
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Analyzer: surface word → ranked slot segmentations
+# ─────────────────────────────────────────────────────────────────────────────
+@app.route('/analyze')
+def analyze():
+    text     = (request.args.get("text") or request.args.get("word") or "").strip()
+    entry_id = request.args.get("entry_id", type=int)
+    limit    = request.args.get("limit", default=5, type=int)
+    if not text:
+        return jsonify({"error": "Provide ?text= or ?word="}), 400
+
+    words = tokenize(text)
+    return jsonify({
+        "text": text,
+        "words": [
+            {"word": w, "analyses": analyze_word(w, entry_id=entry_id, limit=limit)}
+            for w in words
+        ],
+    })
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Autocomplete (in-process prefix index; see db/autocomplete.py)
+# ─────────────────────────────────────────────────────────────────────────────
+@app.route('/autocomplete')
+def autocomplete_route():
+    kind   = request.args.get("kind", default="headword")
+    prefix = request.args.get("prefix") or ""
+    limit  = min(request.args.get("limit", default=10, type=int), 200)
+    sort   = request.args.get("sort", default="alpha")
+    if kind not in AUTOCOMPLETE_KINDS:
+        return jsonify({"error": f"kind must be one of {', '.join(AUTOCOMPLETE_KINDS)}"}), 400
+    items = autocomplete(kind, prefix, limit=limit, by_usage=(sort == "usage"))
+    return jsonify({"kind": kind, "prefix": prefix, "items": items})
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fuzzy "did you mean" (pg_trgm; see db/fuzzy.py)
+# ─────────────────────────────────────────────────────────────────────────────
+@app.route('/suggest')
+def suggest():
+    q = (request.args.get("q") or "").strip()
+    if not q:
+        return jsonify({"error": "Provide ?q="}), 400
+    threshold = request.args.get("threshold", type=float)
+    limit     = request.args.get("limit", default=10, type=int)
+    segments  = request.args.get("segments", default="1") != "0"
+    return jsonify({
+        "q": q,
+        "suggestions": suggest_headwords(q, threshold=threshold, limit=limit,
+                                         include_segments=segments),
+    })
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Full-text search (entries + examples; see db/fts.py)
+# ─────────────────────────────────────────────────────────────────────────────
+@app.route('/search')
+def search():
+    q     = (request.args.get("q") or "").strip()
+    kind  = request.args.get("kind") or "all"
+    after = request.args.get("after") or None
+    limit = request.args.get("limit", default=25, type=int)
+
+    kinds = {"entries": ("entry",), "examples": ("example",)}.get(kind, ("entry", "example"))
+    results, next_cursor = search_fulltext(q, kinds=kinds, after=after, limit=limit)
+    # English → Tamayame block only on the first page
+    english = reverse_lookup_english(q, limit=10) if q and not after and kind != "examples" else []
+
+    if request.args.get("format") == "json":
+        return jsonify({"q": q, "kind": kind, "results": results,
+                        "english": english, "next": next_cursor})
+
+    return render_template("search.html", q=q, kind=kind, after=after, limit=limit,
+                           results=results, english=english, next_cursor=next_cursor)
+
+@app.route('/search/english')
+def search_english():
+    q = (request.args.get("q") or "").strip()
+    if not q:
+        return jsonify({"error": "Provide ?q="}), 400
+    limit = request.args.get("limit", default=20, type=int)
+    return jsonify({"q": q, "results": reverse_lookup_english(q, limit=limit)})
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Slot-signature search (see db/slotsig.py for the query language)
+# ─────────────────────────────────────────────────────────────────────────────
+@app.route('/search/slots')
+def search_slots():
+    q      = (request.args.get("q") or "").strip()
+    after  = request.args.get("after", type=int)
+    limit  = min(request.args.get("limit", default=50, type=int), 500)
+    count  = request.args.get("count") == "1"
+    as_json = request.args.get("format") == "json"
+
+    result, error = None, None
+    if q:
+        try:
+            result = search_slot_signatures(q, after_id=after, limit=limit, with_count=count)
+        except ValueError as e:
+            error = str(e)
+
+    if as_json:
+        if error or not q:
+            return jsonify({"error": error or "Provide ?q= (e.g. TA * ROOT * 4xx)"}), 400
+        return jsonify(dict(result, q=q))
+
+    return render_template("search_slots.html", q=q, after=after, limit=limit, count=count,
+                           result=result, error=error)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Allomorph usage queries (in-memory bitmap postings; see db/postings.py)
+# ─────────────────────────────────────────────────────────────────────────────
+@app.route('/api/usage/query')
+def usage_query():
+    q     = (request.args.get("q") or "").strip()
+    after = request.args.get("after", type=int)
+    limit = min(request.args.get("limit", default=50, type=int), 1000)
+    if not q:
+        return jsonify({"error": "Provide ?q= (e.g. 101A AND REFL AND NOT slot:500)"}), 400
+
+    index = get_usage_index()
+    try:
+        result = index.query(q, after=after, limit=limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    terms = {}
+    for tok in re.findall(r"[^\s()]+", q):
+        if tok.upper() in ("AND", "OR", "NOT"):
+            continue
+        tok = tok.lstrip("-")
+        try:
+            terms[tok] = len(index.term(tok))
+        except ValueError:
+            pass
+    return jsonify(dict(result, q=q, terms=terms))
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Example text search (token index; see db/textindex.py)
+# ─────────────────────────────────────────────────────────────────────────────
+@app.route('/search/examples')
+def search_examples():
+    q        = (request.args.get("q") or "").strip()
+    mode     = request.args.get("mode", default="and")
+    fields   = request.args.getlist("field") or None
+    page     = request.args.get("page", default=1, type=int)
+    per_page = request.args.get("per_page", default=50, type=int)
+    if not q:
+        return jsonify({"error": "Provide ?q= (terms and/or \"quoted phrases\")"}), 400
+
+    rows, total = search_examples_by_tokens(q, mode=mode, fields=fields,
+                                            page=page, per_page=per_page)
+    return jsonify({
+        "q": q, "mode": mode, "page": page, "per_page": per_page,
+        "total": total, "results": rows,
+    })
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Allomorph report (list)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -950,9 +1308,23 @@ def update_status(entry_id):
 
 @app.route('/select-example')
 def select_entry_for_example():
-    startswith = request.args.get('startswith')
-    entries = fetch_entry_summaries(startswith=startswith)
-    return render_template("select_example_entry.html", entries=entries, startswith=startswith)
+    startswith = request.args.get('startswith') or ''
+    limit = 500
+    letters = split_letters(startswith)
+    if not startswith or (len(letters) == 1 and letters[0] in ALPHABET):
+        # Letter bar / default listing: the same sort_key buckets and
+        # alphabet order as the counts on the buttons ("t" excludes ts/tr/tʼ)
+        entries, total = fetch_entry_summaries(startswith=startswith or None, per_page=limit)
+    else:
+        # Typed prefixes are served from the in-process prefix index
+        index = get_autocomplete_index()["headword"]
+        entries = [dict(e, headword=e["form"], translation_en=e["gloss"])
+                   for e in index.query(startswith, limit=limit)]
+        total = index.count(startswith)
+    return render_template("select_example_entry.html",
+                           entries=entries, startswith=startswith,
+                           total=total, truncated=total > len(entries),
+                           letter_counts=fetch_letter_counts())
 
 # ─────────────────────────────────────────────────────────────────────────────
 # TA detail
@@ -1049,10 +1421,12 @@ def get_prmp_options_for_slot(entry_id, slot):
         voice        = (request.args.get("voice") or "NONE").upper()
         transitivity = (request.args.get("transitivity") or "Transitive").title()
         has_b        = (request.args.get("has_b") or "0") in ("1", "true", "yes")
+        # slots already chosen in the builder, e.g. ?chosen=TA:3,300:88
+        context      = parse_chosen(request.args.get("chosen")) + [("ENTRY", entry_id)]
 
         def _rows_to_options(rows):
             # each row: (allomorph_id, davis_id, form, ur_gloss)
-            return [
+            return rank_options([
                 {
                     "allomorph_id": r[0],
                     "davis_id": r[1],
@@ -1060,7 +1434,7 @@ def get_prmp_options_for_slot(entry_id, slot):
                     "ur_gloss": r[3],
                 }
                 for r in rows
-            ]
+            ], "100", context)
 
         # 1) Voice override (REFL/PASS) — curated membership (intrans only)
         if voice in ("REFL", "PASS"):
@@ -1268,6 +1642,7 @@ def get_suffix_options(entry_id, series_csv):
     fam = (series_csv or "").strip().split(",")[0]  # take first family only
     voice = (request.args.get("voice") or "NONE").upper()
     include_all_500 = (request.args.get("include_all_500") or "0") in ("1","true","yes")
+    context = parse_chosen(request.args.get("chosen")) + [("ENTRY", entry_id)]
 
     # 200 = FUT (leave as-is)
     if fam.startswith("2"):
@@ -1294,7 +1669,7 @@ def get_suffix_options(entry_id, series_csv):
                 "slot_code": "200",
                 "source": "future"
             })
-        return jsonify({"series": ["200"], "options": options})
+        return jsonify({"series": ["200"], "options": rank_options(options, "200", context)})
 
     # Normalize to a family code
     family = "400" if fam.startswith("4") else "500" if fam.startswith("5") else "600" if fam.startswith("6") else None
@@ -1331,7 +1706,7 @@ def get_suffix_options(entry_id, series_csv):
                 "slot_code": "500",
                 "source": "passive-any-500"
             })
-        return jsonify({"series": ["500"], "options": options})
+        return jsonify({"series": ["500"], "options": rank_options(options, "500", context)})
 
     # ---------- Subclass-aware 400/500 ----------
     subclass_id = None
@@ -1380,7 +1755,7 @@ def get_suffix_options(entry_id, series_csv):
                     "source": f"subclass-{subclass_id}"
                 })
         if options:
-            return jsonify({"series": [family], "options": options})
+            return jsonify({"series": [family], "options": rank_options(options, family, context)})
 
     # ---------- Fallbacks (category-based) ----------
     SERIES_CATEGORY_MAP = {
@@ -1411,7 +1786,7 @@ def get_suffix_options(entry_id, series_csv):
             "slot_code": family,
             "source": "category"
         })
-    return jsonify({"series": [family], "options": options})
+    return jsonify({"series": [family], "options": rank_options(options, family, context)})
 
 @app.route("/stem-report")
 def stem_report():
@@ -1601,24 +1976,44 @@ def link_example(example_id):
 
 @app.route('/link-examples/<int:entry_id>', methods=['GET'])
 def link_examples(entry_id):
-    conn = get_connection(); cur = conn.cursor()
-    cur.execute("SELECT headword FROM tamayame_dictionary.entries WHERE entry_id = %s", (entry_id,))
-    row = cur.fetchone()
-    if not row:
+    page     = request.args.get("page", default=1, type=int)
+    per_page = request.args.get("per_page", default=50, type=int)
+
+    headword = fetch_headword(entry_id)
+    if headword is None:
         return "Entry not found", 404
-    headword = row[0]
 
-    cur.execute("""
-        SELECT e.example_id, e.tamayame_text, e.translation_en
-          FROM tamayame_dictionary.examples e
-         WHERE e.tamayame_text ILIKE %s
-           AND e.example_id NOT IN (
-               SELECT example_id FROM tamayame_dictionary.example_entries
-                WHERE entry_id = %s
-           )
-    """, (f'%{headword}%', entry_id))
-    examples = cur.fetchall()
-    cur.close(); conn.close()
+    # Prefer the batch review queue (see autolink_examples.py)
+    queue_ok = True
+    try:
+        examples, total = fetch_link_candidates(entry_id, page=page, per_page=per_page)
+    except Exception as e:
+        print("⚠️ link candidate queue unavailable:", e)
+        examples, total, queue_ok = [], None, False
+
+    # Never queued (e.g. a brand-new entry) → legacy per-entry scan,
+    # still skipping anything a reviewer already rejected
+    if total is None:
+        rejected_sql = """
+               AND e.example_id NOT IN (
+                   SELECT example_id FROM tamayame_dictionary.example_link_candidates
+                    WHERE entry_id = %s AND status = 'rejected'
+               )""" if queue_ok else ""
+        conn = get_connection(); cur = conn.cursor()
+        cur.execute(f"""
+            SELECT e.example_id, e.tamayame_text, e.translation_en
+              FROM tamayame_dictionary.examples e
+             WHERE e.text_key LIKE %s
+               AND e.example_id NOT IN (
+                   SELECT example_id FROM tamayame_dictionary.example_entries
+                    WHERE entry_id = %s
+               ){rejected_sql}
+        """, ('%' + like_prefix(fold_search_key(headword)), entry_id)
+             + ((entry_id,) if queue_ok else ()))
+        examples = cur.fetchall()
+        total = len(examples)
+        page, per_page = 1, max(1, total)
+        cur.close(); conn.close()
 
     if not examples:
         flash("No new examples found containing this headword.")
@@ -1627,7 +2022,30 @@ def link_examples(entry_id):
     return render_template("confirm_example_links.html",
                            entry_id=entry_id,
                            headword=headword,
-                           examples=examples)
+                           examples=examples,
+                           page=page, per_page=per_page, total=total,
+                           total_pages=max(1, ceil(total / per_page)))
+
+@app.route('/confirm-example-links', methods=['POST'])
+def confirm_example_links():
+    entry_id = request.form.get('entry_id', type=int)
+    if not entry_id:
+        abort(400)
+    chosen = {int(x) for x in request.form.getlist('example_ids')}
+    shown  = {int(x) for x in request.form.getlist('shown_ids')}
+
+    linked = confirm_link_candidates(entry_id, sorted(chosen), sorted(shown - chosen))
+    flash(f"Linked {linked} example(s).")
+    return redirect(url_for('link_examples', entry_id=entry_id))
+
+@app.route('/link-candidates')
+def link_candidates():
+    page     = request.args.get("page", default=1, type=int)
+    per_page = request.args.get("per_page", default=100, type=int)
+    rows, total = fetch_link_candidate_summary(page=page, per_page=per_page)
+    return render_template("link_candidates.html",
+                           entries=rows, page=page, per_page=per_page, total=total,
+                           total_pages=max(1, ceil(total / per_page)))
 
 @app.route("/get-slot-options/<int:entry_id>")
 def get_slot_options(entry_id):
@@ -1745,17 +2163,12 @@ def validate_template_slots():
 # ─────────────────────────────────────────────────────────────────────────────
 # Example detail / edit
 # ─────────────────────────────────────────────────────────────────────────────
-@app.route("/example/<int:example_id>")
-def example_detail(example_id):
-    ex = fetch_example_full(example_id)
-    if not ex:
-        abort(404)
-
-    entries = get_entries_for_example(example_id) or []
-    media   = get_media_for_example(example_id) or []
-    if entries and "entry_id" not in ex:
-        ex["entry_id"] = entries[0]["entry_id"]
-
+def example_view_for(ex):
+    """
+    Shape fetch_example_full() output in place for example_detail.html:
+    stem tiles in template slot order and per-slot de-duplication. Returns
+    the slot order used. Also used by export_site.py.
+    """
     slotted = dict(ex.get("slotted_allomorphs") or {})
     slot_order = None
     if ex.get("template") and ex["template"].get("template_id"):
@@ -1794,6 +2207,21 @@ def example_detail(example_id):
         slotted[k] = uniq
 
     ex["slotted_allomorphs"] = {k: v for k, v in slotted.items() if v}
+    return slot_order
+
+
+@app.route("/example/<int:example_id>")
+def example_detail(example_id):
+    ex = fetch_example_full(example_id)
+    if not ex:
+        abort(404)
+
+    entries = get_entries_for_example(example_id) or []
+    media   = get_media_for_example(example_id) or []
+    if entries and "entry_id" not in ex:
+        ex["entry_id"] = entries[0]["entry_id"]
+
+    slot_order = example_view_for(ex)
 
     if request.args.get("debug") == "1":
         return jsonify({
@@ -1854,6 +2282,7 @@ def edit_example(example_id):
                    comment         = %s
              WHERE example_id     = %s
         """, (new_tamayame, new_gloss, new_trans, new_comment, example_id))
+        index_example_tokens(cur, example_id, new_tamayame, new_gloss, new_trans)
 
         new_prmps = request.form.getlist('prmp_allomorphs')
         cur.execute("""
@@ -1894,6 +2323,7 @@ def edit_example(example_id):
 
         conn.commit()
         cur.close(); conn.close()
+        note_example_saved()
         return redirect(url_for('example_detail', example_id=example_id))
 
     tamayame, gloss, trans, comment = ex[1:]
@@ -1970,16 +2400,12 @@ def upload_media_for_entry(entry_id):
         media_type = request.form.get('type')
         notes = request.form.get('notes', '')
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
-            conn = get_connection(); cur = conn.cursor()
-            cur.execute("""
-                INSERT INTO tamayame_dictionary.media (entry_id, type, filename, notes)
-                VALUES (%s, %s, %s, %s)
-            """, (entry_id, media_type, filename, notes))
-            conn.commit(); cur.close(); conn.close()
-            flash("Media uploaded successfully.")
+            blob = store_upload(file)
+            media_id = attach_media(blob, media_type, entry_id=entry_id, notes=notes,
+                                    original_filename=secure_filename(file.filename))
+            enqueue_media(media_id)
+            flash("Media uploaded (identical file already stored; linked to it)." if blob["duplicate"]
+                  else "Media uploaded successfully.")
             return redirect(url_for('entry_detail', entry_id=entry_id))
     return render_template("upload_media.html", entry_id=entry_id)
 
@@ -1990,15 +2416,10 @@ def upload_media_for_example(example_id):
         media_type = request.form.get('type')
         notes = request.form.get('notes', '')
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
-            conn = get_connection(); cur = conn.cursor()
-            cur.execute("""
-                INSERT INTO tamayame_dictionary.media (example_id, type, filename, notes)
-                VALUES (%s, %s, %s, %s)
-            """, (example_id, media_type, filename, notes))
-            conn.commit(); cur.close(); conn.close()
+            blob = store_upload(file)
+            media_id = attach_media(blob, media_type, example_id=example_id, notes=notes,
+                                    original_filename=secure_filename(file.filename))
+            enqueue_media(media_id)
             entries = get_entries_for_example(example_id)
             if entries:
                 return redirect(url_for('entry_detail', entry_id=entries[0]['entry_id']))
@@ -2006,6 +2427,54 @@ def upload_media_for_example(example_id):
                 return redirect(url_for('home'))
     return render_template("upload_media.html", example_id=example_id)
 
+@app.route('/media/<int:media_id>')
+def serve_media(media_id):
+    m = fetch_media(media_id)
+    path = media_file_path(m["filename"]) if m else None
+    if not path or not os.path.isfile(path):
+        abort(404)
+
+    # blobs are named by their SHA-256, so the hash is a strong ETag and the
+    # URL's content can never change; legacy flat files can be overwritten
+    immutable = bool(m["sha256"]) and m["filename"].startswith("sha256/")
+    etag = m["sha256"] or True
+    mimetype = m["content_type"] or None
+
+    if MEDIA_SENDFILE == "x-accel":
+        resp = Response(mimetype=mimetype or "application/octet-stream")
+        resp.headers["X-Accel-Redirect"] = MEDIA_ACCEL_PREFIX.rstrip("/") + "/" + m["filename"]
+        if m["sha256"]:
+            resp.set_etag(m["sha256"])
+            if request.if_none_match.contains(m["sha256"]):
+                resp.status_code = 304
+    else:
+        # conditional=True gives Range/206, If-Range and 304s; with
+        # USE_X_SENDFILE the body is left to the front server
+        resp = send_file(path, mimetype=mimetype, conditional=True, etag=etag,
+                         download_name=m["original_filename"] or os.path.basename(path))
+
+    if immutable:
+        resp.cache_control.public = True
+        resp.cache_control.max_age = 31536000
+        resp.cache_control.immutable = True
+    else:
+        resp.cache_control.no_cache = True
+    resp.headers["Accept-Ranges"] = "bytes"
+    return resp
+
+@app.route('/media/<int:media_id>/thumbnail')
+def serve_media_thumbnail(media_id):
+    m = fetch_media(media_id)
+    path = media_file_path(m["thumbnail_path"]) if m and m["thumbnail_path"] else None
+    if not path or not os.path.isfile(path):
+        abort(404)
+    # thumbnails are named by the source blob's hash
+    resp = send_file(path, mimetype="image/jpeg", conditional=True)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = 31536000
+    resp.cache_control.immutable = True
+    return resp
+
 @app.route('/edit-realization/<int:example_id>', methods=['GET', 'POST'], endpoint='edit_realization')
 def edit_realization(example_id):
     # keep imports local to avoid circulars
@@ -0,0 +1,13 @@
+import sys
+import time
+from db.autolink import ensure_link_candidates_table, scan_link_candidates
+
+def run(min_length=2):
+    ensure_link_candidates_table()
+    started = time.time()
+    queued = scan_link_candidates(min_length=min_length)
+    print(f"✅ Queued {queued} new example→entry link candidates in {time.time() - started:.1f}s.")
+    print("Review them at /link-candidates")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2)
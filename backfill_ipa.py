@@ -0,0 +1,60 @@
+import argparse
+import csv
+import time
+from db import get_connection
+from db.orthography import to_ipa, iter_ipa_sources, fill_missing_ipa
+
+def _norm(ipa):
+    return "".join((ipa or "").split()).strip("/[]")
+
+def backfill(kind, write, report, batch_size=5000):
+    """Stream one source, fill blank IPA in batches, and log disagreements to `report`."""
+    seen = filled = flagged = 0
+    pending = []
+    conn = get_connection() if write else None
+    cur = conn.cursor() if write else None
+
+    def flush():
+        nonlocal filled
+        if pending and write:
+            filled += fill_missing_ipa(cur, kind, pending)
+            conn.commit()
+        pending.clear()
+
+    for row_id, text, stored in iter_ipa_sources(kind):
+        seen += 1
+        ipa = to_ipa(text)
+        if not (stored or "").strip():
+            if ipa:
+                pending.append((row_id, ipa))
+                if len(pending) >= batch_size:
+                    flush()
+        elif _norm(stored) != _norm(ipa):
+            flagged += 1
+            report.writerow([kind, row_id, text, stored, ipa])
+    flush()
+    if write:
+        cur.close(); conn.close()
+    return seen, filled, flagged
+
+def run():
+    ap = argparse.ArgumentParser(description="Fill missing IPA from the orthography and flag disagreements.")
+    ap.add_argument("--only", choices=("entries", "examples"), help="one source only")
+    ap.add_argument("--out", default="ipa_disagreements.tsv")
+    ap.add_argument("--dry-run", action="store_true", help="report only; don't write IPA")
+    args = ap.parse_args()
+
+    kinds = [args.only] if args.only else ["entries", "examples"]
+    with open(args.out, "w", encoding="utf-8", newline="") as f:
+        report = csv.writer(f, delimiter="\t")
+        report.writerow(["source", "id", "text", "stored_ipa", "computed_ipa"])
+        for kind in kinds:
+            started = time.time()
+            seen, filled, flagged = backfill(kind, not args.dry_run, report)
+            elapsed = time.time() - started
+            print(f"✅ {kind}: {seen} rows in {elapsed:.1f}s, {filled} IPA filled, "
+                  f"{flagged} stored values disagree.")
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,118 @@
+"""
+Benchmark the example token index against leading-wildcard ILIKE.
+
+Builds a throwaway schema (tamayame_bench) with a synthetic examples table,
+indexes it, times both search paths on the same terms, then drops the schema.
+Both sides return the same shape: a total count plus the first page of 50
+rows, each on its own connection, as search_examples_by_tokens() does.
+
+    python bench_example_search.py [n_examples] [--keep]
+"""
+import io
+import random
+import statistics
+import sys
+import time
+from db import get_connection
+from db.textindex import (
+    ensure_example_token_index,
+    rebuild_example_token_index,
+    parse_token_query,
+    search_examples_by_tokens,
+)
+
+BENCH_SCHEMA = "tamayame_bench"
+SYLLABLES = ["ka", "kiʼ", "ta", "tsʼi", "hay", "pa", "wá", "ʼi", "sí", "mu", "gya", "tʼó", "pí", "da"]
+ENGLISH   = ["he", "she", "went", "saw", "the", "dog", "house", "river", "corn", "sings",
+             "morning", "they", "two", "children", "eat", "deer", "walked", "home", "rain"]
+
+
+def _word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+
+
+def _make_corpus(cur, n, rng):
+    cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+    cur.execute(f"""
+        CREATE TABLE {BENCH_SCHEMA}.examples (
+            example_id      serial PRIMARY KEY,
+            tamayame_text   text,
+            gloss_text      text,
+            translation_en  text
+        )
+    """)
+    buf = io.StringIO()
+    for _ in range(n):
+        tam = " ".join(_word(rng) for _ in range(rng.randint(2, 7)))
+        gloss = "-".join(rng.choice(["3SG", "PL", "PST", "go", "see", "eat"]) for _ in range(3))
+        eng = " ".join(rng.choice(ENGLISH) for _ in range(rng.randint(3, 8)))
+        buf.write(f"{tam}\t{gloss}\t{eng}\n")
+    buf.seek(0)
+    cur.copy_from(buf, f"{BENCH_SCHEMA}.examples",
+                  columns=("tamayame_text", "gloss_text", "translation_en"))
+
+
+def _time(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples)
+
+
+def run(n=500_000, keep=False, repeats=5):
+    rng = random.Random(42)
+    conn = get_connection()
+    cur = conn.cursor()
+
+    t = time.time()
+    _make_corpus(cur, n, rng)
+    conn.commit()
+    print(f"corpus: {n} examples in {time.time() - t:.1f}s")
+
+    ensure_example_token_index(schema=BENCH_SCHEMA)
+    t = time.time()
+    postings = rebuild_example_token_index(schema=BENCH_SCHEMA)
+    print(f"index:  {postings} postings in {time.time() - t:.1f}s")
+
+    queries = [_word(rng) for _ in range(5)] + ["dog", "children deer", '"the dog"']
+    print(f"\n{'query':<24}{'ILIKE ms':>10}{'index ms':>10}{'ILIKE hits':>12}{'index hits':>12}")
+    for q in queries:
+        terms, phrases = parse_token_query(q)
+        needles = terms + [" ".join(p) for p in phrases]
+        hits = {}
+
+        def ilike():
+            where = " AND ".join(
+                "(tamayame_text ILIKE %s OR gloss_text ILIKE %s OR translation_en ILIKE %s)"
+                for _ in needles)
+            params = [f"%{w}%" for w in needles for _ in range(3)]
+            c = get_connection()
+            k = c.cursor()
+            k.execute(f"SELECT COUNT(*) FROM {BENCH_SCHEMA}.examples WHERE {where}", params)
+            hits["ilike"] = k.fetchone()[0]
+            k.execute(f"""
+                SELECT example_id, tamayame_text, gloss_text, translation_en
+                  FROM {BENCH_SCHEMA}.examples
+                 WHERE {where} ORDER BY example_id LIMIT 50
+            """, params)
+            k.fetchall()
+            k.close(); c.close()
+
+        def indexed():
+            hits["index"] = search_examples_by_tokens(q, per_page=50, schema=BENCH_SCHEMA)[1]
+
+        print(f"{q:<24}{_time(ilike, repeats):>10.1f}{_time(indexed, repeats):>10.1f}"
+              f"{hits['ilike']:>12}{hits['index']:>12}")
+
+    if not keep:
+        cur.execute(f"DROP SCHEMA {BENCH_SCHEMA} CASCADE")
+        conn.commit()
+    cur.close(); conn.close()
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    run(int(args[0]) if args else 500_000, keep="--keep" in sys.argv)
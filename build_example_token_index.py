@@ -0,0 +1,11 @@
+import time
+from db.textindex import ensure_example_token_index, rebuild_example_token_index
+
+def run():
+    ensure_example_token_index()
+    started = time.time()
+    written = rebuild_example_token_index()
+    print(f"✅ Indexed {written} example tokens in {time.time() - started:.1f}s.")
+
+if __name__ == "__main__":
+    run()
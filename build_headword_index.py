@@ -0,0 +1,18 @@
+import argparse
+import os
+import time
+from db.headword_index import HEADWORD_INDEX_PATH, build_headword_index
+
+def run():
+    ap = argparse.ArgumentParser(description="Build the mmap'd headword → entry index file.")
+    ap.add_argument("--out", default=HEADWORD_INDEX_PATH)
+    args = ap.parse_args()
+
+    started = time.time()
+    keys, entries = build_headword_index(args.out)
+    size = os.path.getsize(args.out) / 1024
+    print(f"✅ Indexed {keys} keys over {entries} entries into {args.out} "
+          f"({size:.0f} KiB) in {time.time() - started:.1f}s.")
+
+if __name__ == "__main__":
+    run()
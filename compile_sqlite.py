@@ -0,0 +1,20 @@
+import argparse
+import os
+import time
+from db.sqlite_backend import SQLITE_PATH, compile_sqlite
+
+def run():
+    ap = argparse.ArgumentParser(
+        description="Compile a read-only SQLite snapshot of the dictionary for offline use.")
+    ap.add_argument("--out", default=SQLITE_PATH)
+    args = ap.parse_args()
+
+    started = time.time()
+    counts = compile_sqlite(args.out)
+    size = os.path.getsize(args.out) / (1024 * 1024)
+    print(f"✅ Compiled {counts['entries']} entries, {counts['examples']} examples and "
+          f"{counts['lookups']} lookups into {args.out} ({size:.1f} MiB) in {time.time() - started:.1f}s")
+    print(f"Serve with: TAMAYAME_BACKEND=sqlite TAMAYAME_SQLITE={args.out} python app.py")
+
+if __name__ == "__main__":
+    run()
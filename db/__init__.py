@@ -1,7 +1,7 @@
 # db/__init__.py
 
 # Core
-from .core import get_connection, normalize_morpheme
+from .core import get_connection, normalize_morpheme, fold_search_key, like_prefix
 from .mutations import insert_example
 
 # Intransitive helpers
@@ -38,6 +38,9 @@ from .entries_dal import (
     fetch_related_entries_by_segment,
     fetch_entries_with_template,
     get_entry_by_id,
+    get_media_for_entry,
+    fetch_subclass_allomorphs,
+    fetch_headword,
 )
 
 # Examples (implemented in db/examples_dal.py)
@@ -50,6 +53,144 @@ from .examples_dal import (
     fetch_examples_by_template,  # optional helper; keep if implemented
 )
 
+# Paradigm generation (implemented in db/paradigm.py)
+from .paradigm import (
+    PARADIGM_COLUMNS,
+    load_paradigm_inventories,
+    iter_paradigm_cells,
+)
+
+# Morphological analyzer (implemented in db/analyzer.py)
+from .analyzer import (
+    MorphAnalyzer,
+    get_analyzer,
+    analyze_word,
+    analyze_corpus,
+)
+
+# Example auto-linking (implemented in db/autolink.py)
+from .autolink import (
+    AhoCorasick,
+    ensure_link_candidates_table,
+    scan_link_candidates,
+    fetch_link_candidates,
+    fetch_link_candidate_summary,
+    confirm_link_candidates,
+)
+
+# Example token index (implemented in db/textindex.py)
+from .textindex import (
+    ensure_example_token_index,
+    index_example_tokens,
+    rebuild_example_token_index,
+    search_examples_by_tokens,
+)
+
+# Full-text search (implemented in db/fts.py)
+from .fts import (
+    ensure_fulltext_search,
+    search_fulltext,
+    reverse_lookup_english,
+)
+
+# Folded search keys (implemented in db/search_keys.py)
+from .search_keys import SEARCH_KEY_COLUMNS, ensure_search_keys
+
+# Fuzzy headword suggestions (implemented in db/fuzzy.py)
+from .fuzzy import SUGGEST_THRESHOLD, ensure_trigram_indexes, suggest_headwords
+
+# Change counters + in-process autocomplete (db/changes.py, db/autocomplete.py)
+from .changes import ensure_change_counters, fetch_change_counters, poll_change_counters
+from .autocomplete import (
+    AUTOCOMPLETE_KINDS,
+    PrefixIndex,
+    get_autocomplete_index,
+    autocomplete,
+)
+
+# Tamayame alphabet collation (implemented in db/collation.py)
+from .collation import (
+    ALPHABET,
+    sort_key,
+    letter_bucket,
+    ensure_collation,
+    fetch_letter_counts,
+    has_sort_key,
+    entry_order_sql,
+)
+
+# Slot-signature search (implemented in db/slotsig.py)
+from .slotsig import (
+    ensure_slot_signatures,
+    rebuild_slot_signatures,
+    compile_slot_query,
+    search_slot_signatures,
+)
+
+# Allomorph usage postings (db/changes.py feed, db/postings.py index)
+from .changes import ensure_example_change_log, fetch_example_changes
+from .postings import (
+    Bitmap,
+    UsageIndex,
+    parse_usage_query,
+    get_usage_index,
+    query_usage,
+)
+
+# Builder option ranking by co-occurrence (implemented in db/cooccur.py)
+from .cooccur import (
+    CooccurrenceIndex,
+    get_cooccurrence_index,
+    note_example_saved,
+    rank_options,
+)
+
+# Paradigm coverage (implemented in db/coverage.py)
+from .coverage import (
+    COVERAGE_COLUMNS,
+    compute_paradigm_coverage,
+    get_paradigm_coverage,
+    coverage_matrix,
+)
+
+# Phonological rule cascade, UR → SR/IPA (implemented in db/phonology.py)
+from .phonology import load_rules, RuleCascade, realize_corpus
+
+# Orthography → IPA (implemented in db/orthography.py)
+from .orthography import GRAPHEME_IPA, to_ipa
+
+# Content-addressed media store (implemented in db/media_store.py)
+from .media_store import MEDIA_ROOT, ensure_media_store, store_upload, attach_media
+
+# Background media processing (implemented in db/media_worker.py)
+from .media_worker import wav_metadata, process_media, enqueue_media, process_pending_media
+
+# Bulk media directory import (implemented in db/media_import.py)
+from .media_import import MediaMatcher, import_media_files
+
+# Bulk page data for the static-site export (implemented in db/site_export.py)
+from .site_export import fetch_site_data, entry_page_data, example_page_data
+
+# Streaming JSONL / CSV / LIFT export (implemented in db/export.py)
+from .export import EXPORT_FORMATS, iter_export_entries, export_chunks, gzip_chunks
+
+# Schema snapshots: dump / COPY restore (implemented in db/snapshot.py)
+from .snapshot import write_snapshot, restore_snapshot
+
+# Database diff / three-way merge plan (implemented in db/sync.py)
+from .sync import SyncEndpoint, diff_table, merge_plan
+
+# Read-only SQLite backend (implemented in db/sqlite_backend.py)
+from .sqlite_backend import compile_sqlite, use_sqlite, use_postgres, sqlite_active
+
+# mmap'd headword → entry index file (implemented in db/headword_index.py)
+from .headword_index import (
+    HeadwordIndex,
+    build_headword_index,
+    load_headword_index,
+    get_headword_index,
+)
+
 # Mutations
 from .mutations import (
     insert_example,
@@ -60,7 +201,7 @@ from .mutations import (
 
 __all__ = [
     # core
-    "get_connection", "normalize_morpheme",
+    "get_connection", "normalize_morpheme", "fold_search_key", "like_prefix",
 
     # intransitive helpers
     "intransitive_class_letter", "fetch_entry_intransitive_classes",
@@ -89,12 +230,93 @@ __all__ = [
     "fetch_related_entries_by_segment",
     "fetch_entries_with_template",
     "get_entry_by_id",
+    "get_media_for_entry",
+    "fetch_subclass_allomorphs",
+    "fetch_headword",
 
     # examples
     "fetch_example_full", "fetch_example_by_id",
     "get_entries_for_example", "get_media_for_example",
     "fetch_examples_by_segment", "fetch_examples_by_template",
 
+    # paradigm
+    "PARADIGM_COLUMNS", "load_paradigm_inventories", "iter_paradigm_cells",
+
+    # analyzer
+    "MorphAnalyzer", "get_analyzer", "analyze_word", "analyze_corpus",
+
+    # auto-linking
+    "AhoCorasick", "ensure_link_candidates_table", "scan_link_candidates",
+    "fetch_link_candidates", "fetch_link_candidate_summary", "confirm_link_candidates",
+
+    # example token index
+    "ensure_example_token_index", "index_example_tokens",
+    "rebuild_example_token_index", "search_examples_by_tokens",
+
+    # full-text search
+    "ensure_fulltext_search", "search_fulltext", "reverse_lookup_english",
+
+    # search keys
+    "SEARCH_KEY_COLUMNS", "ensure_search_keys",
+
+    # fuzzy suggestions
+    "SUGGEST_THRESHOLD", "ensure_trigram_indexes", "suggest_headwords",
+
+    # change counters / autocomplete
+    "ensure_change_counters", "fetch_change_counters", "poll_change_counters",
+    "AUTOCOMPLETE_KINDS", "PrefixIndex", "get_autocomplete_index", "autocomplete",
+
+    # collation
+    "ALPHABET", "sort_key", "letter_bucket", "ensure_collation", "fetch_letter_counts",
+    "has_sort_key", "entry_order_sql",
+
+    # slot signatures
+    "ensure_slot_signatures", "rebuild_slot_signatures",
+    "compile_slot_query", "search_slot_signatures",
+
+    # usage postings
+    "ensure_example_change_log", "fetch_example_changes",
+    "Bitmap", "UsageIndex", "parse_usage_query", "get_usage_index", "query_usage",
+
+    # co-occurrence ranking
+    "CooccurrenceIndex", "get_cooccurrence_index", "note_example_saved", "rank_options",
+
+    # paradigm coverage
+    "COVERAGE_COLUMNS", "compute_paradigm_coverage", "get_paradigm_coverage", "coverage_matrix",
+
+    # phonology
+    "load_rules", "RuleCascade", "realize_corpus",
+
+    # orthography → IPA
+    "GRAPHEME_IPA", "to_ipa",
+
+    # media store
+    "MEDIA_ROOT", "ensure_media_store", "store_upload", "attach_media",
+
+    # media processing
+    "wav_metadata", "process_media", "enqueue_media", "process_pending_media",
+
+    # media import
+    "MediaMatcher", "import_media_files",
+
+    # static-site export
+    "fetch_site_data", "entry_page_data", "example_page_data",
+
+    # dictionary export
+    "EXPORT_FORMATS", "iter_export_entries", "export_chunks", "gzip_chunks",
+
+    # snapshots
+    "write_snapshot", "restore_snapshot",
+
+    # sync
+    "SyncEndpoint", "diff_table", "merge_plan",
+
+    # sqlite backend
+    "compile_sqlite", "use_sqlite", "use_postgres", "sqlite_active",
+
+    # headword index
+    "HeadwordIndex", "build_headword_index", "load_headword_index", "get_headword_index",
+
     # mutations
     "insert_example", "insert_morpheme", "insert_allomorph",
     "refresh_entry_summary_view",
@@ -0,0 +1,242 @@
+# db/analyzer.py
+import re
+import time
+from multiprocessing import Pool
+from psycopg2.extras import RealDictCursor
+from .core import get_connection, normalize_morpheme
+
+__all__ = [
+    "load_analyzer_lexicon",
+    "MorphAnalyzer",
+    "get_analyzer",
+    "analyze_word",
+    "analyze_corpus",
+]
+
+_WORD_RE = re.compile(r"[^\w\u02bc\u0300-\u036f]+")
+
+
+# ───────────────────────── helpers ───────────────────────── #
+def _fold(s):
+    """Surface-comparison key: normalize_morpheme rules, lowercased, no hyphens."""
+    return normalize_morpheme(s).lower().replace("-", "")
+
+
+def _slot_for_allomorph(davis_id, category):
+    """
+    Map an allomorphs row to its template slot: the Davis series digit wins,
+    then category (PRMP → 100, B/benefactive → B).
+    """
+    did = (davis_id or "").strip()
+    cat = (category or "").strip().lower()
+    if cat in ("b", "benefactive"):
+        return "B"
+    if did[:1] in ("1", "2", "3", "4", "5", "6"):
+        return did[0] + "00"
+    if cat == "prmp":
+        return "100"
+    if cat in ("400", "500", "600"):
+        return cat
+    return None
+
+
+def tokenize(text):
+    """Split example text into normalized word tokens (keeps ʼ and accents)."""
+    return [t for t in _WORD_RE.split(normalize_morpheme(text).lower()) if t]
+
+
+class _Trie:
+    __slots__ = ("root",)
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, key, payload):
+        node = self.root
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node.setdefault(None, []).append(payload)
+
+    def prefixes(self, word, start):
+        """Yield (end, payloads) for every stored key that matches word[start:end]."""
+        node = self.root
+        for i in range(start, len(word)):
+            node = node.get(word[i])
+            if node is None:
+                return
+            if None in node:
+                yield i + 1, node[None]
+
+
+# ───────────────────── lexicon loading ───────────────────── #
+def load_analyzer_lexicon():
+    """
+    Pull every form the analyzer can match, as plain tuples so the result can
+    be pickled into worker processes:
+      allomorphs:    (allomorph_id, form, ur_gloss, davis_id, category)
+      ta_allomorphs: (ta_id, form, number)
+      roots:         (morpheme_id, segment, gloss, entry_id)
+    """
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute("""
+            SELECT allomorph_id, form, ur_gloss, davis_id, category
+              FROM tamayame_dictionary.allomorphs
+             WHERE form IS NOT NULL AND form <> ''
+               AND COALESCE(category,'') <> 'TA'
+        """)
+        allomorphs = [(r["allomorph_id"], r["form"], r["ur_gloss"], r["davis_id"], r["category"])
+                      for r in cur.fetchall()]
+
+        cur.execute("""
+            SELECT ta_id, form, number
+              FROM tamayame_dictionary.ta_allomorphs
+             WHERE form IS NOT NULL AND form <> ''
+        """)
+        ta = [(r["ta_id"], r["form"], r["number"]) for r in cur.fetchall()]
+
+        cur.execute("""
+            SELECT morpheme_id, segment, gloss, entry_id
+              FROM tamayame_dictionary.morphemes
+             WHERE segment IS NOT NULL AND segment <> ''
+               AND LOWER(COALESCE(position,'')) = 'root'
+        """)
+        roots = [(r["morpheme_id"], r["segment"], r["gloss"], r["entry_id"])
+                 for r in cur.fetchall()]
+    finally:
+        cur.close(); conn.close()
+
+    return {"allomorphs": allomorphs, "ta_allomorphs": ta, "roots": roots}
+
+
+# ───────────────────────── analyzer ───────────────────────── #
+class MorphAnalyzer:
+    """
+    One character trie per template slot, searched only in the slot orders
+    that appear in TEMPLATES, so a segmentation is always a legal stem shape.
+    """
+
+    def __init__(self, lexicon, templates):
+        self.tries = {}
+        for aid, form, gloss, davis_id, category in lexicon["allomorphs"]:
+            slot = _slot_for_allomorph(davis_id, category)
+            key = _fold(form)
+            if slot and key:
+                self._trie(slot).insert(key, {
+                    "slot": slot, "kind": "allomorph", "id": aid,
+                    "form": form, "gloss": gloss, "davis_id": davis_id,
+                })
+        for ta_id, form, number in lexicon["ta_allomorphs"]:
+            key = _fold(form)
+            if key:
+                self._trie("TA").insert(key, {
+                    "slot": "TA", "kind": "ta", "id": ta_id,
+                    "form": form, "gloss": number, "davis_id": None,
+                })
+        for mid, segment, gloss, entry_id in lexicon["roots"]:
+            key = _fold(segment)
+            if key:
+                self._trie("ROOT").insert(key, {
+                    "slot": "ROOT", "kind": "morpheme", "id": mid,
+                    "form": segment, "gloss": gloss, "davis_id": None,
+                    "entry_id": entry_id,
+                })
+
+        # Distinct slot orders → template ids that share them
+        self.shapes = {}
+        for t in templates:
+            self.shapes.setdefault(tuple(t["slot_order"]), []).append(t["template_id"])
+
+    def _trie(self, slot):
+        return self.tries.setdefault(slot, _Trie())
+
+    def _walk(self, word, pos, slots, idx, path, out):
+        if idx == len(slots):
+            if pos == len(word):
+                out.append(list(path))
+            return
+        trie = self.tries.get(slots[idx])
+        if trie is None:
+            return
+        for end, payloads in trie.prefixes(word, pos):
+            for p in payloads:
+                path.append(p)
+                self._walk(word, end, slots, idx + 1, path, out)
+                path.pop()
+
+    def analyze(self, word, entry_id=None, limit=10):
+        """
+        Return ranked segmentations of one surface word:
+          [{template_ids, slot_order, score, segments:[{slot, kind, id, form, gloss, davis_id}]}]
+        Fewer, longer segments rank first; roots from `entry_id` get a boost.
+        """
+        w = _fold(word)
+        if not w:
+            return []
+        results = []
+        for slots, template_ids in self.shapes.items():
+            found = []
+            self._walk(w, 0, slots, 0, [], found)
+            for segs in found:
+                root_len = sum(len(_fold(s["form"])) for s in segs if s["slot"] == "ROOT")
+                own_root = entry_id is not None and any(
+                    s.get("entry_id") == entry_id for s in segs if s["slot"] == "ROOT")
+                score = root_len - len(segs) + (10 if own_root else 0)
+                results.append({
+                    "template_ids": template_ids,
+                    "slot_order": list(slots),
+                    "score": score,
+                    "segments": segs,
+                })
+        results.sort(key=lambda r: (-r["score"], r["template_ids"][0]))
+        return results[:limit] if limit else results
+
+
+# ───────────────────── cached instance ───────────────────── #
+_ANALYZER = None
+_ANALYZER_BUILT = 0.0
+_ANALYZER_TTL = 300  # seconds
+
+
+def get_analyzer(templates=None, refresh=False):
+    """Process-wide analyzer, rebuilt from the database every few minutes."""
+    global _ANALYZER, _ANALYZER_BUILT
+    if refresh or _ANALYZER is None or time.time() - _ANALYZER_BUILT > _ANALYZER_TTL:
+        if templates is None:
+            from template_defs import TEMPLATES as templates
+        _ANALYZER = MorphAnalyzer(load_analyzer_lexicon(), templates)
+        _ANALYZER_BUILT = time.time()
+    return _ANALYZER
+
+
+def analyze_word(word, entry_id=None, limit=10):
+    return get_analyzer().analyze(word, entry_id=entry_id, limit=limit)
+
+
+# ───────────────────── corpus batch (process pool) ───────────────────── #
+_worker = None
+
+
+def _init_worker(lexicon, templates):
+    global _worker
+    _worker = MorphAnalyzer(lexicon, templates)
+
+
+def _analyze_one(args):
+    word, limit = args
+    return word, _worker.analyze(word, limit=limit)
+
+
+def analyze_corpus(words, processes=None, limit=3, chunksize=500):
+    """
+    Analyze many words with a process pool. The lexicon is loaded once here and
+    each worker compiles its own tries, so no database connection is shared.
+    Duplicate words are analyzed once. Returns {word: [segmentations]}.
+    """
+    from template_defs import TEMPLATES
+    lexicon = load_analyzer_lexicon()
+    uniq = list(dict.fromkeys(w for w in words if w))
+    with Pool(processes, initializer=_init_worker, initargs=(lexicon, TEMPLATES)) as pool:
+        return dict(pool.imap_unordered(_analyze_one, ((w, limit) for w in uniq),
+                                        chunksize=chunksize))
@@ -0,0 +1,173 @@
+# db/autocomplete.py
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from psycopg2.extras import RealDictCursor
+from .core import get_connection, fold_search_key
+from .changes import poll_change_counters
+
+__all__ = [
+    "AUTOCOMPLETE_KINDS",
+    "PrefixIndex",
+    "load_autocomplete_index",
+    "get_autocomplete_index",
+    "autocomplete",
+]
+
+AUTOCOMPLETE_KINDS = ("headword", "segment", "allomorph")
+
+# Prefixes matching more than this many keys get a precomputed top-by-usage
+# list; smaller ranges are cheap enough to rank on the fly.
+_TOP_MIN_RANGE = 256
+_TOP_K = 50
+
+
+# ───────────────────────── structure ───────────────────────── #
+class PrefixIndex:
+    """
+    Sorted array of (folded key, item) for one kind. A prefix query is two
+    bisects into `keys`; the matching items are a contiguous slice.
+    """
+
+    __slots__ = ("keys", "items", "_top")
+
+    def __init__(self, pairs):
+        pairs = sorted(pairs, key=lambda p: (p[0], -p[1]["usage"], p[1]["id"]))
+        self.keys = [k for k, _ in pairs]
+        self.items = [it for _, it in pairs]
+        self._top = {}
+        frontier = [""]
+        while frontier:
+            nxt = []
+            for p in frontier:
+                lo, hi = self._range(p)
+                if hi - lo <= _TOP_MIN_RANGE:
+                    continue
+                self._top[p] = heapq.nsmallest(_TOP_K, range(lo, hi), key=self._usage_key)
+                n = len(p)
+                nxt.extend(p + c for c in {self.keys[i][n] for i in range(lo, hi)
+                                           if len(self.keys[i]) > n})
+            frontier = nxt
+
+    def _usage_key(self, i):
+        return -self.items[i]["usage"], self.keys[i]
+
+    def _range(self, key):
+        lo = bisect_left(self.keys, key)
+        hi = bisect_left(self.keys, key + "\U0010ffff", lo)
+        return lo, hi
+
+    def count(self, prefix):
+        lo, hi = self._range(fold_search_key(prefix))
+        return hi - lo
+
+    def query(self, prefix, limit=10, by_usage=False):
+        """Items whose folded key starts with `prefix`, alphabetical or top-k by usage."""
+        key = fold_search_key(prefix)
+        lo, hi = self._range(key)
+        if not by_usage:
+            return self.items[lo:min(hi, lo + limit)]
+        top = self._top.get(key)
+        if top is not None and limit <= _TOP_K:
+            return [self.items[i] for i in top[:limit]]
+        best = heapq.nsmallest(limit, range(lo, hi), key=self._usage_key)
+        return [self.items[i] for i in best]
+
+
+# ───────────────────────── loading ───────────────────────── #
+def load_autocomplete_index():
+    """
+    Read every headword, root/affix segment and allomorph form with its id
+    and a usage count (linked examples), and build one PrefixIndex per kind.
+    """
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute("""
+            SELECT e.entry_id AS id, e.headword AS form, e.affix_position,
+                   e.pos, e.translation_en AS gloss,
+                   COUNT(ee.example_id)::int AS usage
+              FROM tamayame_dictionary.entries e
+              LEFT JOIN tamayame_dictionary.example_entries ee ON ee.entry_id = e.entry_id
+             WHERE e.headword IS NOT NULL AND e.headword <> ''
+             GROUP BY e.entry_id
+        """)
+        headwords = [dict(r, entry_id=r["id"]) for r in cur.fetchall()]
+
+        cur.execute("""
+            SELECT m.morpheme_id AS id, m.segment AS form, m.entry_id,
+                   m.position, m.gloss,
+                   COUNT(em.example_id)::int AS usage
+              FROM tamayame_dictionary.morphemes m
+              LEFT JOIN tamayame_dictionary.example_morphemes em ON em.morpheme_id = m.morpheme_id
+             WHERE m.segment IS NOT NULL AND m.segment <> ''
+             GROUP BY m.morpheme_id
+        """)
+        segments = [dict(r) for r in cur.fetchall()]
+
+        cur.execute("""
+            SELECT a.allomorph_id AS id, a.form, a.entry_id, a.davis_id,
+                   a.ur_gloss AS gloss,
+                   COUNT(em.example_id)::int AS usage
+              FROM tamayame_dictionary.allomorphs a
+              LEFT JOIN tamayame_dictionary.example_morphemes em ON em.allomorph_id = a.allomorph_id
+             WHERE a.form IS NOT NULL AND a.form <> ''
+             GROUP BY a.allomorph_id
+        """)
+        allomorphs = [dict(r) for r in cur.fetchall()]
+    finally:
+        cur.close(); conn.close()
+
+    def build(rows):
+        return PrefixIndex((fold_search_key(r["form"]), r) for r in rows)
+
+    return {
+        "headword": build(headwords),
+        "segment": build(segments),
+        "allomorph": build(allomorphs),
+    }
+
+
+# ───────────────────── cached instance ───────────────────── #
+_INDEX = None
+_INDEX_VERSION = None
+_INDEX_BUILT = 0.0
+_CHECKED = 0.0
+_CHECK_INTERVAL = 2.0    # seconds between change-counter polls
+_FALLBACK_TTL = 300      # rebuild period when counters aren't installed
+_LOCK = threading.Lock()
+
+
+def get_autocomplete_index(refresh=False):
+    """
+    Process-wide index. Polls the 'lexicon' and 'examples' change counters
+    at most every couple of seconds and rebuilds only when one moved: forms
+    come from the lexicon, the by_usage ranking from linked examples.
+    """
+    global _INDEX, _INDEX_VERSION, _INDEX_BUILT, _CHECKED
+    now = time.time()
+    if not refresh and _INDEX is not None and now - _CHECKED < _CHECK_INTERVAL:
+        return _INDEX
+
+    with _LOCK:
+        _CHECKED = now
+        counters = poll_change_counters()
+        version = ((counters["lexicon"], counters["examples"])
+                   if "lexicon" in counters and "examples" in counters else None)
+        stale = (
+            refresh or _INDEX is None
+            or (version is not None and version != _INDEX_VERSION)
+            or (version is None and now - _INDEX_BUILT > _FALLBACK_TTL)
+        )
+        if stale:
+            _INDEX = load_autocomplete_index()
+            _INDEX_VERSION = version
+            _INDEX_BUILT = time.time()
+    return _INDEX
+
+
+def autocomplete(kind, prefix, limit=10, by_usage=False):
+    if kind not in AUTOCOMPLETE_KINDS:
+        raise ValueError(f"autocomplete: unknown kind {kind!r}")
+    return get_autocomplete_index()[kind].query(prefix, limit=limit, by_usage=by_usage)
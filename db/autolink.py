@@ -0,0 +1,252 @@
+# db/autolink.py
+from collections import deque
+from psycopg2.extras import RealDictCursor, execute_values
+from .core import get_connection, normalize_morpheme
+
+__all__ = [
+    "AhoCorasick",
+    "ensure_link_candidates_table",
+    "scan_link_candidates",
+    "fetch_link_candidates",
+    "fetch_link_candidate_summary",
+    "confirm_link_candidates",
+]
+
+
+def _fold(s):
+    return normalize_morpheme(s).lower()
+
+
+# ───────────────────────── automaton ───────────────────────── #
+class AhoCorasick:
+    """
+    Minimal Aho–Corasick automaton: add() every pattern, build() once, then
+    iter_matches() scans a text in a single pass regardless of pattern count.
+    """
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+
+    def add(self, pattern, payload):
+        node = 0
+        for ch in pattern:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append(payload)
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+        return self
+
+    def iter_matches(self, text):
+        """Yield the payload of every pattern occurrence in `text`."""
+        node = 0
+        for ch in text:
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for payload in self.out[node]:
+                yield payload
+
+
+# ───────────────────────── review queue ───────────────────────── #
+def ensure_link_candidates_table():
+    """Create the example→entry review queue if it doesn't exist yet."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tamayame_dictionary.example_link_candidates (
+            example_id  integer NOT NULL
+                REFERENCES tamayame_dictionary.examples(example_id) ON DELETE CASCADE,
+            entry_id    integer NOT NULL
+                REFERENCES tamayame_dictionary.entries(entry_id) ON DELETE CASCADE,
+            matched     text,
+            status      text NOT NULL DEFAULT 'pending'
+                CHECK (status IN ('pending', 'accepted', 'rejected')),
+            created_at  timestamp NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (example_id, entry_id)
+        )
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS example_link_candidates_entry_status_idx
+            ON tamayame_dictionary.example_link_candidates (entry_id, status)
+    """)
+    conn.commit()
+    cur.close(); conn.close()
+
+
+def scan_link_candidates(min_length=2, batch_size=5000):
+    """
+    One pass over every example: match all normalized headwords at once and
+    queue (example_id, entry_id) pairs not already in example_entries.
+    Pairs that were reviewed before keep their status. Returns rows queued.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT entry_id, headword
+          FROM tamayame_dictionary.entries
+         WHERE headword IS NOT NULL
+    """)
+    ac = AhoCorasick()
+    for entry_id, headword in cur.fetchall():
+        key = _fold(headword)
+        if len(key) >= min_length:
+            ac.add(key, (entry_id, key))
+    ac.build()
+
+    cur.execute("SELECT example_id, entry_id FROM tamayame_dictionary.example_entries")
+    linked = set(cur.fetchall())
+
+    # Server-side cursor: stream example texts instead of loading them all
+    scan = conn.cursor(name="autolink_examples_scan")
+    scan.itersize = batch_size
+    scan.execute("""
+        SELECT example_id, tamayame_text
+          FROM tamayame_dictionary.examples
+         WHERE tamayame_text IS NOT NULL
+    """)
+
+    queued = 0
+    batch = []
+    write = conn.cursor()
+    for example_id, text in scan:
+        seen = set()
+        for entry_id, key in ac.iter_matches(_fold(text)):
+            if entry_id in seen or (example_id, entry_id) in linked:
+                continue
+            seen.add(entry_id)
+            batch.append((example_id, entry_id, key))
+        if len(batch) >= batch_size:
+            queued += _queue(write, batch)
+            batch = []
+    if batch:
+        queued += _queue(write, batch)
+
+    scan.close()
+    conn.commit()
+    write.close(); cur.close(); conn.close()
+    return queued
+
+
+def _queue(cur, rows):
+    execute_values(cur, """
+        INSERT INTO tamayame_dictionary.example_link_candidates
+            (example_id, entry_id, matched)
+        VALUES %s
+        ON CONFLICT (example_id, entry_id) DO NOTHING
+    """, rows, page_size=len(rows))
+    return cur.rowcount
+
+
+def fetch_link_candidates(entry_id, page=1, per_page=50):
+    """
+    Pending candidates for one entry, paged.
+    Returns: (rows, total_count) — rows are (example_id, tamayame_text, translation_en).
+    total_count is None when the entry has no candidate rows in any status,
+    i.e. the batch scan has never queued (or reviewed) anything for it.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT COUNT(*) FILTER (WHERE c.status = 'pending'), COUNT(*)
+          FROM tamayame_dictionary.example_link_candidates c
+         WHERE c.entry_id = %s
+    """, (entry_id,))
+    pending, queued = cur.fetchone()
+    if not queued:
+        cur.close(); conn.close()
+        return [], None
+    total = int(pending)
+
+    offset = max(0, (int(page or 1) - 1) * int(per_page))
+    cur.execute("""
+        SELECT e.example_id, e.tamayame_text, e.translation_en
+          FROM tamayame_dictionary.example_link_candidates c
+          JOIN tamayame_dictionary.examples e
+            ON e.example_id = c.example_id
+         WHERE c.entry_id = %s AND c.status = 'pending'
+         ORDER BY e.example_id
+         LIMIT %s OFFSET %s
+    """, (entry_id, int(per_page), offset))
+    rows = cur.fetchall()
+    cur.close(); conn.close()
+    return rows, total
+
+
+def fetch_link_candidate_summary(page=1, per_page=100):
+    """
+    Entries with pending candidates and how many, paged.
+    Returns: (rows, total_count)
+    """
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute("""
+        SELECT COUNT(DISTINCT entry_id) AS c
+          FROM tamayame_dictionary.example_link_candidates
+         WHERE status = 'pending'
+    """)
+    total = int(cur.fetchone()["c"])
+
+    offset = max(0, (int(page or 1) - 1) * int(per_page))
+    cur.execute("""
+        SELECT en.entry_id, en.headword, en.affix_position, COUNT(*)::int AS pending
+          FROM tamayame_dictionary.example_link_candidates c
+          JOIN tamayame_dictionary.entries en
+            ON en.entry_id = c.entry_id
+         WHERE c.status = 'pending'
+         GROUP BY en.entry_id, en.headword, en.affix_position
+         ORDER BY en.headword, en.entry_id
+         LIMIT %s OFFSET %s
+    """, (int(per_page), offset))
+    rows = [dict(r) for r in cur.fetchall()]
+    cur.close(); conn.close()
+    return rows, total
+
+
+def confirm_link_candidates(entry_id, accepted_ids, rejected_ids=()):
+    """
+    Link the accepted examples to the entry and close out the reviewed
+    candidates. Examples offered by the legacy per-entry scan have no
+    candidate row yet; one is written so the decision sticks.
+    Returns how many new example_entries rows were written.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    linked = 0
+    for example_id in accepted_ids:
+        cur.execute("""
+            INSERT INTO tamayame_dictionary.example_entries (example_id, entry_id)
+            VALUES (%s, %s)
+            ON CONFLICT DO NOTHING
+        """, (example_id, entry_id))
+        linked += cur.rowcount
+    for status, ids in (("accepted", accepted_ids), ("rejected", rejected_ids)):
+        if ids:
+            execute_values(cur, """
+                INSERT INTO tamayame_dictionary.example_link_candidates
+                    (example_id, entry_id, status)
+                VALUES %s
+                ON CONFLICT (example_id, entry_id) DO UPDATE SET status = EXCLUDED.status
+            """, [(example_id, entry_id, status) for example_id in ids])
+    conn.commit()
+    cur.close(); conn.close()
+    return linked
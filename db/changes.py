@@ -0,0 +1,211 @@
+# db/changes.py
+import threading
+import time
+from .core import get_connection
+
+__all__ = [
+    "CHANGE_COUNTER_TABLES",
+    "EXAMPLE_CHANGE_TABLES",
+    "ensure_change_counters",
+    "fetch_change_counters",
+    "poll_change_counters",
+    "ensure_example_change_log",
+    "fetch_example_change_seq",
+    "fetch_example_changes",
+]
+
+# counter name → tables whose writes bump it
+CHANGE_COUNTER_TABLES = {
+    "lexicon":  ("entries", "morphemes", "allomorphs", "ta_allomorphs"),
+    "examples": ("examples", "example_morphemes", "example_entries", "example_prmp_allomorphs"),
+}
+
+# tables whose row changes are logged per example_id (the example change feed)
+EXAMPLE_CHANGE_TABLES = ("examples", "example_morphemes", "example_prmp_allomorphs", "example_entries")
+
+COUNTER_POLL_INTERVAL = 2.0    # seconds a polled counter snapshot is reused
+
+
+def ensure_change_counters():
+    """
+    Create change_counters plus statement-level triggers that bump a counter
+    whenever one of its tables is written. In-process caches compare the
+    counter instead of re-reading tables. Safe to re-run.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tamayame_dictionary.change_counters (
+            name        text PRIMARY KEY,
+            version     bigint    NOT NULL DEFAULT 0,
+            changed_at  timestamp NOT NULL DEFAULT NOW()
+        )
+    """)
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION tamayame_dictionary.bump_change_counter()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            INSERT INTO tamayame_dictionary.change_counters (name, version, changed_at)
+            VALUES (TG_ARGV[0], 1, NOW())
+            ON CONFLICT (name) DO UPDATE
+               SET version = change_counters.version + 1,
+                   changed_at = NOW();
+            RETURN NULL;
+        END
+        $$
+    """)
+    for name, tables in CHANGE_COUNTER_TABLES.items():
+        cur.execute("""
+            INSERT INTO tamayame_dictionary.change_counters (name) VALUES (%s)
+            ON CONFLICT (name) DO NOTHING
+        """, (name,))
+        for table in tables:
+            cur.execute(f"""
+                DROP TRIGGER IF EXISTS {table}_bump_{name}
+                  ON tamayame_dictionary.{table}
+            """)
+            cur.execute(f"""
+                CREATE TRIGGER {table}_bump_{name}
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE
+                  ON tamayame_dictionary.{table}
+                FOR EACH STATEMENT
+                EXECUTE FUNCTION tamayame_dictionary.bump_change_counter('{name}')
+            """)
+    conn.commit()
+    cur.close(); conn.close()
+
+
+def fetch_change_counters(cur=None):
+    """
+    {name: version} for every counter. Returns {} if the table isn't set up,
+    so callers can fall back to time-based refresh.
+    """
+    own = cur is None
+    if own:
+        conn = get_connection()
+        cur = conn.cursor()
+    try:
+        cur.execute("SELECT name, version FROM tamayame_dictionary.change_counters")
+        return {name: int(version) for name, version in cur.fetchall()}
+    except Exception:
+        if own:
+            conn.rollback()
+        return {}
+    finally:
+        if own:
+            cur.close(); conn.close()
+
+
+_POLLED = {}
+_POLLED_AT = 0.0
+_POLL_LOCK = threading.Lock()
+
+
+def poll_change_counters(max_age=COUNTER_POLL_INTERVAL):
+    """
+    fetch_change_counters() shared by every in-process cache: at most one
+    query per `max_age` seconds however many caches ask, so a request that
+    finds its cache current costs no database round-trip.
+    """
+    global _POLLED, _POLLED_AT
+    if time.time() - _POLLED_AT < max_age:
+        return _POLLED
+    with _POLL_LOCK:
+        if time.time() - _POLLED_AT >= max_age:
+            _POLLED = fetch_change_counters()
+            _POLLED_AT = time.time()
+        return _POLLED
+
+
+# ───────────────────── example change feed ───────────────────── #
+def ensure_example_change_log():
+    """
+    Create example_change_log, an append-only feed of (seq, example_id), with
+    row triggers on EXAMPLE_CHANGE_TABLES. In-memory indexes remember the
+    last seq they applied and replay only newer examples. Safe to re-run.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tamayame_dictionary.example_change_log (
+            seq         bigserial PRIMARY KEY,
+            example_id  integer   NOT NULL,
+            changed_at  timestamp NOT NULL DEFAULT NOW()
+        )
+    """)
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION tamayame_dictionary.log_example_change()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                INSERT INTO tamayame_dictionary.example_change_log (example_id)
+                VALUES (OLD.example_id);
+            END IF;
+            IF TG_OP = 'INSERT'
+               OR (TG_OP = 'UPDATE' AND NEW.example_id IS DISTINCT FROM OLD.example_id) THEN
+                INSERT INTO tamayame_dictionary.example_change_log (example_id)
+                VALUES (NEW.example_id);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    for table in EXAMPLE_CHANGE_TABLES:
+        cur.execute(f"DROP TRIGGER IF EXISTS {table}_log_change ON tamayame_dictionary.{table}")
+        cur.execute(f"""
+            CREATE TRIGGER {table}_log_change
+            AFTER INSERT OR UPDATE OR DELETE
+              ON tamayame_dictionary.{table}
+            FOR EACH ROW
+            EXECUTE FUNCTION tamayame_dictionary.log_example_change()
+        """)
+    conn.commit()
+    cur.close(); conn.close()
+
+
+def fetch_example_change_seq(cur=None):
+    """Latest seq in example_change_log (0 if empty), or None if it isn't set up."""
+    own = cur is None
+    if own:
+        conn = get_connection()
+        cur = conn.cursor()
+    try:
+        cur.execute("SELECT COALESCE(MAX(seq), 0) FROM tamayame_dictionary.example_change_log")
+        return int(cur.fetchone()[0])
+    except Exception:
+        if own:
+            conn.rollback()
+        return None
+    finally:
+        if own:
+            cur.close(); conn.close()
+
+
+def fetch_example_changes(since_seq, cur=None):
+    """
+    (max_seq, example_ids changed after `since_seq`). Returns (None, None) if
+    the log isn't set up, so callers can fall back to a full rebuild.
+    """
+    own = cur is None
+    if own:
+        conn = get_connection()
+        cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT COALESCE(MAX(seq), %s), COALESCE(array_agg(DISTINCT example_id), '{}')
+              FROM tamayame_dictionary.example_change_log
+             WHERE seq > %s
+        """, (int(since_seq or 0), int(since_seq or 0)))
+        max_seq, ids = cur.fetchone()
+        return int(max_seq), list(ids)
+    except Exception:
+        if own:
+            conn.rollback()
+        return None, None
+    finally:
+        if own:
+            cur.close(); conn.close()
@@ -0,0 +1,254 @@
+# db/collation.py
+import re
+import time
+import unicodedata
+from psycopg2.extras import RealDictCursor
+from .core import get_connection, fold_search_key
+from .sqlite_backend import sqlite_readable
+
+__all__ = [
+    "ALPHABET",
+    "split_letters",
+    "sort_key",
+    "letter_bucket",
+    "letter_range",
+    "ensure_collation",
+    "rebuild_letter_counts",
+    "fetch_letter_counts",
+    "has_sort_key",
+    "entry_order_sql",
+]
+
+# Dictionary order. Digraphs/trigraphs and glottalized letters are single
+# letters; edit here and re-run ensure_collation() to re-sort.
+ALPHABET = [
+    "a", "b", "ch", "chʼ", "d", "dr", "dy", "dz", "e", "g", "h", "i", "j",
+    "k", "kʼ", "m", "mʼ", "n", "nʼ", "ny", "nyʼ", "o", "p", "pʼ", "r", "rʼ",
+    "s", "sʼ", "sh", "shʼ", "sr", "srʼ", "t", "tʼ", "tr", "trʼ", "ts", "tsʼ",
+    "ty", "tyʼ", "u", "w", "wʼ", "y", "yʼ", "ʼ",
+]
+
+_POSITION = {letter: i for i, letter in enumerate(ALPHABET)}
+# longest first so "tsʼ" wins over "ts" and "t"
+_LETTER_PATTERN = "|".join(sorted(ALPHABET, key=len, reverse=True)) + "|."
+_LETTER_RE = re.compile(_LETTER_PATTERN)
+
+# sort_key layout: one char per letter (A, B, C, … in ALPHABET order), space
+# kept as-is, unknown characters as "~" + char; then \x01 and the lowercased
+# NFC headword as an accent-aware tie-break. Compared under COLLATE "C".
+_TIE = "\x01"
+
+
+def _code(letter):
+    if letter == " ":
+        return " "
+    i = _POSITION.get(letter)
+    return chr(65 + i) if i is not None else "~" + letter
+
+
+def split_letters(s):
+    """Headword → alphabet letters (accents folded, affix hyphens dropped)."""
+    return _LETTER_RE.findall(fold_search_key(s).replace("-", ""))
+
+
+def sort_key(s):
+    """Python twin of SQL tamayame_sort_key(); sorts headwords in dictionary order."""
+    tie = unicodedata.normalize("NFC", s or "").lower()
+    return "".join(_code(l) for l in split_letters(s)) + _TIE + tie
+
+
+def letter_bucket(s):
+    """First alphabet letter of a headword, or None."""
+    for l in split_letters(s):
+        if l in _POSITION:
+            return l
+    return None
+
+
+def letter_range(letter):
+    """(lo, hi) such that lo <= sort_key < hi selects exactly that letter's bucket."""
+    c = _code(letter)
+    return c, chr(ord(c) + 1)
+
+
+# ───────────────────────── schema ───────────────────────── #
+def _sql_array(values):
+    return "ARRAY[" + ", ".join("'" + v.replace("'", "''") + "'" for v in values) + "]::text[]"
+
+
+def ensure_collation():
+    """
+    Install the SQL twins of split_letters/sort_key/letter_bucket, generated
+    entries.sort_key (COLLATE "C", btree) and entries.letter_bucket columns,
+    and entry_letter_counts kept exact by a row trigger. Needs the
+    fold_search_key() SQL function from ensure_search_keys(). Safe to re-run.
+    """
+    alphabet = _sql_array(ALPHABET)
+    pattern = _LETTER_PATTERN.replace("'", "''")
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(f"""
+        CREATE OR REPLACE FUNCTION tamayame_dictionary.tamayame_letters(s text)
+        RETURNS text[]
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$
+            SELECT coalesce(array_agg(t.m[1] ORDER BY t.n), '{{}}')
+              FROM regexp_matches(replace(tamayame_dictionary.fold_search_key(s), '-', ''),
+                                  '{pattern}', 'g') WITH ORDINALITY AS t(m, n)
+        $$
+    """)
+    cur.execute(f"""
+        CREATE OR REPLACE FUNCTION tamayame_dictionary.tamayame_sort_key(s text)
+        RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$
+            SELECT coalesce(string_agg(
+                       CASE WHEN t.l = ' ' THEN ' '
+                            WHEN array_position({alphabet}, t.l) IS NULL THEN '~' || t.l
+                            ELSE chr(64 + array_position({alphabet}, t.l))
+                       END, '' ORDER BY t.n), '')
+                   || chr(1) || lower(normalize(coalesce(s, ''), NFC))
+              FROM unnest(tamayame_dictionary.tamayame_letters(s)) WITH ORDINALITY AS t(l, n)
+        $$
+    """)
+    cur.execute(f"""
+        CREATE OR REPLACE FUNCTION tamayame_dictionary.tamayame_letter_bucket(s text)
+        RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$
+            SELECT t.l
+              FROM unnest(tamayame_dictionary.tamayame_letters(s)) WITH ORDINALITY AS t(l, n)
+             WHERE t.l = ANY({alphabet})
+             ORDER BY t.n
+             LIMIT 1
+        $$
+    """)
+    cur.execute("""
+        ALTER TABLE tamayame_dictionary.entries
+          ADD COLUMN IF NOT EXISTS sort_key text COLLATE "C"
+              GENERATED ALWAYS AS (tamayame_dictionary.tamayame_sort_key(headword)) STORED,
+          ADD COLUMN IF NOT EXISTS letter_bucket text
+              GENERATED ALWAYS AS (tamayame_dictionary.tamayame_letter_bucket(headword)) STORED
+    """)
+    # generated values don't follow a replaced function; touch rows whose key moved
+    cur.execute("""
+        UPDATE tamayame_dictionary.entries
+           SET headword = headword
+         WHERE sort_key IS DISTINCT FROM tamayame_dictionary.tamayame_sort_key(headword)
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS entries_sort_key_idx
+            ON tamayame_dictionary.entries (sort_key, entry_id)
+    """)
+
+    # small cached count table, kept exact by a row trigger
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tamayame_dictionary.entry_letter_counts (
+            letter  text PRIMARY KEY,
+            n       integer NOT NULL DEFAULT 0
+        )
+    """)
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION tamayame_dictionary.entry_letter_counts_sync()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.letter_bucket IS NOT NULL THEN
+                UPDATE tamayame_dictionary.entry_letter_counts
+                   SET n = n - 1 WHERE letter = OLD.letter_bucket;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'INSERT') AND NEW.letter_bucket IS NOT NULL THEN
+                INSERT INTO tamayame_dictionary.entry_letter_counts (letter, n)
+                VALUES (NEW.letter_bucket, 1)
+                ON CONFLICT (letter) DO UPDATE SET n = entry_letter_counts.n + 1;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    cur.execute("DROP TRIGGER IF EXISTS entries_letter_counts ON tamayame_dictionary.entries")
+    cur.execute("""
+        CREATE TRIGGER entries_letter_counts
+        AFTER INSERT OR DELETE OR UPDATE OF headword
+          ON tamayame_dictionary.entries
+        FOR EACH ROW
+        EXECUTE FUNCTION tamayame_dictionary.entry_letter_counts_sync()
+    """)
+    _fill_letter_counts(cur)
+    conn.commit()
+    cur.close(); conn.close()
+
+
+def _fill_letter_counts(cur):
+    cur.execute("DELETE FROM tamayame_dictionary.entry_letter_counts")
+    cur.execute("""
+        INSERT INTO tamayame_dictionary.entry_letter_counts (letter, n)
+        SELECT letter_bucket, COUNT(*)
+          FROM tamayame_dictionary.entries
+         WHERE letter_bucket IS NOT NULL
+         GROUP BY letter_bucket
+    """)
+
+
+def rebuild_letter_counts():
+    """Recount entry_letter_counts from scratch (e.g. after ALPHABET changes)."""
+    conn = get_connection()
+    cur = conn.cursor()
+    _fill_letter_counts(cur)
+    conn.commit()
+    cur.close(); conn.close()
+
+
+_HAS_SORT_KEY = False
+_SORT_KEY_CHECKED = 0.0
+_SORT_KEY_RECHECK = 60.0
+
+
+def has_sort_key():
+    """
+    True once ensure_collation() has added entries.sort_key. Until then it is
+    re-checked at most once a minute, so lists keep working (in headword
+    order) on a database that hasn't been migrated yet.
+    """
+    global _HAS_SORT_KEY, _SORT_KEY_CHECKED
+    now = time.time()
+    if _HAS_SORT_KEY or now - _SORT_KEY_CHECKED < _SORT_KEY_RECHECK:
+        return _HAS_SORT_KEY
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT 1 FROM information_schema.columns
+             WHERE table_schema = 'tamayame_dictionary'
+               AND table_name = 'entries' AND column_name = 'sort_key'
+        """)
+        _HAS_SORT_KEY = cur.fetchone() is not None
+    finally:
+        cur.close(); conn.close()
+    _SORT_KEY_CHECKED = now
+    return _HAS_SORT_KEY
+
+
+def entry_order_sql(alias="e"):
+    """ORDER BY list for entries: dictionary order, or headword before ensure_collation()."""
+    return f"{alias}.sort_key, {alias}.entry_id" if has_sort_key() else f"{alias}.headword, {alias}.entry_id"
+
+
+@sqlite_readable
+def fetch_letter_counts():
+    """
+    [{letter, n}] for every letter in ALPHABET order (0 for empty letters).
+    Returns [] if the collation hasn't been installed yet.
+    """
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute("SELECT letter, n FROM tamayame_dictionary.entry_letter_counts")
+        counts = {r["letter"]: r["n"] for r in cur.fetchall()}
+    except Exception:
+        conn.rollback()
+        return []
+    finally:
+        cur.close(); conn.close()
+    return [{"letter": l, "n": counts.get(l, 0)} for l in ALPHABET]
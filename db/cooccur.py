@@ -0,0 +1,266 @@
+# db/cooccur.py
+import threading
+import time
+from collections import Counter
+from .core import get_connection
+from .changes import fetch_example_change_seq, fetch_example_changes, poll_change_counters
+
+__all__ = [
+    "CooccurrenceIndex",
+    "parse_chosen",
+    "get_cooccurrence_index",
+    "note_example_saved",
+    "rank_options",
+]
+
+# Keys are (slot, id): ("100", allomorph_id), ("TA", ta_allomorph_id),
+# ("ROOT", morpheme_id), and ("ENTRY", entry_id) from example_entries.
+_ENTRY = "ENTRY"
+
+
+# ───────────────────────── structure ───────────────────────── #
+class CooccurrenceIndex:
+    """
+    Sparse co-occurrence counts over examples. `pairs[a][slot]` is a Counter
+    of ids in `slot` seen in the same example as key `a`, which is one row of
+    the a.slot × slot matrix. `totals[a]` counts the examples containing `a`.
+    Each example's key set is kept, so a saved example can be subtracted and
+    re-added without a rebuild.
+    """
+
+    def __init__(self):
+        self.pairs = {}
+        self.totals = Counter()
+        self.by_example = {}
+        self.seq = 0
+        # keys whose pairs row this instance owns; None = all of them
+        self._owned = None
+
+    def _fork(self):
+        """
+        Copy-on-write clone, as UsageIndex._fork: top-level maps are copied,
+        pairs rows are shared until _row() first touches them, so readers
+        of the old instance never see a half-applied change.
+        """
+        other = CooccurrenceIndex()
+        other.pairs = dict(self.pairs)
+        other.totals = Counter(self.totals)
+        other.by_example = dict(self.by_example)
+        other.seq = self.seq
+        other._owned = set()
+        return other
+
+    def _row(self, a, create=True):
+        row = self.pairs.get(a)
+        if row is None:
+            if not create:
+                return None
+            row = self.pairs[a] = {}
+        elif self._owned is not None and a not in self._owned:
+            row = self.pairs[a] = {slot: Counter(col) for slot, col in row.items()}
+        if self._owned is not None:
+            self._owned.add(a)
+        return row
+
+    @staticmethod
+    def _fetch_keys(cur, example_ids=None):
+        where, params = "", ()
+        if example_ids is not None:
+            where = "WHERE example_id = ANY(%s)"
+            params = (list(example_ids),)
+        cur.execute(f"""
+            SELECT example_id, slot, COALESCE(allomorph_id, ta_allomorph_id, morpheme_id)
+              FROM tamayame_dictionary.example_morphemes
+              {where}
+            UNION
+            SELECT example_id, '100', allomorph_id
+              FROM tamayame_dictionary.example_prmp_allomorphs
+              {where}
+            UNION
+            SELECT example_id, '{_ENTRY}', entry_id
+              FROM tamayame_dictionary.example_entries
+              {where}
+        """, params * 3)
+        keys = {}
+        for example_id, slot, key_id in cur.fetchall():
+            if slot and key_id is not None:
+                keys.setdefault(example_id, set()).add((str(slot).strip().upper(), key_id))
+        return keys
+
+    def _add(self, example_id, keys):
+        keys = frozenset(keys)
+        self.by_example[example_id] = keys
+        for a in keys:
+            self.totals[a] += 1
+            row = self._row(a)
+            for b in keys:
+                if b != a:
+                    row.setdefault(b[0], Counter())[b[1]] += 1
+
+    def _remove(self, example_id):
+        keys = self.by_example.pop(example_id, ())
+        for a in keys:
+            self.totals[a] -= 1
+            if self.totals[a] <= 0:
+                del self.totals[a]
+            row = self._row(a, create=False) or {}
+            for b in keys:
+                if b == a:
+                    continue
+                col = row.get(b[0])
+                if col is None:
+                    continue
+                col[b[1]] -= 1
+                if col[b[1]] <= 0:
+                    del col[b[1]]
+                    if not col:
+                        del row[b[0]]
+            if not row:
+                self.pairs.pop(a, None)
+
+    def load(self):
+        self.seq = fetch_example_change_seq() or 0
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            for example_id, keys in self._fetch_keys(cur).items():
+                self._add(example_id, keys)
+        finally:
+            cur.close(); conn.close()
+        return self
+
+    def apply_changes(self):
+        """
+        Replay the example change feed onto a copy. Returns the index to
+        publish (self when nothing changed), or None if there is no feed.
+        self is never modified, so it stays safe for concurrent readers.
+        """
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            seq, changed = fetch_example_changes(self.seq, cur)
+            if seq is None:
+                return None
+            if not changed:
+                self.seq = seq
+                return self
+            index = self._fork()
+            fresh = index._fetch_keys(cur, changed)
+            for example_id in changed:
+                index._remove(example_id)
+                if example_id in fresh:
+                    index._add(example_id, fresh[example_id])
+            index.seq = seq
+            index._owned = None
+            return index
+        finally:
+            cur.close(); conn.close()
+
+    def scores(self, slot, ids, context):
+        """
+        {id: score} for candidate ids in `slot`, where score is the sum over
+        context keys c of P(id | c) = count(c, id) / count(c).
+        """
+        slot = str(slot).upper()
+        out = dict.fromkeys(ids, 0.0)
+        for c in context:
+            n = self.totals.get(c)
+            col = self.pairs.get(c, {}).get(slot) if n else None
+            if not col:
+                continue
+            for i in out:
+                hit = col.get(i)
+                if hit:
+                    out[i] += hit / n
+        return out
+
+
+def parse_chosen(raw):
+    """'TA:3,300:88,ROOT:812' → [('TA', 3), ('300', 88), ('ROOT', 812)]; bad parts are skipped."""
+    out = []
+    for part in (raw or "").split(","):
+        slot, _, val = part.strip().partition(":")
+        if slot and val.strip().isdigit():
+            out.append((slot.strip().upper(), int(val)))
+    return out
+
+
+# ───────────────────── cached instance ───────────────────── #
+_INDEX = None
+_INDEX_VERSION = None
+_CHECKED = 0.0
+_BUILT = 0.0
+_CHECK_INTERVAL = 2.0    # feed replay period when counters aren't installed
+_FALLBACK_TTL = 300
+_LOCK = threading.Lock()
+
+
+def get_cooccurrence_index(refresh=False):
+    """
+    Process-wide CooccurrenceIndex. The change feed is only read when the
+    shared 'examples' counter poll says something moved, so a request that
+    finds the index current makes no query of its own. Without counters the
+    feed is replayed every couple of seconds (full rebuild every few minutes
+    if the feed isn't installed either). Updates are built on a copy and
+    published by swapping _INDEX, so rank_options() needs no lock.
+    """
+    global _INDEX, _INDEX_VERSION, _CHECKED, _BUILT
+    now = time.time()
+    version = poll_change_counters().get("examples")
+
+    def current():
+        if _INDEX is None:
+            return False
+        if version is not None:
+            return version == _INDEX_VERSION
+        return now - _CHECKED < _CHECK_INTERVAL
+
+    if not refresh and current():
+        return _INDEX
+    with _LOCK:
+        if not refresh and current():
+            return _INDEX
+        if refresh or _INDEX is None:
+            _INDEX = CooccurrenceIndex().load()
+            _BUILT = now
+        else:
+            updated = _INDEX.apply_changes()
+            if updated is not None:
+                _INDEX = updated
+            elif now - _BUILT > _FALLBACK_TTL:
+                _INDEX = CooccurrenceIndex().load()
+                _BUILT = now
+        _INDEX_VERSION = version
+        _CHECKED = now
+    return _INDEX
+
+
+def note_example_saved():
+    """Call after committing an example; folds the change into a loaded index right away."""
+    global _INDEX
+    if _INDEX is None:
+        return
+    with _LOCK:
+        updated = _INDEX.apply_changes()
+        if updated is not None:
+            _INDEX = updated
+
+
+def rank_options(options, slot, context, id_key="allomorph_id"):
+    """
+    Sort builder options by co-occurrence with the already chosen `context`
+    keys, most frequent first; ties fall back to overall usage in the slot,
+    then the incoming order. Each option gets a "cooc" score. Returns a new list.
+    """
+    if not options:
+        return options
+    index = get_cooccurrence_index()
+    scores = index.scores(slot, [o.get(id_key) for o in options], context)
+    slot = str(slot).upper()
+    ranked = sorted(
+        enumerate(options),
+        key=lambda p: (-scores.get(p[1].get(id_key), 0.0),
+                       -index.totals.get((slot, p[1].get(id_key)), 0),
+                       p[0]),
+    )
+    return [dict(o, cooc=round(scores.get(o.get(id_key), 0.0), 4)) for _, o in ranked]
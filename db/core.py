@@ -1,5 +1,6 @@
 # db/core.py
 import os
+import re
 import unicodedata
 import psycopg2
 
@@ -57,4 +58,29 @@ def normalize_morpheme(s: str | None) -> str:
         return ""
     s = unicodedata.normalize("NFC", s)
     s = s.replace("'", "ʼ")
-    return s.strip()
\ No newline at end of file
+    return s.strip()
+
+# Apostrophe look-alikes people type for the glottal stop
+_APOSTROPHES = str.maketrans({"'": "ʼ", "’": "ʼ", "‘": "ʼ", "`": "ʼ", "ʻ": "ʼ"})
+_COMBINING_RE = re.compile("[\u0300-\u036f]")
+
+
+def fold_search_key(s: str | None) -> str:
+    """
+    Search key for diacritic/apostrophe-insensitive lookups:
+      - apostrophe variants → ʼ (U+02BC)
+      - combining accents (U+0300–U+036F) removed, result NFC
+      - lowercased, whitespace collapsed
+    Must stay in step with the SQL fold_search_key() in db/search_keys.py,
+    which fills the stored *_key columns.
+    """
+    if not s:
+        return ""
+    s = unicodedata.normalize("NFD", s).translate(_APOSTROPHES)
+    s = unicodedata.normalize("NFC", _COMBINING_RE.sub("", s)).lower()
+    return " ".join(s.split())
+
+
+def like_prefix(key: str) -> str:
+    """LIKE pattern matching values that start with `key` (wildcards escaped)."""
+    return key.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
@@ -0,0 +1,208 @@
+# db/coverage.py
+import threading
+import time
+from collections import Counter
+from psycopg2.extras import RealDictCursor
+from .core import get_connection
+from .intransitive import _norm_number
+from .changes import poll_change_counters
+
+__all__ = [
+    "COVERAGE_TA_AXIS",
+    "COVERAGE_SUFFIX_AXIS",
+    "COVERAGE_COLUMNS",
+    "compute_paradigm_coverage",
+    "get_paradigm_coverage",
+    "coverage_matrix",
+    "iter_coverage_rows",
+]
+
+# Matrix axes. Rows are TA number × PRMP Davis base code (101, 102, …);
+# columns are the suffix family the example carries ("none" = no 4/5/600).
+COVERAGE_TA_AXIS = ["sg", "dl", "pl", "—"]
+COVERAGE_SUFFIX_AXIS = ["none", "400", "500", "600"]
+
+# Long-form CSV columns
+COVERAGE_COLUMNS = ["scope", "scope_id", "label", "ta_number", "prmp", "suffix", "examples"]
+
+# One pass: every linked example → (entry, TA number, PRMP code, suffix family).
+# Examples with several PRMPs or suffix families count in each cell they touch.
+_COVERAGE_SQL = """
+    WITH ta AS (
+        SELECT em.example_id, t.number
+          FROM tamayame_dictionary.example_morphemes em
+          JOIN tamayame_dictionary.ta_allomorphs t ON t.ta_id = em.ta_allomorph_id
+         WHERE em.slot = 'TA'
+    ),
+    prmp AS (
+        SELECT em.example_id, em.allomorph_id
+          FROM tamayame_dictionary.example_morphemes em
+         WHERE em.slot = '100' AND em.allomorph_id IS NOT NULL
+        UNION
+        SELECT epa.example_id, epa.allomorph_id
+          FROM tamayame_dictionary.example_prmp_allomorphs epa
+    ),
+    prmp_code AS (
+        SELECT p.example_id, SUBSTRING(a.davis_id FROM '^[0-9]{3}') AS code
+          FROM prmp p
+          JOIN tamayame_dictionary.allomorphs a ON a.allomorph_id = p.allomorph_id
+    ),
+    suffix AS (
+        SELECT DISTINCT em.example_id, LEFT(em.slot, 1) || '00' AS family
+          FROM tamayame_dictionary.example_morphemes em
+         WHERE em.slot ~ '^[456]'
+    )
+    SELECT ee.entry_id,
+           ta.number            AS ta_number,
+           pc.code              AS prmp,
+           COALESCE(s.family, 'none') AS suffix,
+           COUNT(DISTINCT ee.example_id)::int AS n
+      FROM tamayame_dictionary.example_entries ee
+      LEFT JOIN ta             ON ta.example_id = ee.example_id
+      LEFT JOIN prmp_code pc   ON pc.example_id = ee.example_id
+      LEFT JOIN suffix s       ON s.example_id  = ee.example_id
+     GROUP BY ee.entry_id, ta.number, pc.code, COALESCE(s.family, 'none')
+"""
+
+
+# ───────────────────────── computation ───────────────────────── #
+def compute_paradigm_coverage():
+    """
+    Attested-example counts for every entry and every primary paradigm class,
+    from one grouped query. Returns:
+      {entries: {entry_id: Counter{(ta, prmp, suffix): n}},
+       classes: {class_id: Counter{...}},
+       entry_info: {entry_id: {headword, class_id}},
+       class_names: {class_id: name},
+       prmp_axis: {class_id: [codes]}}
+    A class's PRMP axis is every code attested anywhere in that class, so an
+    entry's empty cells are the ones its class-mates fill and it doesn't.
+    """
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute(_COVERAGE_SQL)
+        rows = cur.fetchall()
+        cur.execute("""
+            SELECT entry_id, headword, COALESCE(primary_paradigm_class_id, 1) AS class_id
+              FROM tamayame_dictionary.entries
+        """)
+        entry_info = {r["entry_id"]: {"headword": r["headword"], "class_id": r["class_id"]}
+                      for r in cur.fetchall()}
+        cur.execute("SELECT id, name FROM tamayame_dictionary.primary_paradigm_classes")
+        class_names = {r["id"]: r["name"] for r in cur.fetchall()}
+    finally:
+        cur.close(); conn.close()
+
+    entries, classes = {}, {}
+    for r in rows:
+        info = entry_info.get(r["entry_id"])
+        if info is None:
+            continue
+        cell = (_norm_number(r["ta_number"]) or "—", r["prmp"] or "—", r["suffix"])
+        entries.setdefault(r["entry_id"], Counter())[cell] += r["n"]
+        classes.setdefault(info["class_id"], Counter())[cell] += r["n"]
+
+    prmp_axis = {
+        class_id: sorted({prmp for _, prmp, _ in cells}, key=lambda c: (c == "—", c))
+        for class_id, cells in classes.items()
+    }
+    return {
+        "entries": entries,
+        "classes": classes,
+        "entry_info": entry_info,
+        "class_names": class_names,
+        "prmp_axis": prmp_axis,
+        "computed_at": time.time(),
+    }
+
+
+def coverage_matrix(cov, entry_id=None, class_id=None):
+    """
+    Dense matrix for one entry or one class:
+      {rows: [(ta, prmp)], cols: COVERAGE_SUFFIX_AXIS, cells: [[n, …]],
+       filled, total, max}
+    Returns None if the entry/class is unknown.
+    """
+    if entry_id is not None:
+        info = cov["entry_info"].get(entry_id)
+        if info is None:
+            return None
+        class_id = info["class_id"]
+        counts = cov["entries"].get(entry_id, Counter())
+    elif class_id in cov["classes"] or class_id in cov["class_names"]:
+        counts = cov["classes"].get(class_id, Counter())
+    else:
+        return None
+
+    prmps = cov["prmp_axis"].get(class_id) or sorted({p for _, p, _ in counts})
+    # the no-TA row only when something actually lands there
+    tas = [t for t in COVERAGE_TA_AXIS if t != "—" or any(c[0] == "—" for c in counts)]
+    rows = [(t, p) for t in tas for p in prmps]
+    cells = [[counts.get((t, p, s), 0) for s in COVERAGE_SUFFIX_AXIS] for t, p in rows]
+    flat = [n for row in cells for n in row]
+    return {
+        "rows": rows,
+        "cols": COVERAGE_SUFFIX_AXIS,
+        "cells": cells,
+        "filled": sum(1 for n in flat if n),
+        "total": len(flat),
+        "max": max(flat, default=0),
+    }
+
+
+def iter_coverage_rows(cov, entry_id=None, class_id=None):
+    """Long-form dict rows (COVERAGE_COLUMNS) for CSV: one per non-empty cell, whole dictionary by default."""
+    if entry_id is None and class_id is None:
+        scopes = [("class", c) for c in sorted(cov["classes"])] + \
+                 [("entry", e) for e in sorted(cov["entries"])]
+    elif entry_id is not None:
+        scopes = [("entry", entry_id)]
+    else:
+        scopes = [("class", class_id)]
+
+    for scope, sid in scopes:
+        if scope == "entry":
+            counts = cov["entries"].get(sid, {})
+            label = (cov["entry_info"].get(sid) or {}).get("headword")
+        else:
+            counts = cov["classes"].get(sid, {})
+            label = cov["class_names"].get(sid)
+        for (ta, prmp, suffix), n in sorted(counts.items()):
+            yield {"scope": scope, "scope_id": sid, "label": label,
+                   "ta_number": ta, "prmp": prmp, "suffix": suffix, "examples": n}
+
+
+# ───────────────────── cached instance ───────────────────── #
+_COVERAGE = None
+_COVERAGE_VERSION = None
+_CHECKED = 0.0
+_CHECK_INTERVAL = 5.0
+_FALLBACK_TTL = 600
+_LOCK = threading.Lock()
+
+
+def get_paradigm_coverage(refresh=False):
+    """
+    Cached compute_paradigm_coverage(), recomputed when the 'examples' or
+    'lexicon' change counter moves (or every ten minutes without counters):
+    the cells come from example rows, the TA/suffix labels from the lexicon.
+    """
+    global _COVERAGE, _COVERAGE_VERSION, _CHECKED
+    now = time.time()
+    if not refresh and _COVERAGE is not None and now - _CHECKED < _CHECK_INTERVAL:
+        return _COVERAGE
+    with _LOCK:
+        _CHECKED = now
+        counters = poll_change_counters()
+        version = ((counters["examples"], counters["lexicon"])
+                   if "examples" in counters and "lexicon" in counters else None)
+        stale = (
+            refresh or _COVERAGE is None
+            or (version is not None and version != _COVERAGE_VERSION)
+            or (version is None and now - _COVERAGE["computed_at"] > _FALLBACK_TTL)
+        )
+        if stale:
+            _COVERAGE = compute_paradigm_coverage()
+            _COVERAGE_VERSION = version
+    return _COVERAGE
@@ -1,10 +1,85 @@
 # db/entries_dal.py
-from .core import get_connection
+from .core import get_connection, fold_search_key, like_prefix
 from .intransitive import intransitive_class_letter, fetch_entry_intransitive_classes
 from .lookups import fetch_suffix_subclass_allomorphs
+from .collation import ALPHABET, split_letters, letter_range, has_sort_key, entry_order_sql
+from .sqlite_backend import sqlite_readable
+from .headword_index import get_headword_index
 from psycopg2.extras import RealDictCursor
 
 
+def _startswith_clause(startswith):
+    """
+    Letter-nav filter. A single alphabet letter is a range scan on sort_key,
+    so "t" does not also list ts/tr/tʼ; anything else (or any letter before
+    ensure_collation() has run) is a folded prefix.
+    """
+    letters = split_letters(startswith)
+    if len(letters) == 1 and letters[0] in ALPHABET and has_sort_key():
+        return "(e.sort_key >= %s AND e.sort_key < %s)", list(letter_range(letters[0]))
+    return "e.headword_key LIKE %s", [like_prefix(fold_search_key(startswith))]
+
+
+def _search_clause(search):
+    """
+    Headword prefix or English substring. The two arms are a UNION so each
+    keeps its own index (headword_key btree, translation_en trigram GIN);
+    OR-ing them in one WHERE falls back to a sequential scan.
+    """
+    return ("""e.entry_id IN (
+                SELECT entry_id FROM tamayame_dictionary.entries
+                 WHERE headword_key LIKE %s
+                UNION
+                SELECT entry_id FROM tamayame_dictionary.entries
+                 WHERE translation_en ILIKE %s)""",
+            [like_prefix(fold_search_key(search)), f"%{search}%"])
+
+
+def _enrich_entry_example(ex, morph_rows, prmp_rows, ta_rows, realization, template_row):
+    """
+    One example as entry_detail.html shows it: morphemes (linked, legacy PRMP,
+    TA) in order, plus UR/SR/IPA and the linked template. Takes the raw rows
+    so db/site_export.py can feed it from bulk queries.
+    """
+    ex = dict(ex)
+    ex['morphemes'] = list(morph_rows)
+
+    for i, row2 in enumerate(prmp_rows):
+        ex['morphemes'].append({
+            'segment':  row2['form'],
+            'gloss':    row2['ur_gloss'],
+            'position': 'prefix',
+            'ordering': row2['ordering'],
+        })
+        if i == 0:
+            ex['prmp']       = row2['form']
+            ex['prmp_gloss'] = row2['ur_gloss']
+            ex['prmp_davis'] = row2['davis_id']
+
+    for row3 in ta_rows:
+        ex['morphemes'].append({
+            'segment':     row3['segment'],
+            'gloss':       row3['gloss'],
+            'position':    row3['position'],
+            'ordering':    row3['ordering'],
+            'voice_class': row3.get('voice_class'),
+            'davis_id':    row3.get('davis_id'),
+        })
+
+    if realization:
+        ex['ur']  = realization.get('ur')
+        ex['sr']  = realization.get('sr')
+        ex['ipa'] = realization.get('ipa')
+
+    ex['template'] = ({'template_id': template_row['template_id'], 'name': template_row['name']}
+                      if template_row else None)
+
+    # sort morphemes by ordering
+    ex['morphemes'].sort(key=lambda m: m['ordering'])
+    return ex
+
+
+@sqlite_readable
 def fetch_entry(entry_id):
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -77,9 +152,7 @@ def fetch_entry(entry_id):
     enriched_examples = []
 
     for ex in examples:
-        ex = dict(ex)
         ex_id = ex['example_id']
-        ex['morphemes'] = []
 
         # 4a) linked morphemes (roots, suffixes, etc.)
         cur.execute("""
@@ -89,7 +162,7 @@ def fetch_entry(entry_id):
               ON em.morpheme_id = m.morpheme_id
             WHERE em.example_id = %s
         """, (ex_id,))
-        ex['morphemes'].extend(cur.fetchall())
+        morph_rows = cur.fetchall()
 
         # 4b) PRMP (prefix) if present — legacy support
         cur.execute("""
@@ -100,17 +173,6 @@ def fetch_entry(entry_id):
             WHERE epa.example_id = %s
         """, (ex_id,))
         prmp_rows = cur.fetchall()
-        for i, row2 in enumerate(prmp_rows):
-            ex['morphemes'].append({
-                'segment':  row2['form'],
-                'gloss':    row2['ur_gloss'],
-                'position': 'prefix',
-                'ordering': row2['ordering'],
-            })
-            if i == 0:
-                ex['prmp']       = row2['form']
-                ex['prmp_gloss'] = row2['ur_gloss']
-                ex['prmp_davis'] = row2['davis_id']
 
         # 4c) TA (from example_morphemes.ta_allomorph_id; new storage)
         cur.execute("""
@@ -129,15 +191,7 @@ def fetch_entry(entry_id):
               AND em.ta_allomorph_id IS NOT NULL
             ORDER BY em.ordering
         """, (ex_id,))
-        for row3 in cur.fetchall():
-            ex['morphemes'].append({
-                'segment':     row3['segment'],
-                'gloss':       row3['gloss'],
-                'position':    row3['position'],
-                'ordering':    row3['ordering'],
-                'voice_class': row3.get('voice_class'),
-                'davis_id':    row3.get('davis_id'),
-            })
+        ta_rows = cur.fetchall()
 
         # 4d) Realizations (ur, sr, ipa)
         cur.execute("""
@@ -146,10 +200,6 @@ def fetch_entry(entry_id):
             WHERE example_id = %s
         """, (ex_id,))
         realization = cur.fetchone()
-        if realization:
-            ex['ur']  = realization.get('ur')
-            ex['sr']  = realization.get('sr')
-            ex['ipa'] = realization.get('ipa')
 
         # 4e) Which template is linked (if any)
         cur.execute("""
@@ -161,11 +211,10 @@ def fetch_entry(entry_id):
             LIMIT 1
         """, (ex_id,))
         tr = cur.fetchone()
-        ex['template'] = {'template_id': tr['template_id'], 'name': tr['name']} if tr else None
 
-        # 4f) sort morphemes by ordering
-        ex['morphemes'].sort(key=lambda m: m['ordering'])
-        enriched_examples.append(ex)
+        enriched_examples.append(
+            _enrich_entry_example(ex, morph_rows, prmp_rows, ta_rows, realization, tr)
+        )
 
     # 5) Allomorphs *defined* on this entry (for admin/use)
     cur.execute("""
@@ -207,6 +256,7 @@ def fetch_entry(entry_id):
 from .core import get_connection
 from psycopg2.extras import RealDictCursor
 
+@sqlite_readable
 def fetch_root_summaries(
     search=None, pos=None, status=None, startswith=None,
     page=1, per_page=100
@@ -222,14 +272,15 @@ def fetch_root_summaries(
     params = ["root"]
 
     if search:
-        wheres.append("(e.headword ILIKE %s OR e.translation_en ILIKE %s)")
-        params.extend([f"%{search}%", f"%{search}%"])
+        clause, p = _search_clause(search)
+        wheres.append(clause); params.extend(p)
     if pos:
         wheres.append("e.pos = %s"); params.append(pos)
     if status:
         wheres.append("e.status = %s"); params.append(status)
     if startswith:
-        wheres.append("e.headword ILIKE %s"); params.append(f"{startswith}%")
+        clause, p = _startswith_clause(startswith)
+        wheres.append(clause); params.extend(p)
 
     where_sql = "WHERE " + " AND ".join(wheres)
     offset = max(0, (int(page or 1) - 1) * int(per_page or 100))
@@ -244,7 +295,7 @@ def fetch_root_summaries(
             e.translation_en, e.status, e.transitivity
         FROM tamayame_dictionary.entries e
         {where_sql}
-        ORDER BY e.headword, e.entry_id
+        ORDER BY {entry_order_sql()}
         LIMIT %s OFFSET %s
     """, params + [limit, offset])
     rows = cur.fetchall()
@@ -253,6 +304,7 @@ def fetch_root_summaries(
     return rows, total
 
 
+@sqlite_readable
 def fetch_word_summaries(
     search=None, pos=None, status=None, startswith=None,
     page=1, per_page=100
@@ -268,14 +320,15 @@ def fetch_word_summaries(
     params = ["word"]
 
     if search:
-        wheres.append("(e.headword ILIKE %s OR e.translation_en ILIKE %s)")
-        params.extend([f"%{search}%", f"%{search}%"])
+        clause, p = _search_clause(search)
+        wheres.append(clause); params.extend(p)
     if pos:
         wheres.append("e.pos = %s"); params.append(pos)
     if status:
         wheres.append("e.status = %s"); params.append(status)
     if startswith:
-        wheres.append("e.headword ILIKE %s"); params.append(f"{startswith}%")
+        clause, p = _startswith_clause(startswith)
+        wheres.append(clause); params.extend(p)
 
     where_sql = "WHERE " + " AND ".join(wheres)
     offset = max(0, (int(page or 1) - 1) * int(per_page or 100))
@@ -290,7 +343,7 @@ def fetch_word_summaries(
             e.translation_en, e.status, e.transitivity
         FROM tamayame_dictionary.entries e
         {where_sql}
-        ORDER BY e.headword, e.entry_id
+        ORDER BY {entry_order_sql()}
         LIMIT %s OFFSET %s
     """, params + [limit, offset])
     rows = cur.fetchall()
@@ -298,6 +351,7 @@ def fetch_word_summaries(
     cur.close(); conn.close()
     return rows, total
 
+@sqlite_readable
 def fetch_entry_summaries(
     search=None, entry_type=None, pos=None, status=None, startswith=None,
     page=1, per_page=200
@@ -311,8 +365,8 @@ def fetch_entry_summaries(
 
     wheres, params = [], []
     if search:
-        wheres.append("(e.headword ILIKE %s OR e.translation_en ILIKE %s)")
-        params.extend([f"%{search}%", f"%{search}%"])
+        clause, p = _search_clause(search)
+        wheres.append(clause); params.extend(p)
     if entry_type:
         wheres.append("e.type = %s"); params.append(entry_type)
     if pos:
@@ -320,7 +374,8 @@ def fetch_entry_summaries(
     if status:
         wheres.append("e.status = %s"); params.append(status)
     if startswith:
-        wheres.append("e.headword ILIKE %s"); params.append(f"{startswith}%")
+        clause, p = _startswith_clause(startswith)
+        wheres.append(clause); params.extend(p)
 
     where_sql = ("WHERE " + " AND ".join(wheres)) if wheres else ""
     offset = max(0, (int(page or 1) - 1) * int(per_page or 200))
@@ -348,7 +403,7 @@ def fetch_entry_summaries(
             e.suffix_subclass_id
         FROM tamayame_dictionary.entries e
         {where_sql}
-        ORDER BY e.headword, e.entry_id
+        ORDER BY {entry_order_sql()}
         LIMIT %s OFFSET %s
     """
     cur.execute(list_sql, params + [limit, offset])
@@ -357,15 +412,23 @@ def fetch_entry_summaries(
     cur.close(); conn.close()
     return rows, total_count
 
+@sqlite_readable
 def fetch_related_entries_by_segment(segment, exclude_entry_id=None, limit=50):
     """
     Find entries that use a given segment (from morphemes table) OR are that headword
     themselves. Excludes the current entry when exclude_entry_id is provided.
+    Matching is on the folded search keys, so accents/apostrophe variants don't matter.
+    Served from the mmap'd headword index when it is current.
     """
+    index = get_headword_index()
+    if index is not None:
+        return index.related(segment, exclude_entry_id, limit)
+
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
-    params = [segment]
+    key = fold_search_key(segment)
+    params = [key]
     where_excl = ""
     if exclude_entry_id is not None:
         where_excl = "AND e.entry_id <> %s"
@@ -376,27 +439,28 @@ def fetch_related_entries_by_segment(segment, exclude_entry_id=None, limit=50):
           SELECT DISTINCT e.entry_id, e.headword, e.affix_position, e.pos, e.translation_en
           FROM tamayame_dictionary.morphemes m
           JOIN tamayame_dictionary.entries   e ON e.entry_id = m.entry_id
-          WHERE m.segment = %s
+          WHERE m.segment_key = %s
           {where_excl}
         )
         UNION
         (
           SELECT e2.entry_id, e2.headword, e2.affix_position, e2.pos, e2.translation_en
           FROM tamayame_dictionary.entries e2
-          WHERE e2.headword = %s
+          WHERE e2.headword_key = %s
           {("AND e2.entry_id <> %s" if exclude_entry_id is not None else "")}
         )
         ORDER BY headword
         LIMIT %s
     """
     # bind params for the UNION and LIMIT
-    bind = params + ([segment] + ([exclude_entry_id] if exclude_entry_id is not None else [])) + [int(limit)]
+    bind = params + ([key] + ([exclude_entry_id] if exclude_entry_id is not None else [])) + [int(limit)]
     cur.execute(sql, bind)
     rows = cur.fetchall()
     cur.close(); conn.close()
     return rows
 
 
+@sqlite_readable
 def fetch_entries_with_template(template_id, limit=200):
     """
     Entries linked to a template via entry_templates.
@@ -416,6 +480,7 @@ def fetch_entries_with_template(template_id, limit=200):
     return rows
 
 
+@sqlite_readable
 def get_entry_by_id(entry_id):
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -428,7 +493,56 @@ def get_entry_by_id(entry_id):
     cur.close(); conn.close()
     return row
 
+
+@sqlite_readable
+def fetch_headword(entry_id):
+    """An entry's headword (None if no such entry), via the headword index when current."""
+    index = get_headword_index()
+    headword = index.headword(entry_id) if index is not None else None
+    if headword is not None:
+        return headword
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT headword FROM tamayame_dictionary.entries WHERE entry_id = %s", (entry_id,))
+    row = cur.fetchone()
+    cur.close(); conn.close()
+    return row[0] if row else None
+
+
+@sqlite_readable
+def get_media_for_entry(entry_id):
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute("""
+        SELECT media_id, type, filename, original_filename, notes,
+               duration_seconds, thumbnail_path, processing_status
+        FROM tamayame_dictionary.media
+        WHERE entry_id = %s
+    """, (entry_id,))
+    rows = cur.fetchall()
+    cur.close(); conn.close()
+    return [dict(r) for r in rows]
+
+
+@sqlite_readable
+def fetch_subclass_allomorphs(subclass_id):
+    """Allomorphs linked to a suffix subclass via subclass_allomorphs (entry page)."""
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute("""
+        SELECT a.allomorph_id, a.form, a.ur_gloss, a.davis_id
+        FROM tamayame_dictionary.subclass_allomorphs s
+        JOIN tamayame_dictionary.allomorphs a
+          ON a.allomorph_id = s.allomorph_id
+        WHERE s.subclass_id = %s
+        ORDER BY COALESCE(a.davis_id,'ZZZ'), a.form
+    """, (subclass_id,))
+    rows = cur.fetchall()
+    cur.close(); conn.close()
+    return [dict(r) for r in rows]
+
 # db/entries_dal.py (add near the bottom)
+@sqlite_readable
 def fetch_template_by_id(template_id):
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -2,6 +2,7 @@
 from typing import List, Dict, Any, Optional
 from psycopg2.extras import RealDictCursor
 from .core import get_connection
+from .sqlite_backend import sqlite_readable
 
 # ────────────────────────── small helpers ──────────────────────────
 def _push_dedup(bucket: list, item: dict, key_fields=("form", "ur_gloss", "davis_id")):
@@ -34,6 +35,7 @@ def _ur_add(ur_blocks: list, seen: set, segment, gloss, position, ordering):
 
 
 # ────────────────────────── thin helpers ──────────────────────────
+@sqlite_readable
 def fetch_example_by_id(example_id: int):
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -48,6 +50,7 @@ def fetch_example_by_id(example_id: int):
     return dict(row) if row else None
 
 
+@sqlite_readable
 def get_entries_for_example(example_id: int):
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -64,11 +67,13 @@ def get_entries_for_example(example_id: int):
     return [dict(r) for r in rows]
 
 
+@sqlite_readable
 def get_media_for_example(example_id: int):
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
     cur.execute("""
-        SELECT type, filename, notes
+        SELECT media_id, type, filename, original_filename, notes,
+               duration_seconds, thumbnail_path, processing_status
           FROM tamayame_dictionary.media
          WHERE example_id = %s
          ORDER BY filename
@@ -193,6 +198,7 @@ def fetch_examples_by_template(template_id: int, limit=None, offset=0):
 
 
 # ────────────────────────── main payload builder ──────────────────────────
+@sqlite_readable
 def fetch_example_full(example_id: int):
     """
     Returns a dict with:
@@ -279,7 +285,14 @@ def fetch_example_full(example_id: int):
     rows = [dict(r) for r in cur.fetchall()]
 
     cur.close(); conn.close()
+    return _assemble_example_full(example, prmp_legacy, ta_legacy, rows)
 
+
+def _assemble_example_full(example, prmp_legacy, ta_legacy, rows):
+    """
+    Build slotted cards and the ordered UR blocks from the raw slot rows.
+    Shared with the bulk loader in db/site_export.py.
+    """
     # ─────────── determine observed slot order (for A/B placement) ───────────
     observed_slots = [(r.get("slot") or "").upper() for r in rows if r.get("slot")]
     def _first_index(sl):
@@ -413,6 +426,7 @@ __all__ = [
     "fetch_example_full",
 ]
 
+@sqlite_readable
 def fetch_stem_report_rows():
     """
     Stem Report to match example-detail:
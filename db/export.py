@@ -0,0 +1,261 @@
+# db/export.py
+import csv
+import io
+import json
+import zlib
+from xml.sax.saxutils import escape, quoteattr
+from psycopg2.extras import RealDictCursor
+from .core import get_connection
+from .collation import entry_order_sql
+
+__all__ = [
+    "EXPORT_FORMATS",
+    "EXPORT_CSV_COLUMNS",
+    "LIFT_LANG",
+    "iter_export_entries",
+    "iter_jsonl",
+    "iter_csv",
+    "iter_lift",
+    "export_chunks",
+    "gzip_chunks",
+]
+
+# format: (content type, file extension)
+EXPORT_FORMATS = {
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "csv":   ("text/csv", "csv"),
+    "lift":  ("application/xml", "lift"),
+}
+
+# One CSV row per (entry, example); entries without examples get one row
+EXPORT_CSV_COLUMNS = [
+    "entry_id", "headword", "type", "pos", "ipa", "translation_en", "transitivity", "status",
+    "morphemes", "allomorphs", "entry_media",
+    "example_id", "tamayame_text", "gloss_text", "example_translation", "ur", "sr", "example_ipa",
+    "slots", "example_media",
+]
+
+# Vernacular writing-system tag for LIFT (Eastern Keres)
+LIFT_LANG = "kee"
+
+_CHUNK = 64 * 1024
+
+# One row per entry with its morphemes, allomorphs, examples (with slotted
+# morphemes) and media as json, so the stream needs a single cursor.
+_EXPORT_SQL = """
+    SELECT e.entry_id, e.headword, e.type, e.affix_position, e.pos, e.ipa,
+           e.translation_en, e.transitivity, e.status,
+           COALESCE((
+               SELECT json_agg(json_build_object(
+                          'segment', m.segment, 'gloss', m.gloss,
+                          'position', m.position, 'ordering', m.ordering)
+                      ORDER BY m.ordering)
+                 FROM tamayame_dictionary.morphemes m
+                WHERE m.entry_id = e.entry_id), '[]') AS morphemes,
+           COALESCE((
+               SELECT json_agg(json_build_object(
+                          'allomorph_id', a.allomorph_id, 'form', a.form, 'category', a.category,
+                          'davis_id', a.davis_id, 'ur_gloss', a.ur_gloss)
+                      ORDER BY a.category, a.form)
+                 FROM tamayame_dictionary.allomorphs a
+                WHERE a.entry_id = e.entry_id), '[]') AS allomorphs,
+           COALESCE((
+               SELECT json_agg(json_build_object(
+                          'media_id', md.media_id, 'type', md.type, 'filename', md.filename,
+                          'original_filename', md.original_filename, 'sha256', md.sha256,
+                          'duration_seconds', md.duration_seconds)
+                      ORDER BY md.media_id)
+                 FROM tamayame_dictionary.media md
+                WHERE md.entry_id = e.entry_id), '[]') AS media,
+           COALESCE((
+               SELECT json_agg(json_build_object(
+                          'example_id', x.example_id, 'tamayame_text', x.tamayame_text,
+                          'gloss_text', x.gloss_text, 'translation_en', x.translation_en,
+                          'ur', er.ur, 'sr', er.sr, 'ipa', er.ipa,
+                          'slots', COALESCE((
+                              SELECT json_agg(json_build_object(
+                                         'slot', em.slot, 'ordering', em.ordering,
+                                         'form', COALESCE(ta.form, a.form, m.segment),
+                                         'gloss', COALESCE(ta.number, a.ur_gloss, m.gloss),
+                                         'davis_id', a.davis_id)
+                                     ORDER BY em.ordering)
+                                FROM tamayame_dictionary.example_morphemes em
+                           LEFT JOIN tamayame_dictionary.morphemes     m  ON m.morpheme_id = em.morpheme_id
+                           LEFT JOIN tamayame_dictionary.allomorphs    a  ON a.allomorph_id = em.allomorph_id
+                           LEFT JOIN tamayame_dictionary.ta_allomorphs ta ON ta.ta_id = em.ta_allomorph_id
+                               WHERE em.example_id = x.example_id), '[]'),
+                          'media', COALESCE((
+                              SELECT json_agg(json_build_object(
+                                         'media_id', md.media_id, 'type', md.type,
+                                         'filename', md.filename,
+                                         'original_filename', md.original_filename,
+                                         'sha256', md.sha256)
+                                     ORDER BY md.media_id)
+                                FROM tamayame_dictionary.media md
+                               WHERE md.example_id = x.example_id), '[]'))
+                      ORDER BY x.example_id)
+                 FROM tamayame_dictionary.example_entries ee
+                 JOIN tamayame_dictionary.examples x ON x.example_id = ee.example_id
+            LEFT JOIN LATERAL (
+                     SELECT ur, sr, ipa FROM tamayame_dictionary.example_realizations r
+                      WHERE r.example_id = x.example_id LIMIT 1
+                 ) er ON TRUE
+                WHERE ee.entry_id = e.entry_id), '[]') AS examples
+      FROM tamayame_dictionary.entries e
+"""
+
+
+# ───────────────────────── source ───────────────────────── #
+def iter_export_entries(itersize=500):
+    """
+    Stream every entry as a nested dict through a server-side cursor, so
+    memory stays at about `itersize` entries whatever the dictionary size.
+    """
+    order = entry_order_sql()
+    conn = get_connection()
+    cur = conn.cursor(name="dictionary_export", cursor_factory=RealDictCursor)
+    cur.itersize = itersize
+    try:
+        cur.execute(f"{_EXPORT_SQL} ORDER BY {order}")
+        for row in cur:
+            yield dict(row)
+    finally:
+        cur.close(); conn.close()
+
+
+# ───────────────────────── writers ───────────────────────── #
+def _batched(pieces):
+    """Join small strings into ~64 KiB chunks for the file / response."""
+    buf, size = [], 0
+    for p in pieces:
+        buf.append(p)
+        size += len(p)
+        if size >= _CHUNK:
+            yield "".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+def iter_jsonl(entries):
+    for e in entries:
+        yield json.dumps(e, ensure_ascii=False, default=str) + "\n"
+
+
+def _csv_rows(entries):
+    for e in entries:
+        base = {
+            **{k: e.get(k) for k in EXPORT_CSV_COLUMNS[:8]},
+            "morphemes": "-".join(m["segment"] or "" for m in e["morphemes"]),
+            "allomorphs": "; ".join(
+                f"{a['form']} [{a['davis_id']}]" if a.get("davis_id") else (a["form"] or "")
+                for a in e["allomorphs"]),
+            "entry_media": "; ".join(m["filename"] or "" for m in e["media"]),
+        }
+        if not e["examples"]:
+            yield base
+        for x in e["examples"]:
+            yield dict(
+                base,
+                example_id=x["example_id"],
+                tamayame_text=x["tamayame_text"],
+                gloss_text=x["gloss_text"],
+                example_translation=x["translation_en"],
+                ur=x["ur"], sr=x["sr"], example_ipa=x["ipa"],
+                slots=" ".join(f"{s['slot']}:{s['form']}" for s in x["slots"] if s.get("form")),
+                example_media="; ".join(m["filename"] or "" for m in x["media"]),
+            )
+
+
+def iter_csv(entries):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for row in _csv_rows(entries):
+        writer.writerow(row)
+        yield buf.getvalue()
+        buf.seek(0); buf.truncate(0)
+    yield buf.getvalue()
+
+
+def _form(text, lang=LIFT_LANG):
+    return f'<form lang={quoteattr(lang)}><text>{escape(text)}</text></form>'
+
+
+def _lift_entry(e):
+    eid = f"entry-{e['entry_id']}"
+    out = [f"<entry id={quoteattr(eid)}>"]
+    if e.get("headword"):
+        out.append(f"<lexical-unit>{_form(e['headword'])}</lexical-unit>")
+    if e.get("type"):
+        out.append(f'<trait name="morph-type" value={quoteattr(e["type"])}/>')
+    if e.get("ipa") or e["media"]:
+        out.append("<pronunciation>")
+        if e.get("ipa"):
+            out.append(_form(e["ipa"], f"{LIFT_LANG}-fonipa"))
+        for m in e["media"]:
+            out.append(f'<media href={quoteattr(m["filename"] or "")}/>')
+        out.append("</pronunciation>")
+    for a in e["allomorphs"]:
+        out.append(f"<variant>{_form(a['form'] or '')}")
+        if a.get("davis_id"):
+            out.append(f'<trait name="davis-id" value={quoteattr(a["davis_id"])}/>')
+        if a.get("category"):
+            out.append(f'<trait name="category" value={quoteattr(a["category"])}/>')
+        out.append("</variant>")
+    if e["morphemes"]:
+        out.append('<field type="morphemes">'
+                   + _form(" ".join(f"{m['segment']}={m['gloss']}" if m.get("gloss") else (m["segment"] or "")
+                                    for m in e["morphemes"]))
+                   + "</field>")
+
+    out.append(f"<sense id={quoteattr(eid + '-sense')}>")
+    if e.get("pos"):
+        out.append(f'<grammatical-info value={quoteattr(e["pos"])}/>')
+    if e.get("translation_en"):
+        out.append(f"<gloss lang=\"en\"><text>{escape(e['translation_en'])}</text></gloss>")
+    for x in e["examples"]:
+        out.append(f"<example source={quoteattr('example-' + str(x['example_id']))}>")
+        if x.get("tamayame_text"):
+            out.append(_form(x["tamayame_text"]))
+        if x.get("translation_en"):
+            out.append(f'<translation>{_form(x["translation_en"], "en")}</translation>')
+        for name, lang in (("gloss_text", "en"), ("ur", LIFT_LANG), ("sr", LIFT_LANG),
+                           ("ipa", f"{LIFT_LANG}-fonipa")):
+            if x.get(name):
+                out.append(f'<field type={quoteattr(name)}>{_form(x[name], lang)}</field>')
+        if x["slots"]:
+            out.append('<field type="slots">' + _form(" ".join(
+                f"{s['slot']}:{s['form']}" for s in x["slots"] if s.get("form"))) + "</field>")
+        out.append("</example>")
+    out.append("</sense></entry>\n")
+    return "".join(out)
+
+
+def iter_lift(entries):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n<lift version="0.13" producer="tamayame-dictionary">\n'
+    for e in entries:
+        yield _lift_entry(e)
+    yield "</lift>\n"
+
+
+_WRITERS = {"jsonl": iter_jsonl, "csv": iter_csv, "lift": iter_lift}
+
+
+def export_chunks(fmt, entries=None):
+    """Text chunks of the whole dictionary in `fmt` (see EXPORT_FORMATS)."""
+    if fmt not in _WRITERS:
+        raise ValueError(f"unknown export format {fmt!r}")
+    if entries is None:
+        entries = iter_export_entries()
+    return _batched(_WRITERS[fmt](entries))
+
+
+def gzip_chunks(chunks, level=6):
+    """Gzip a stream of text chunks on the fly (bytes out, one member)."""
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = z.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield z.flush()
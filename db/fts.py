@@ -0,0 +1,205 @@
+# db/fts.py
+import html
+from psycopg2.extras import RealDictCursor
+from .core import get_connection
+
+__all__ = [
+    "ensure_fulltext_search",
+    "search_fulltext",
+    "reverse_lookup_english",
+    "encode_search_cursor",
+    "decode_search_cursor",
+]
+
+# ts_headline markers; swapped for <mark> after HTML-escaping the snippet
+_SEL_START, _SEL_STOP = "{{{", "}}}"
+_HEADLINE_OPTS = (f"StartSel={_SEL_START}, StopSel={_SEL_STOP}, "
+                  "MaxWords=30, MinWords=10, MaxFragments=2, FragmentDelimiter=\" … \"")
+
+# Tamayame fields use the 'simple' config (no English stemming/stop words)
+_ENTRY_TSV = """
+    setweight(to_tsvector('simple',  coalesce(headword, '')),            'A') ||
+    setweight(to_tsvector('english', coalesce(gloss_en, '')),            'A') ||
+    setweight(to_tsvector('english', coalesce(translation_en, '')),      'B') ||
+    setweight(to_tsvector('simple',  coalesce(definition_tamayame, '')), 'C')
+"""
+_ENTRY_EN_TSV = """
+    setweight(to_tsvector('english', coalesce(gloss_en, '')),       'A') ||
+    setweight(to_tsvector('english', coalesce(translation_en, '')), 'B')
+"""
+_EXAMPLE_TSV = """
+    setweight(to_tsvector('english', coalesce(translation_en, '')), 'A') ||
+    setweight(to_tsvector('simple',  coalesce(gloss_text, '')),     'B')
+"""
+
+# The query is parsed under both configs so stemmed English lexemes and
+# verbatim 'simple' lexemes can both match.
+_TSQUERY = "(websearch_to_tsquery('english', %(q)s) || websearch_to_tsquery('simple', %(q)s))"
+
+
+# ───────────────────────── schema ───────────────────────── #
+def ensure_fulltext_search():
+    """
+    Add the generated tsvector columns and their GIN indexes (PostgreSQL 12+).
+    Safe to re-run. Generated columns stay current on every INSERT/UPDATE.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(f"""
+        ALTER TABLE tamayame_dictionary.entries
+          ADD COLUMN IF NOT EXISTS search_tsv tsvector
+              GENERATED ALWAYS AS ({_ENTRY_TSV}) STORED,
+          ADD COLUMN IF NOT EXISTS english_tsv tsvector
+              GENERATED ALWAYS AS ({_ENTRY_EN_TSV}) STORED
+    """)
+    cur.execute(f"""
+        ALTER TABLE tamayame_dictionary.examples
+          ADD COLUMN IF NOT EXISTS search_tsv tsvector
+              GENERATED ALWAYS AS ({_EXAMPLE_TSV}) STORED
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS entries_search_tsv_idx
+            ON tamayame_dictionary.entries USING GIN (search_tsv)
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS entries_english_tsv_idx
+            ON tamayame_dictionary.entries USING GIN (english_tsv)
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS examples_search_tsv_idx
+            ON tamayame_dictionary.examples USING GIN (search_tsv)
+    """)
+    conn.commit()
+    cur.close(); conn.close()
+
+
+# ───────────────────────── keyset cursor ───────────────────────── #
+def encode_search_cursor(row):
+    """Opaque 'after' token for the last row of a page: rank~kind~id."""
+    return f"{row['rank']!r}~{row['kind']}~{row['id']}"
+
+
+def decode_search_cursor(token):
+    """Inverse of encode_search_cursor; returns None for a missing/bad token."""
+    try:
+        rank, kind, rid = (token or "").split("~")
+        return float(rank), kind, int(rid)
+    except ValueError:
+        return None
+
+
+def _highlight(snippet):
+    if not snippet:
+        return ""
+    s = html.escape(snippet)
+    return s.replace(_SEL_START, "<mark>").replace(_SEL_STOP, "</mark>")
+
+
+# ───────────────────────── search ───────────────────────── #
+def search_fulltext(q, kinds=("entry", "example"), after=None, limit=25):
+    """
+    Ranked search across entries and examples.
+      kinds: which result kinds to include ('entry', 'example')
+      after: cursor from encode_search_cursor() for the next page
+    Ordered by rank DESC, kind, id (stable keyset order).
+    Returns: (rows, next_cursor). Each row has kind, id, rank, title,
+    translation_en and an HTML-safe `snippet` with <mark> highlights.
+    """
+    q = (q or "").strip()
+    if not q or not kinds:
+        return [], None
+
+    parts = []
+    if "entry" in kinds:
+        parts.append("""
+            SELECT 'entry'::text AS kind, e.entry_id AS id,
+                   ts_rank_cd(e.search_tsv, tq.q) AS rank
+              FROM tamayame_dictionary.entries e, tq
+             WHERE e.search_tsv @@ tq.q
+        """)
+    if "example" in kinds:
+        parts.append("""
+            SELECT 'example'::text AS kind, x.example_id AS id,
+                   ts_rank_cd(x.search_tsv, tq.q) AS rank
+              FROM tamayame_dictionary.examples x, tq
+             WHERE x.search_tsv @@ tq.q
+        """)
+
+    params = {"q": q, "limit": int(limit) + 1, "opts": _HEADLINE_OPTS}
+    keyset = ""
+    cursor = decode_search_cursor(after) if after else None
+    if cursor:
+        params.update(c_rank=cursor[0], c_kind=cursor[1], c_id=cursor[2])
+        keyset = """
+            WHERE h.rank < %(c_rank)s::real
+               OR (h.rank = %(c_rank)s::real AND (h.kind, h.id) > (%(c_kind)s, %(c_id)s))
+        """
+
+    sql = f"""
+        WITH tq AS (SELECT {_TSQUERY} AS q),
+        hits AS ({" UNION ALL ".join(parts)}),
+        page AS (
+            SELECT h.kind, h.id, h.rank
+              FROM hits h
+              {keyset}
+             ORDER BY h.rank DESC, h.kind, h.id
+             LIMIT %(limit)s
+        )
+        SELECT p.kind, p.id, p.rank,
+               COALESCE(e.headword, x.tamayame_text)        AS title,
+               e.affix_position                             AS affix_position,
+               COALESCE(e.translation_en, x.translation_en) AS translation_en,
+               CASE WHEN p.kind = 'entry' THEN
+                    ts_headline('english',
+                        concat_ws(' · ', e.gloss_en, e.translation_en, e.definition_tamayame),
+                        tq.q, %(opts)s)
+               ELSE
+                    ts_headline('english',
+                        concat_ws(' · ', x.translation_en, x.gloss_text),
+                        tq.q, %(opts)s)
+               END AS snippet
+          FROM page p
+          CROSS JOIN tq
+          LEFT JOIN tamayame_dictionary.entries  e ON p.kind = 'entry'   AND e.entry_id   = p.id
+          LEFT JOIN tamayame_dictionary.examples x ON p.kind = 'example' AND x.example_id = p.id
+         ORDER BY p.rank DESC, p.kind, p.id
+    """
+
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(sql, params)
+    rows = [dict(r) for r in cur.fetchall()]
+    cur.close(); conn.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(rows[-1])
+    for r in rows:
+        r["snippet"] = _highlight(r["snippet"])
+    return rows, next_cursor
+
+
+def reverse_lookup_english(q, limit=20):
+    """
+    English → Tamayame: entries whose English gloss/translation match `q`,
+    best first. One query against the english_tsv GIN index.
+    """
+    q = (q or "").strip()
+    if not q:
+        return []
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute("""
+        SELECT e.entry_id, e.headword, e.affix_position, e.pos,
+               e.gloss_en, e.translation_en,
+               ts_rank_cd(e.english_tsv, tq) AS rank
+          FROM tamayame_dictionary.entries e,
+               websearch_to_tsquery('english', %s) tq
+         WHERE e.english_tsv @@ tq
+         ORDER BY rank DESC, e.headword, e.entry_id
+         LIMIT %s
+    """, (q, int(limit)))
+    rows = [dict(r) for r in cur.fetchall()]
+    cur.close(); conn.close()
+    return rows
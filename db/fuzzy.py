@@ -0,0 +1,103 @@
+# db/fuzzy.py
+import os
+from psycopg2.extras import RealDictCursor
+from .core import get_connection, fold_search_key
+
+__all__ = [
+    "SUGGEST_THRESHOLD",
+    "ensure_trigram_indexes",
+    "suggest_headwords",
+]
+
+# pg_trgm similarity cut-off for suggestions (0–1; lower = fuzzier)
+SUGGEST_THRESHOLD = float(os.getenv("TAMAYAME_SUGGEST_THRESHOLD", "0.3"))
+
+
+# ───────────────────────── schema ───────────────────────── #
+def ensure_trigram_indexes():
+    """
+    Enable pg_trgm and index the folded search keys (see db/search_keys.py):
+      - GiST on headword_key / segment_key for ranked KNN (<->) suggestions
+      - GIN on examples.text_key so substring LIKE '%…%' is indexed
+      - GIN on entries.translation_en for the entry lists' ILIKE '%…%'
+    Safe to re-run.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS entries_headword_key_trgm_idx
+            ON tamayame_dictionary.entries USING GIST (headword_key gist_trgm_ops)
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS morphemes_segment_key_trgm_idx
+            ON tamayame_dictionary.morphemes USING GIST (segment_key gist_trgm_ops)
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS examples_text_key_trgm_idx
+            ON tamayame_dictionary.examples USING GIN (text_key gin_trgm_ops)
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS entries_translation_en_trgm_idx
+            ON tamayame_dictionary.entries USING GIN (translation_en gin_trgm_ops)
+    """)
+    conn.commit()
+    cur.close(); conn.close()
+
+
+# ───────────────────────── lookup ───────────────────────── #
+def suggest_headwords(q, threshold=None, limit=10, include_segments=True):
+    """
+    Ranked "did you mean" candidates for a (possibly mistyped) headword.
+    Each side is a KNN scan on its trigram index, so cost tracks `limit`,
+    not table size. Returns dicts:
+      {kind: 'entry'|'segment', id, entry_id, form, affix_position, gloss, score}
+    """
+    key = fold_search_key(q)
+    if not key:
+        return []
+    threshold = SUGGEST_THRESHOLD if threshold is None else float(threshold)
+    limit = int(limit)
+
+    parts = ["""
+        (SELECT 'entry'::text AS kind, e.entry_id AS id, e.entry_id,
+                e.headword AS form, e.affix_position, e.translation_en AS gloss,
+                similarity(e.headword_key, %(k)s) AS score
+           FROM tamayame_dictionary.entries e
+          WHERE e.headword_key %% %(k)s
+          ORDER BY e.headword_key <-> %(k)s
+          LIMIT %(limit)s)
+    """]
+    if include_segments:
+        parts.append("""
+        (SELECT 'segment'::text AS kind, m.morpheme_id AS id, m.entry_id,
+                m.segment AS form, NULL::text AS affix_position, m.gloss,
+                similarity(m.segment_key, %(k)s) AS score
+           FROM tamayame_dictionary.morphemes m
+          WHERE m.segment_key %% %(k)s
+          ORDER BY m.segment_key <-> %(k)s
+          LIMIT %(limit)s)
+        """)
+
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    # scoped to this transaction; drives the % operator
+    cur.execute("SELECT set_config('pg_trgm.similarity_threshold', %s, true)", (str(threshold),))
+    cur.execute(f"""
+        SELECT * FROM ({" UNION ALL ".join(parts)}) s
+         ORDER BY score DESC, form, id
+         LIMIT %(limit)s
+    """, {"k": key, "limit": limit})
+    rows = [dict(r) for r in cur.fetchall()]
+    conn.rollback()
+    cur.close(); conn.close()
+
+    # a segment that is also an entry headword only needs one suggestion
+    seen, out = set(), []
+    for r in rows:
+        k = fold_search_key(r["form"])
+        if k in seen:
+            continue
+        seen.add(k)
+        out.append(r)
+    return out
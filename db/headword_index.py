@@ -0,0 +1,239 @@
+# db/headword_index.py
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from psycopg2.extras import RealDictCursor
+from .core import get_connection, fold_search_key
+from .changes import fetch_change_counters, poll_change_counters
+
+__all__ = [
+    "HEADWORD_INDEX_PATH",
+    "HeadwordIndex",
+    "build_headword_index",
+    "load_headword_index",
+    "get_headword_index",
+]
+
+HEADWORD_INDEX_PATH = os.getenv("TAMAYAME_HEADWORD_INDEX", "headword_index.bin")
+
+# File layout: header, then seven sections, each 8-byte aligned.
+#   0 key offsets   u32 × (keys + 1)     into the key blob
+#   1 key blob      folded keys, UTF-8, sorted bytewise
+#   2 id offsets    u32 × (keys + 1)     into the id array
+#   3 ids           u32 × ids            entry ids per key, ascending
+#   4 entry ids     u32 × entries        ascending
+#   5 record offs   u32 × (entries + 1)  into the record blob
+#   6 record blob   RECORD_FIELDS joined by \x1f, None as \x00
+# Arrays are native byte order; the marker catches a file from another host.
+_MAGIC = b"TMYHWX01"
+_BYTE_ORDER = 0x01020304
+_HEADER = struct.Struct("=8sIIIIq7Q")
+RECORD_FIELDS = ("headword", "affix_position", "pos", "translation_en")
+
+_CHECK_INTERVAL = 2.0    # seconds between file / change-counter checks
+
+
+# ───────────────────────── reader ───────────────────────── #
+class HeadwordIndex:
+    """
+    Read-only view of an index file through mmap, so every worker process
+    shares the same page-cache pages. A lookup is a binary search over the
+    key offsets; the ids come back as a memoryview into the mapping, not a
+    copy, and nothing is built per lookup beyond the probed key slices.
+    """
+
+    __slots__ = ("path", "stamp", "version", "_mm", "_keys_at", "_key_off",
+                 "_id_off", "_ids", "_entry_ids", "_rec_off", "_recs", "_n_keys")
+
+    def __init__(self, path=HEADWORD_INDEX_PATH):
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.stamp = (st.st_ino, st.st_mtime_ns)
+
+        magic, order, n_keys, n_ids, n_entries, version, *offs = _HEADER.unpack_from(self._mm)
+        if magic != _MAGIC:
+            raise ValueError(f"{path}: not a headword index file")
+        if order != _BYTE_ORDER:
+            raise ValueError(f"{path}: built with another byte order; rebuild it here")
+        self.version = None if version < 0 else version
+        self._n_keys = n_keys
+
+        buf = memoryview(self._mm)
+        sec = [buf[o:e] for o, e in zip(offs, offs[1:] + [len(self._mm)])]
+        self._key_off = sec[0].cast("I")[:n_keys + 1]
+        self._keys_at = offs[1]
+        self._id_off = sec[2].cast("I")[:n_keys + 1]
+        self._ids = sec[3].cast("I")[:n_ids]
+        self._entry_ids = sec[4].cast("I")[:n_entries]
+        self._rec_off = sec[5].cast("I")[:n_entries + 1]
+        self._recs = sec[6]
+
+    def __len__(self):
+        return self._n_keys
+
+    def lookup(self, key):
+        """Entry ids for an already-folded key: a memoryview of u32 (empty if absent)."""
+        k = key.encode("utf-8")
+        mm, base, off = self._mm, self._keys_at, self._key_off
+        lo, hi = 0, self._n_keys
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if mm[base + off[mid]:base + off[mid + 1]] < k:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n_keys and mm[base + off[lo]:base + off[lo + 1]] == k:
+            return self._ids[self._id_off[lo]:self._id_off[lo + 1]]
+        return self._ids[0:0]
+
+    def entry_ids(self, text):
+        """Entries whose headword or one of whose morpheme segments folds to `text`."""
+        return self.lookup(fold_search_key(text))
+
+    def record(self, entry_id):
+        """{headword, affix_position, pos, translation_en} for an entry, or None."""
+        i = bisect_left(self._entry_ids, entry_id)
+        if i == len(self._entry_ids) or self._entry_ids[i] != entry_id:
+            return None
+        raw = bytes(self._recs[self._rec_off[i]:self._rec_off[i + 1]]).decode("utf-8")
+        return {f: (None if v == "\x00" else v) for f, v in zip(RECORD_FIELDS, raw.split("\x1f"))}
+
+    def headword(self, entry_id):
+        rec = self.record(entry_id)
+        return rec["headword"] if rec else None
+
+    def related(self, segment, exclude_entry_id=None, limit=50):
+        """fetch_related_entries_by_segment() without the database."""
+        rows = []
+        for entry_id in self.entry_ids(segment):
+            if entry_id == exclude_entry_id:
+                continue
+            rec = self.record(entry_id)
+            if rec is not None:
+                rows.append({"entry_id": entry_id, **rec})
+        rows.sort(key=lambda r: (r["headword"] is None, r["headword"] or ""))
+        return rows[:int(limit)]
+
+
+# ───────────────────────── build ───────────────────────── #
+def _align(out):
+    out.extend(b"\0" * (-len(out) % 8))
+    return len(out)
+
+
+def _record(row):
+    return "\x1f".join("\x00" if row[f] is None else row[f].replace("\x1f", " ")
+                       for f in RECORD_FIELDS).encode("utf-8")
+
+
+def build_headword_index(path=HEADWORD_INDEX_PATH):
+    """
+    Write the index from the database: every folded headword key and
+    morpheme segment key → entry ids, plus each entry's short record.
+    Written beside `path` and renamed over it, so readers never see a
+    partial file. Returns (keys, entries).
+    """
+    # read before the rows: a write in between only makes the file look stale
+    version = fetch_change_counters().get("lexicon")
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute("""
+            SELECT headword_key AS key, entry_id
+              FROM tamayame_dictionary.entries
+             WHERE headword_key <> ''
+            UNION
+            SELECT m.segment_key, m.entry_id
+              FROM tamayame_dictionary.morphemes m
+              JOIN tamayame_dictionary.entries e ON e.entry_id = m.entry_id
+             WHERE m.segment_key <> ''
+        """)
+        by_key = {}
+        for r in cur:
+            by_key.setdefault(r["key"].encode("utf-8"), []).append(r["entry_id"])
+        cur.execute(f"""
+            SELECT entry_id, {", ".join(RECORD_FIELDS)}
+              FROM tamayame_dictionary.entries
+             ORDER BY entry_id
+        """)
+        records = cur.fetchall()
+    finally:
+        cur.close(); conn.close()
+
+    keys = sorted(by_key)
+    key_off, id_off, ids = array("I", [0]), array("I", [0]), array("I")
+    key_blob = bytearray()
+    for k in keys:
+        key_blob += k
+        key_off.append(len(key_blob))
+        ids.extend(sorted(by_key[k]))
+        id_off.append(len(ids))
+    entry_ids, rec_off, rec_blob = array("I"), array("I", [0]), bytearray()
+    for r in records:
+        entry_ids.append(r["entry_id"])
+        rec_blob += _record(r)
+        rec_off.append(len(rec_blob))
+
+    out = bytearray(_HEADER.size)
+    offs = []
+    for section in (key_off, key_blob, id_off, ids, entry_ids, rec_off, rec_blob):
+        offs.append(_align(out))
+        out += section.tobytes() if isinstance(section, array) else section
+    _HEADER.pack_into(out, 0, _MAGIC, _BYTE_ORDER, len(keys), len(ids), len(entry_ids),
+                      -1 if version is None else version, *offs)
+
+    tmp = path + ".part"
+    with open(tmp, "wb") as f:
+        f.write(out)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(keys), len(entry_ids)
+
+
+# ───────────────────────── loading ───────────────────────── #
+def load_headword_index(path=HEADWORD_INDEX_PATH):
+    """Map an index file; None if there isn't one."""
+    try:
+        return HeadwordIndex(path)
+    except FileNotFoundError:
+        return None
+
+
+_INDEX = None
+_FRESH = False
+_CHECKED = 0.0
+_LOCK = threading.Lock()
+
+
+def get_headword_index():
+    """
+    Process-wide index, or None when callers should ask Postgres instead:
+    no file, or the 'lexicon' change counter moved since it was built. At
+    most every couple of seconds the file is re-stat'ed (a rebuilt file is
+    remapped) and the counter polled.
+    """
+    global _INDEX, _FRESH, _CHECKED
+    now = time.time()
+    if now - _CHECKED < _CHECK_INTERVAL:
+        return _INDEX if _FRESH else None
+
+    with _LOCK:
+        _CHECKED = now
+        try:
+            st = os.stat(HEADWORD_INDEX_PATH)
+        except FileNotFoundError:
+            _INDEX, _FRESH = None, False
+            return None
+        if _INDEX is None or _INDEX.stamp != (st.st_ino, st.st_mtime_ns):
+            _INDEX = load_headword_index(HEADWORD_INDEX_PATH)
+        version = poll_change_counters().get("lexicon")
+        # without counters the file is trusted until it is rebuilt
+        _FRESH = _INDEX is not None and (version is None or version == _INDEX.version)
+    return _INDEX if _FRESH else None
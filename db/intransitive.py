@@ -33,9 +33,42 @@ def fetch_entry_intransitive_classes(entry_id: int):
     Returns a dict keyed by number (e.g., 'sg','dl','pl') with:
       { 'class_code', 'number_usage', 'ta_id', 'ta_form', 'ta_number' }
     """
-    schema = "tamayame_dictionary"
     conn = get_connection()
     cur = conn.cursor()
+    try:
+        cur.execute(_intransitive_classes_sql(cur, "WHERE eic.entry_id = %s"), (entry_id,))
+        return {r[1]: _class_mapping(r) for r in cur.fetchall()}
+    finally:
+        cur.close(); conn.close()
+
+
+def fetch_all_entry_intransitive_classes():
+    """fetch_entry_intransitive_classes() for every entry at once: {entry_id: {number: ...}}."""
+    conn = get_connection()
+    cur = conn.cursor()
+    out = {}
+    try:
+        cur.execute(_intransitive_classes_sql(cur))
+        for r in cur.fetchall():
+            out.setdefault(r[0], {})[r[1]] = _class_mapping(r)
+    finally:
+        cur.close(); conn.close()
+    return out
+
+
+def _class_mapping(row):
+    _, _, class_code, number_usage, ta_fk, ta_form, ta_number = row
+    return {
+        "class_code":   class_code,
+        "number_usage": number_usage,
+        "ta_id":        ta_fk,
+        "ta_form":      ta_form,
+        "ta_number":    _norm_number(ta_number),
+    }
+
+
+def _intransitive_classes_sql(cur, where=""):
+    schema = "tamayame_dictionary"
 
     # Discover PK column name in intransitive_classes
     cur.execute("""
@@ -49,15 +82,15 @@ def fetch_entry_intransitive_classes(entry_id: int):
     ic_pk_candidates = ["id", "class_id", "intransitive_class_id"]
     ic_pk = next((c for c in ic_pk_candidates if c in ic_cols), None)
     if ic_pk is None:
-        cur.close(); conn.close()
         raise RuntimeError(
             f"Couldn't find PK in {schema}.intransitive_classes; "
             f"looked for {ic_pk_candidates}, found {sorted(ic_cols)}"
         )
 
     # Build SQL using fixed ta_allomorph_id on EIC + detected PK on IC
-    sql = f"""
-        SELECT eic.number,
+    return f"""
+        SELECT eic.entry_id,
+               eic.number,
                ic.class_code,
                ic.number_usage,
                eic.ta_allomorph_id AS ta_fk,
@@ -68,24 +101,9 @@ def fetch_entry_intransitive_classes(entry_id: int):
             ON eic.intransitive_class_id = ic.{ic_pk}
      LEFT JOIN {schema}.ta_allomorphs ta
             ON eic.ta_allomorph_id = ta.ta_id
-         WHERE eic.entry_id = %s
-         ORDER BY eic.number
+         {where}
+         ORDER BY eic.entry_id, eic.number
     """
 
-    cur.execute(sql, (entry_id,))
-    rows = cur.fetchall()
-
-    out = {}
-    for number, class_code, number_usage, ta_fk, ta_form, ta_number in rows:
-        out[number] = {
-            "class_code":   class_code,
-            "number_usage": number_usage,
-            "ta_id":        ta_fk,
-            "ta_form":      ta_form,
-            "ta_number":    _norm_number(ta_number),
-        }
-
-    cur.close(); conn.close()
-    return out
-
-__all__ = ["intransitive_class_letter", "fetch_entry_intransitive_classes"]
\ No newline at end of file
+__all__ = ["intransitive_class_letter", "fetch_entry_intransitive_classes",
+           "fetch_all_entry_intransitive_classes"]
@@ -1,7 +1,8 @@
 # db/lookups.py
 from psycopg2.extras import RealDictCursor
 from psycopg2 import DatabaseError
-from .core import get_connection
+from .core import get_connection, fold_search_key, like_prefix
+from .sqlite_backend import sqlite_readable
 
 __all__ = [
     "fetch_ta_allomorphs_by_number",
@@ -61,6 +62,7 @@ def fetch_ta_allomorphs_by_number(number=None, voice_class=None, search=None, li
     return rows
 
 # ───────────────────── Morpheme index ────────────────────── #
+@sqlite_readable
 def fetch_morpheme_index(search=None, position=None, startswith=None, limit=2000, offset=0):
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -73,7 +75,7 @@ def fetch_morpheme_index(search=None, position=None, startswith=None, limit=2000
     if position:
         wheres.append("m.position ILIKE %s"); params.append(position)
     if startswith:
-        wheres.append("m.segment ILIKE %s"); params.append(f"{startswith}%")
+        wheres.append("m.segment_key LIKE %s"); params.append(like_prefix(fold_search_key(startswith)))
 
     where_sql = ("WHERE " + " AND ".join(wheres)) if wheres else ""
     sql = f"""
@@ -213,6 +215,7 @@ def fetch_suffix_subclass_allomorphs(subclass_id):
         return []
 
 # ─────────────── primary paradigm classes ─────────────── #
+@sqlite_readable
 def fetch_primary_paradigm_classes(limit=None, offset=0):
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -374,6 +377,7 @@ def fetch_intransitive_classes(limit=None, offset=0):
     return rows
 
 # ───── other helpers / reports ───── #
+@sqlite_readable
 def fetch_all_ta_allomorphs(limit=None, offset=0, voice_class=None):
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -397,6 +401,7 @@ def fetch_all_ta_allomorphs(limit=None, offset=0, voice_class=None):
     cur.close(); conn.close()
     return rows
 
+@sqlite_readable
 def fetch_ta_forms(entry_id=None, limit=None, offset=0):
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -438,6 +443,7 @@ def fetch_prmp_usage(limit=1000, offset=0):
     cur.close(); conn.close()
     return rows
 
+@sqlite_readable
 def fetch_prmp_allomorphs_for_class(class_id):
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -492,6 +498,7 @@ def fetch_examples_by_segment(segment, limit=200, offset=0):
 # ─────────── Morpheme usage (entries + examples) ─────────── #
 def fetch_morpheme_usage(segment, limit_entries=200, limit_examples=200):
     seg = (segment or "").strip()
+    key = fold_search_key(seg)
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
 
@@ -500,18 +507,18 @@ def fetch_morpheme_usage(segment, limit_entries=200, limit_examples=200):
             SELECT DISTINCT e.entry_id
             FROM tamayame_dictionary.morphemes m
             JOIN tamayame_dictionary.entries e ON e.entry_id = m.entry_id
-            WHERE m.segment = %s
+            WHERE m.segment_key = %s
             UNION
             SELECT e2.entry_id
             FROM tamayame_dictionary.entries e2
-            WHERE e2.headword = %s
+            WHERE e2.headword_key = %s
         )
         SELECT e.entry_id, e.headword, e.type, e.pos, e.transitivity, e.translation_en
         FROM used u
         JOIN tamayame_dictionary.entries e ON e.entry_id = u.entry_id
         ORDER BY e.headword, e.entry_id
         LIMIT %s
-    """, (seg, seg, int(limit_entries)))
+    """, (key, key, int(limit_entries)))
     entries = [dict(r) for r in cur.fetchall()]
 
     cur.execute("""
@@ -519,16 +526,17 @@ def fetch_morpheme_usage(segment, limit_entries=200, limit_examples=200):
         FROM tamayame_dictionary.example_morphemes em
         JOIN tamayame_dictionary.morphemes m ON m.morpheme_id = em.morpheme_id
         JOIN tamayame_dictionary.examples  ex ON ex.example_id = em.example_id
-        WHERE m.segment = %s
+        WHERE m.segment_key = %s
         ORDER BY ex.example_id
         LIMIT %s
-    """, (seg, int(limit_examples)))
+    """, (key, int(limit_examples)))
     examples = [dict(r) for r in cur.fetchall()]
 
     cur.close(); conn.close()
     return {"segment": seg, "entries": entries, "examples": examples}
 
 # ─────────────── Templates ─────────────── #
+@sqlite_readable
 def fetch_template_by_id(template_id: int):
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -542,6 +550,7 @@ def fetch_template_by_id(template_id: int):
     cur.close(); conn.close()
     return dict(row) if row else None
 
+@sqlite_readable
 def fetch_examples_using_template(template_id: int, limit: int | None = None, offset: int = 0):
     conn = get_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
@@ -562,6 +571,7 @@ def fetch_examples_using_template(template_id: int, limit: int | None = None, of
     return rows
 
 # --- Prefix / PRMP allomorph report ----------------------------------------
+@sqlite_readable
 def fetch_all_allomorphs(category: str = "PRMP", limit: int | None = None, offset: int = 0):
     """
     Return all allomorphs for a given category (default: PRMP/prefixes),
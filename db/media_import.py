@@ -0,0 +1,259 @@
+# db/media_import.py
+import json
+import mimetypes
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from psycopg2.extras import execute_values
+from .core import get_connection, fold_search_key
+from .media_store import MEDIA_ROOT, HashingSpool, blob_relpath
+
+__all__ = [
+    "DEFAULT_MATCH_PATTERNS",
+    "MEDIA_TYPES",
+    "MediaMatcher",
+    "walk_media_files",
+    "import_media_files",
+]
+
+# Tried in order against the file name without its extension. Named groups
+# say what the capture is: example_id, entry_id, davis_id or headword.
+DEFAULT_MATCH_PATTERNS = [
+    r"^(?:ex|example)[ _-]?(?P<example_id>\d+)(?=[ _-]|$)",
+    r"^(?:entry|e)[ _-]?(?P<entry_id>\d+)(?=[ _-]|$)",
+    r"^(?P<davis_id>\d{3}[A-Za-z]?)(?:[ _-]|$)",
+    r"^(?P<headword>.+?)(?:[ _-]+\d+)?$",
+]
+
+MEDIA_TYPES = {
+    "audio": {".wav", ".mp3"},
+    "video": {".mp4", ".mov", ".webm"},
+    "image": {".jpg", ".jpeg", ".png"},
+    "external_document": {".pdf", ".docx", ".txt", ".rtf"},
+}
+_TYPE_BY_EXT = {ext: t for t, exts in MEDIA_TYPES.items() for ext in exts}
+
+
+# ───────────────────────── matching ───────────────────────── #
+class MediaMatcher:
+    """
+    Filename → (entry_id, example_id) using the patterns above and lookup
+    tables loaded once: every example/entry id, folded headwords (unique
+    ones only) and allomorph Davis ids → their entry.
+    """
+
+    def __init__(self, patterns=None):
+        self.patterns = [re.compile(p, re.I) for p in (patterns or DEFAULT_MATCH_PATTERNS)]
+        conn = get_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT example_id FROM tamayame_dictionary.examples")
+        self.example_ids = {r[0] for r in cur.fetchall()}
+        cur.execute("SELECT entry_id, headword FROM tamayame_dictionary.entries")
+        self.entry_ids, headwords = set(), {}
+        for entry_id, headword in cur.fetchall():
+            self.entry_ids.add(entry_id)
+            if headword:
+                headwords.setdefault(fold_search_key(headword).strip("-"), set()).add(entry_id)
+        cur.execute("""
+            SELECT upper(btrim(davis_id)), entry_id
+              FROM tamayame_dictionary.allomorphs
+             WHERE davis_id IS NOT NULL AND entry_id IS NOT NULL
+        """)
+        davis = {}
+        for d, entry_id in cur.fetchall():
+            davis.setdefault(d, set()).add(entry_id)
+        cur.close(); conn.close()
+        self.headwords = headwords
+        self.davis = davis
+
+    def match(self, filename):
+        """((entry_id, example_id), None) or (None, reason)."""
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        reasons = []
+        for rx in self.patterns:
+            m = rx.search(stem)
+            if not m:
+                continue
+            g = {k: v for k, v in m.groupdict().items() if v}
+            if "example_id" in g:
+                if int(g["example_id"]) in self.example_ids:
+                    return (None, int(g["example_id"])), None
+                reasons.append(f"no example {g['example_id']}")
+            elif "entry_id" in g:
+                if int(g["entry_id"]) in self.entry_ids:
+                    return (int(g["entry_id"]), None), None
+                reasons.append(f"no entry {g['entry_id']}")
+            elif "davis_id" in g:
+                hits = self.davis.get(g["davis_id"].upper(), ())
+                if len(hits) == 1:
+                    return (next(iter(hits)), None), None
+                reasons.append(f"davis {g['davis_id']}: {len(hits)} entries")
+            elif "headword" in g:
+                hits = self.headwords.get(fold_search_key(g["headword"].replace("_", " ")).strip("-"), ())
+                if len(hits) == 1:
+                    return (next(iter(hits)), None), None
+                reasons.append(f"headword {g['headword']!r}: {len(hits)} entries")
+        return None, "; ".join(reasons) or "no pattern matched"
+
+
+def walk_media_files(root):
+    """Yield (path, size, mtime) for every importable file under root."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.startswith(".") or os.path.splitext(name)[1].lower() not in _TYPE_BY_EXT:
+                continue
+            path = os.path.join(dirpath, name)
+            st = os.stat(path)
+            yield path, st.st_size, int(st.st_mtime)
+
+
+# ───────────────────────── import ───────────────────────── #
+def _spool(path, store_root):
+    try:
+        with open(path, "rb") as f:
+            spool = HashingSpool.from_stream(f, store_root)
+    except OSError as e:
+        return e
+    spool.close()               # keep fd use flat; the spool is renamed by path
+    return spool
+
+
+def _load_state(state_path):
+    done = set()
+    if state_path and os.path.exists(state_path):
+        with open(state_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue            # torn last line from an interrupted run
+                done.add((r["path"], r["size"], r["mtime"]))
+    return done
+
+
+def _commit_batch(batch, notes, store_root):
+    """
+    Register blobs, move spools into place and insert media rows in one
+    transaction. If it fails, blobs this batch moved into the store are
+    unlinked again before the rollback releases their media_blobs rows, so
+    no file is left behind that the GC has no row for.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    created = []
+    try:
+        execute_values(cur, """
+            INSERT INTO tamayame_dictionary.media_blobs (sha256, path, size_bytes, content_type)
+            VALUES %s
+            ON CONFLICT (sha256) DO NOTHING
+        """, [(s.hexdigest(), blob_relpath(s.hexdigest(), p), s.size, mimetypes.guess_type(p)[0])
+              for p, _, s in batch],
+            page_size=1000)
+        cur.execute("SELECT sha256, path FROM tamayame_dictionary.media_blobs WHERE sha256 = ANY(%s)",
+                    ([s.hexdigest() for _, _, s in batch],))
+        blob_paths = dict(cur.fetchall())
+
+        # the same blob already attached to the same target is a re-run: skip it
+        cur.execute("""
+            SELECT sha256, entry_id, example_id FROM tamayame_dictionary.media
+             WHERE sha256 = ANY(%s)
+        """, ([s.hexdigest() for _, _, s in batch],))
+        attached = {tuple(r) for r in cur.fetchall()}
+
+        rows, duplicates = [], 0
+        for path, (entry_id, example_id), spool in batch:
+            sha = spool.hexdigest()
+            rel = blob_paths[sha]
+            dest = os.path.join(store_root, *rel.split("/"))
+            if os.path.exists(dest):
+                spool.discard()
+            else:
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                os.replace(spool.path, dest)
+                created.append(dest)
+            if (sha, entry_id, example_id) in attached:
+                duplicates += 1
+                continue
+            attached.add((sha, entry_id, example_id))
+            ext = os.path.splitext(path)[1].lower()
+            rows.append((entry_id, example_id, _TYPE_BY_EXT[ext], rel, notes, sha,
+                         spool.size, mimetypes.guess_type(path)[0], os.path.basename(path)))
+        if rows:
+            execute_values(cur, """
+                INSERT INTO tamayame_dictionary.media
+                    (entry_id, example_id, type, filename, notes,
+                     sha256, size_bytes, content_type, original_filename)
+                VALUES %s
+            """, rows, page_size=1000)
+        conn.commit()
+        return len(rows), duplicates
+    except Exception:
+        for dest in created:
+            if os.path.exists(dest):
+                os.unlink(dest)
+        conn.rollback()
+        for _, _, spool in batch:
+            spool.discard()
+        raise
+    finally:
+        cur.close(); conn.close()
+
+
+def import_media_files(root, matcher, state_path=None, notes="", threads=8,
+                       batch_size=500, store_root=None, dry_run=False, on_unmatched=None):
+    """
+    Walk `root`, match each file, then hash+copy matched files into the
+    content-addressed store on a thread pool (hashlib and file I/O release
+    the GIL). Media rows are inserted one batch per transaction. Each
+    committed file is appended to the JSONL state file, so a re-run skips
+    it. Returns counts.
+    """
+    store_root = store_root or MEDIA_ROOT
+    done = _load_state(state_path)
+    counts = {"seen": 0, "skipped": 0, "unmatched": 0, "imported": 0, "duplicates": 0}
+
+    todo = []
+    for path, size, mtime in walk_media_files(root):
+        counts["seen"] += 1
+        key = (os.path.relpath(path, root), size, mtime)
+        if key in done:
+            counts["skipped"] += 1
+            continue
+        target, reason = matcher.match(path)
+        if target is None:
+            counts["unmatched"] += 1
+            if on_unmatched:
+                on_unmatched(path, reason)
+            continue
+        todo.append((path, key, target))
+    if dry_run:
+        counts["matched"] = len(todo)
+        return counts
+
+    state = open(state_path, "a", encoding="utf-8") if state_path else None
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for start in range(0, len(todo), batch_size):
+                chunk = todo[start:start + batch_size]
+                spools = list(pool.map(lambda t: _spool(t[0], store_root), chunk))
+                batch, keys = [], []
+                for (path, key, target), s in zip(chunk, spools):
+                    if isinstance(s, OSError):
+                        counts["unmatched"] += 1
+                        if on_unmatched:
+                            on_unmatched(path, f"unreadable: {s}")
+                    else:
+                        batch.append((path, target, s))
+                        keys.append(key)
+                imported, dup = _commit_batch(batch, notes, store_root) if batch else (0, 0)
+                counts["imported"] += imported
+                counts["duplicates"] += dup
+                if state:
+                    for rel, size, mtime in keys:
+                        state.write(json.dumps({"path": rel, "size": size, "mtime": mtime}) + "\n")
+                    state.flush()
+    finally:
+        if state:
+            state.close()
+    return counts
@@ -0,0 +1,315 @@
+# db/media_store.py
+import hashlib
+import mimetypes
+import os
+import tempfile
+import time
+from psycopg2.extras import RealDictCursor
+from .core import get_connection
+
+__all__ = [
+    "MEDIA_ROOT",
+    "HashingSpool",
+    "ensure_media_store",
+    "blob_relpath",
+    "store_blob",
+    "store_upload",
+    "attach_media",
+    "fetch_media",
+    "media_file_path",
+    "collect_orphan_blobs",
+]
+
+# Blobs live under MEDIA_ROOT/sha256/ab/cd/<sha256>.<ext>. media.filename holds
+# the path relative to MEDIA_ROOT, so url_for('static', filename='uploads/' ~
+# m.filename) keeps working for both legacy flat files and blobs.
+MEDIA_ROOT = os.environ.get("TAMAYAME_MEDIA_ROOT", os.path.join("static", "uploads"))
+_BLOB_DIR = "sha256"
+_CHUNK = 1 << 20
+
+
+# ───────────────────────── spooling ───────────────────────── #
+class HashingSpool:
+    """
+    Writable temp file inside MEDIA_ROOT/tmp that hashes (SHA-256) and counts
+    bytes as they are written. It is on the same filesystem as the blobs, so
+    storing it is a rename, never a second copy. Reads and seeks go to the
+    underlying file, so Werkzeug can use it as an upload's stream.
+    """
+
+    def __init__(self, root=None):
+        tmpdir = os.path.join(root or MEDIA_ROOT, "tmp")
+        os.makedirs(tmpdir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=tmpdir, suffix=".part")
+        self._file = os.fdopen(fd, "w+b")
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def __getattr__(self, name):
+        if name == "_file":
+            raise AttributeError(name)
+        return getattr(self._file, name)
+
+    @classmethod
+    def from_stream(cls, stream, root=None):
+        spool = cls(root)
+        while True:
+            chunk = stream.read(_CHUNK)
+            if not chunk:
+                break
+            spool.write(chunk)
+        return spool
+
+
+# ───────────────────────── schema ───────────────────────── #
+def ensure_media_store():
+    """
+    Add content-address and processing-metadata columns to media and create
+    media_blobs, whose ref_count is kept exact by a row trigger on media.
+    Safe to re-run.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        ALTER TABLE tamayame_dictionary.media
+          ADD COLUMN IF NOT EXISTS media_id bigint GENERATED BY DEFAULT AS IDENTITY,
+          ADD COLUMN IF NOT EXISTS sha256 text,
+          ADD COLUMN IF NOT EXISTS size_bytes bigint,
+          ADD COLUMN IF NOT EXISTS content_type text,
+          ADD COLUMN IF NOT EXISTS original_filename text,
+          ADD COLUMN IF NOT EXISTS created_at timestamp DEFAULT NOW(),
+          -- filled out of band by db/media_worker.py
+          ADD COLUMN IF NOT EXISTS processing_status text NOT NULL DEFAULT 'pending',
+          ADD COLUMN IF NOT EXISTS processing_error text,
+          ADD COLUMN IF NOT EXISTS processed_at timestamp,
+          ADD COLUMN IF NOT EXISTS duration_seconds double precision,
+          ADD COLUMN IF NOT EXISTS sample_rate integer,
+          ADD COLUMN IF NOT EXISTS channels smallint,
+          ADD COLUMN IF NOT EXISTS peaks jsonb,
+          ADD COLUMN IF NOT EXISTS thumbnail_path text,
+          ADD COLUMN IF NOT EXISTS width integer,
+          ADD COLUMN IF NOT EXISTS height integer
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS media_pending_idx ON tamayame_dictionary.media (media_id)
+         WHERE processing_status <> 'done'
+    """)
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS media_media_id_idx ON tamayame_dictionary.media (media_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS media_sha256_idx ON tamayame_dictionary.media (sha256)")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tamayame_dictionary.media_blobs (
+            sha256        text PRIMARY KEY,
+            path          text    NOT NULL,
+            size_bytes    bigint  NOT NULL,
+            content_type  text,
+            ref_count     integer NOT NULL DEFAULT 0,
+            created_at    timestamp NOT NULL DEFAULT NOW()
+        )
+    """)
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION tamayame_dictionary.media_blob_refs_sync()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.sha256 IS NOT NULL THEN
+                UPDATE tamayame_dictionary.media_blobs
+                   SET ref_count = ref_count - 1 WHERE sha256 = OLD.sha256;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'INSERT') AND NEW.sha256 IS NOT NULL THEN
+                UPDATE tamayame_dictionary.media_blobs
+                   SET ref_count = ref_count + 1 WHERE sha256 = NEW.sha256;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    cur.execute("DROP TRIGGER IF EXISTS media_blob_refs ON tamayame_dictionary.media")
+    cur.execute("""
+        CREATE TRIGGER media_blob_refs
+        AFTER INSERT OR DELETE OR UPDATE OF sha256
+          ON tamayame_dictionary.media
+        FOR EACH ROW
+        EXECUTE FUNCTION tamayame_dictionary.media_blob_refs_sync()
+    """)
+    cur.execute("""
+        UPDATE tamayame_dictionary.media_blobs b
+           SET ref_count = (SELECT COUNT(*) FROM tamayame_dictionary.media m WHERE m.sha256 = b.sha256)
+    """)
+    conn.commit()
+    cur.close(); conn.close()
+
+
+# ───────────────────────── storing ───────────────────────── #
+def blob_relpath(sha256, original_filename=None):
+    ext = os.path.splitext(original_filename or "")[1].lower()
+    return "/".join((_BLOB_DIR, sha256[:2], sha256[2:4], sha256 + ext))
+
+
+def store_blob(spool, original_filename=None, root=None, cur=None):
+    """
+    Move a finished HashingSpool into the store, or drop it if the content is
+    already there. Returns {sha256, path, size_bytes, content_type, duplicate}.
+    Registers the blob in media_blobs; the caller's cursor/transaction is used
+    when given.
+    """
+    root = root or MEDIA_ROOT
+    sha = spool.hexdigest()
+    spool.flush()
+    content_type = mimetypes.guess_type(original_filename or "")[0]
+
+    own = cur is None
+    if own:
+        conn = get_connection()
+        cur = conn.cursor()
+    try:
+        cur.execute("""
+            INSERT INTO tamayame_dictionary.media_blobs (sha256, path, size_bytes, content_type)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (sha256) DO NOTHING
+            RETURNING path
+        """, (sha, blob_relpath(sha, original_filename), spool.size, content_type))
+        row = cur.fetchone()
+        duplicate = row is None
+        if duplicate:
+            cur.execute("SELECT path FROM tamayame_dictionary.media_blobs WHERE sha256 = %s", (sha,))
+            path = cur.fetchone()[0]
+        else:
+            path = row[0]
+
+        dest = os.path.join(root, *path.split("/"))
+        if os.path.exists(dest):
+            spool.discard()
+        else:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            spool.close()
+            os.replace(spool.path, dest)
+        if own:
+            conn.commit()
+    except Exception:
+        if own:
+            conn.rollback()
+        spool.discard()
+        raise
+    finally:
+        if own:
+            cur.close(); conn.close()
+    return {"sha256": sha, "path": path, "size_bytes": spool.size,
+            "content_type": content_type, "duplicate": duplicate}
+
+
+def store_upload(file_storage, root=None):
+    """
+    Store a Werkzeug FileStorage. If the request already spooled it into a
+    HashingSpool (see MediaRequest in app.py), this is just a rename.
+    Otherwise it is copied in 1 MiB chunks.
+    """
+    stream = file_storage.stream
+    if not isinstance(stream, HashingSpool):
+        stream = HashingSpool.from_stream(stream, root)
+    return store_blob(stream, file_storage.filename, root=root)
+
+
+def attach_media(blob, media_type, *, entry_id=None, example_id=None, notes="",
+                 original_filename=None, cur=None):
+    """Insert a media row pointing at a stored blob. Returns media_id."""
+    own = cur is None
+    if own:
+        conn = get_connection()
+        cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO tamayame_dictionary.media
+            (entry_id, example_id, type, filename, notes,
+             sha256, size_bytes, content_type, original_filename)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING media_id
+    """, (entry_id, example_id, media_type, blob["path"], notes,
+          blob["sha256"], blob["size_bytes"], blob["content_type"], original_filename))
+    media_id = cur.fetchone()[0]
+    if own:
+        conn.commit()
+        cur.close(); conn.close()
+    return media_id
+
+
+def fetch_media(media_id):
+    """One media row (with its content-address columns) or None."""
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute("""
+        SELECT media_id, entry_id, example_id, type, filename, notes,
+               sha256, size_bytes, content_type, original_filename, thumbnail_path
+          FROM tamayame_dictionary.media
+         WHERE media_id = %s
+    """, (media_id,))
+    row = cur.fetchone()
+    cur.close(); conn.close()
+    return dict(row) if row else None
+
+
+def media_file_path(filename, root=None):
+    """Absolute path for a media.filename, or None if it escapes the store."""
+    base = os.path.realpath(root or MEDIA_ROOT)
+    full = os.path.realpath(os.path.join(base, *(filename or "").split("/")))
+    if not full.startswith(base + os.sep):
+        return None
+    return full
+
+
+def collect_orphan_blobs(root=None, dry_run=False):
+    """
+    Delete blobs no media row references any more, and upload spools left in
+    tmp/ by requests or imports that never stored them (same one-hour grace).
+    Returns the paths removed, relative to the store.
+    """
+    root = root or MEDIA_ROOT
+    removed = []
+    tmpdir = os.path.join(root, "tmp")
+    cutoff = time.time() - 3600
+    if os.path.isdir(tmpdir):
+        for name in sorted(os.listdir(tmpdir)):
+            full = os.path.join(tmpdir, name)
+            try:
+                if not os.path.isfile(full) or os.path.getmtime(full) >= cutoff:
+                    continue
+                if not dry_run:
+                    os.unlink(full)
+            except FileNotFoundError:
+                continue
+            removed.append(f"tmp/{name}")
+
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute("""
+        SELECT sha256, path FROM tamayame_dictionary.media_blobs
+         WHERE ref_count <= 0
+           AND created_at < NOW() - interval '1 hour'   -- not an upload still attaching
+           FOR UPDATE SKIP LOCKED
+    """)
+    orphans = cur.fetchall()
+    for r in orphans:
+        if not dry_run:
+            cur.execute("""
+                DELETE FROM tamayame_dictionary.media_blobs
+                 WHERE sha256 = %s AND ref_count <= 0
+            """, (r["sha256"],))
+            full = os.path.join(root, *r["path"].split("/"))
+            if cur.rowcount and os.path.exists(full):
+                os.unlink(full)
+        removed.append(r["path"])
+    conn.commit()
+    cur.close(); conn.close()
+    return removed
@@ -0,0 +1,242 @@
+# db/media_worker.py
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import wave
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .core import get_connection
+from .media_store import MEDIA_ROOT, media_file_path
+
+try:                        # thumbnails are skipped without Pillow
+    from PIL import Image
+except ImportError:
+    Image = None
+
+__all__ = [
+    "PEAK_BUCKETS",
+    "THUMBNAIL_SIZE",
+    "wav_metadata",
+    "make_thumbnail",
+    "process_media",
+    "enqueue_media",
+    "fetch_pending_media_ids",
+    "process_pending_media",
+]
+
+PEAK_BUCKETS = 200
+THUMBNAIL_SIZE = (320, 320)
+_MAX_WORKERS = int(os.environ.get("TAMAYAME_MEDIA_WORKERS", "2"))
+_THUMB_DIR = "thumbs"
+
+
+# ───────────────────────── extraction ───────────────────────── #
+def _samples(raw, width):
+    """PCM bytes → array of signed samples (24-bit keeps its top 16 bits)."""
+    if width == 1:
+        a = array("B", raw)
+        return array("h", (v - 128 for v in a)), 128
+    if width == 2:
+        a = array("h"); a.frombytes(raw)
+        return a, 32768
+    if width == 3:
+        top = bytearray(len(raw) // 3 * 2)
+        top[0::2] = raw[1::3]
+        top[1::2] = raw[2::3]
+        a = array("h"); a.frombytes(bytes(top))
+        return a, 32768
+    if width == 4:
+        a = array("i"); a.frombytes(raw)
+        return a, 2 ** 31
+    raise ValueError(f"unsupported sample width {width}")
+
+
+def wav_metadata(path, buckets=PEAK_BUCKETS):
+    """
+    Duration, format and a peak envelope (`buckets` values in 0..1, max |sample|
+    per slice) from a WAV file. Reads one slice at a time, so memory use
+    does not depend on the recording's length.
+    """
+    with wave.open(path, "rb") as w:
+        channels, width, rate, nframes = w.getnchannels(), w.getsampwidth(), w.getframerate(), w.getnframes()
+        per_bucket = max(1, -(-nframes // buckets))
+        peaks = []
+        while True:
+            raw = w.readframes(per_bucket)
+            if not raw:
+                break
+            a, full = _samples(raw, width)
+            peaks.append(round(max(max(a), -min(a)) / full, 3) if a else 0.0)
+    return {
+        "duration_seconds": nframes / rate if rate else None,
+        "sample_rate": rate,
+        "channels": channels,
+        "peaks": peaks,
+    }
+
+
+def make_thumbnail(path, sha256, root=None, size=THUMBNAIL_SIZE):
+    """
+    Downscaled JPEG under thumbs/<sha256>_<w>x<h>.jpg, named by content so
+    duplicates share it. Returns (relpath, width, height), or None when
+    Pillow isn't installed.
+    """
+    if Image is None:
+        return None
+    root = root or MEDIA_ROOT
+    rel = f"{_THUMB_DIR}/{sha256}_{size[0]}x{size[1]}.jpg"
+    dest = os.path.join(root, *rel.split("/"))
+    with Image.open(path) as im:
+        width, height = im.size
+        if not os.path.exists(dest):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            im.thumbnail(size)
+            im.convert("RGB").save(dest + ".part", "JPEG", quality=82)
+            os.replace(dest + ".part", dest)
+    return rel, width, height
+
+
+def _extract(row, root=None):
+    path = media_file_path(row["filename"], root)
+    if not path or not os.path.isfile(path):
+        raise FileNotFoundError(row["filename"])
+    meta = {}
+    name = (row["original_filename"] or row["filename"] or "").lower()
+    if name.endswith(".wav") or row["content_type"] in ("audio/wav", "audio/x-wav"):
+        meta.update(wav_metadata(path))
+    if row["type"] == "image" or (row["content_type"] or "").startswith("image/"):
+        thumb = make_thumbnail(path, row["sha256"] or str(row["media_id"]), root)
+        if thumb:
+            meta["thumbnail_path"], meta["width"], meta["height"] = thumb
+    return meta
+
+
+# ───────────────────────── jobs ───────────────────────── #
+def process_media(media_id, root=None):
+    """
+    Extract metadata for one media row and store it. Status goes
+    pending → done / failed (with the error). Returns the status.
+    Opens its own connection, so it is safe to run in a worker process.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT media_id, type, filename, original_filename, content_type, sha256
+              FROM tamayame_dictionary.media
+             WHERE media_id = %s
+        """, (media_id,))
+        r = cur.fetchone()
+        if r is None:
+            return None
+        row = dict(zip(("media_id", "type", "filename", "original_filename", "content_type", "sha256"), r))
+        try:
+            meta = _extract(row, root)
+        except Exception as e:
+            cur.execute("""
+                UPDATE tamayame_dictionary.media
+                   SET processing_status = 'failed', processing_error = %s, processed_at = NOW()
+                 WHERE media_id = %s
+            """, (f"{type(e).__name__}: {e}"[:500], media_id))
+            conn.commit()
+            return "failed"
+        cur.execute("""
+            UPDATE tamayame_dictionary.media
+               SET duration_seconds  = %s,
+                   sample_rate       = %s,
+                   channels          = %s,
+                   peaks             = %s,
+                   thumbnail_path    = %s,
+                   width             = %s,
+                   height            = %s,
+                   processing_status = 'done',
+                   processing_error  = NULL,
+                   processed_at      = NOW()
+             WHERE media_id = %s
+        """, (meta.get("duration_seconds"), meta.get("sample_rate"), meta.get("channels"),
+              json.dumps(meta["peaks"]) if "peaks" in meta else None,
+              meta.get("thumbnail_path"), meta.get("width"), meta.get("height"), media_id))
+        conn.commit()
+        return "done"
+    finally:
+        cur.close(); conn.close()
+
+
+def _new_executor(max_workers=None):
+    """
+    Process pool whose workers do not fork the caller: the app is
+    multi-threaded and holds open connections, neither of which survives a
+    fork. forkserver where the platform has it, spawn otherwise.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=max_workers or _MAX_WORKERS,
+                               mp_context=multiprocessing.get_context(method))
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _drop_executor(broken):
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _log_failure(executor, future):
+    exc = future.exception()
+    if exc is not None:
+        print(f"media worker: {type(exc).__name__}: {exc}", file=sys.stderr)
+        if isinstance(exc, BrokenProcessPool):
+            _drop_executor(executor)
+
+
+def enqueue_media(media_id):
+    """
+    Hand a media row to the app's bounded process pool and return at once.
+    If the pool is broken or gone the row simply stays pending; the next
+    upload gets a fresh pool and process_media.py picks up what was missed.
+    Returns True if the job was submitted.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = _new_executor()
+        executor = _executor
+    try:
+        future = executor.submit(process_media, media_id)
+    except (BrokenProcessPool, RuntimeError) as e:
+        print(f"media worker: media {media_id} left pending ({type(e).__name__}: {e})", file=sys.stderr)
+        _drop_executor(executor)
+        return False
+    future.add_done_callback(lambda f: _log_failure(executor, f))
+    return True
+
+
+def fetch_pending_media_ids(include_failed=False):
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT media_id FROM tamayame_dictionary.media
+         WHERE processing_status = 'pending'
+            OR (%s AND processing_status = 'failed')
+         ORDER BY media_id
+    """, (include_failed,))
+    ids = [r[0] for r in cur.fetchall()]
+    cur.close(); conn.close()
+    return ids
+
+
+def process_pending_media(processes=None, include_failed=False):
+    """Drain the pending queue with a process pool. Returns {status: count}."""
+    ids = fetch_pending_media_ids(include_failed)
+    counts = {}
+    with _new_executor(processes) as executor:
+        for status in executor.map(process_media, ids):
+            counts[status] = counts.get(status, 0) + 1
+    return counts
@@ -1,5 +1,6 @@
 # db/mutations.py
 from .core import get_connection
+from .textindex import index_example_tokens
 
 # Valid sets per your DDL
 VALID_POSITIONS  = {'prefix', 'root', 'suffix', 'infix', 'circumfix', 'other'}
@@ -8,8 +9,8 @@ VALID_CATEGORIES = {'root', 'affix', 'stem', 'clitic', 'particle', 'unknown', 't
 
 def insert_example(payload: dict) -> int:
     """
-    Insert into tamayame_dictionary.examples using a dynamic payload.
-    Returns the new example_id.
+    Insert into tamayame_dictionary.examples using a dynamic payload and
+    index its text in example_tokens. Returns the new example_id.
     """
     if not payload:
         raise ValueError("insert_example: payload is empty")
@@ -27,6 +28,10 @@ def insert_example(payload: dict) -> int:
     cur = conn.cursor()
     cur.execute(sql, params)
     new_id = cur.fetchone()[0]
+    index_example_tokens(cur, new_id,
+                         payload.get("tamayame_text"),
+                         payload.get("gloss_text"),
+                         payload.get("translation_en"))
     conn.commit()
     cur.close(); conn.close()
     return new_id
@@ -0,0 +1,169 @@
+# db/orthography.py
+import unicodedata
+from psycopg2.extras import execute_values
+from .core import get_connection
+
+__all__ = [
+    "GRAPHEME_IPA",
+    "GraphemeTrie",
+    "get_ipa_converter",
+    "to_ipa",
+    "iter_ipa_sources",
+    "fill_missing_ipa",
+]
+
+# Practical orthography → IPA. Multi-letter graphemes win over their parts
+# (longest match), so "tsʼ" is one segment, not t + sʼ. Edit here; vowel
+# length (doubled vowels) is generated below.
+GRAPHEME_IPA = {
+    "a": "a", "e": "e", "i": "i", "o": "o", "u": "u",
+    "b": "b", "d": "d", "g": "ɡ", "h": "h", "j": "dʒ", "k": "k", "m": "m",
+    "n": "n", "p": "p", "r": "ɾ", "s": "s", "t": "t", "w": "w", "y": "j",
+    "ch": "tʃ", "chʼ": "tʃʼ", "sh": "ʃ", "shʼ": "ʃʼ",
+    "dr": "ɖʐ", "tr": "ʈʂ", "trʼ": "ʈʂʼ", "sr": "ʂ", "srʼ": "ʂʼ",
+    "dy": "dʲ", "ty": "tʲ", "tyʼ": "tʲʼ", "dz": "dz", "ts": "ts", "tsʼ": "tsʼ",
+    "ny": "ɲ", "nyʼ": "ɲˀ",
+    "kʼ": "kʼ", "pʼ": "pʼ", "tʼ": "tʼ", "sʼ": "sʼ",
+    "mʼ": "mˀ", "nʼ": "nˀ", "wʼ": "wˀ", "yʼ": "jˀ", "rʼ": "ɾˀ",
+    "ʼ": "ʔ", "'": "ʔ", "’": "ʔ",
+    ":": "ː", "-": "",
+}
+
+# Accented vowels keep their tone mark; a doubled vowel is one long vowel
+_VOWELS = {
+    "a": "aáàâ", "e": "eéèê", "i": "iíìî", "o": "oóòô", "u": "uúùû",
+}
+
+
+def _with_length(mapping):
+    out = dict(mapping)
+    for variants in _VOWELS.values():
+        for v in variants:
+            out.setdefault(v, v)
+            for w in variants:
+                out[v + w] = out[v] + "ː"
+    return out
+
+
+# ───────────────────────── trie ───────────────────────── #
+class GraphemeTrie:
+    """
+    Longest-match transducer over grapheme → IPA mappings. Nodes are dicts
+    keyed by character. The IPA output of a node is stored under the key
+    None. Characters with no mapping pass through unchanged.
+    """
+
+    __slots__ = ("root", "_single")
+
+    def __init__(self, mapping):
+        self.root = {}
+        for src, dst in mapping.items():
+            node = self.root
+            for ch in src:
+                node = node.setdefault(ch, {})
+            node[None] = dst
+        # chars that never start a longer grapheme skip the trie walk
+        self._single = {ch: node[None] for ch, node in self.root.items()
+                        if None in node and len(node) == 1}
+
+    def convert(self, text):
+        if not text:
+            return ""
+        s = unicodedata.normalize("NFC", text).lower()
+        root, single = self.root, self._single
+        out = []
+        i, n = 0, len(s)
+        while i < n:
+            ch = s[i]
+            hit = single.get(ch)
+            if hit is not None:
+                out.append(hit)
+                i += 1
+                continue
+            node = root.get(ch)
+            if node is None:
+                out.append(ch)
+                i += 1
+                continue
+            best, best_end = node.get(None), i + 1
+            j = i + 1
+            while j < n:
+                node = node.get(s[j])
+                if node is None:
+                    break
+                j += 1
+                if None in node:
+                    best, best_end = node[None], j
+            out.append(best if best is not None else ch)
+            i = best_end
+        return "".join(out)
+
+
+_CONVERTER = None
+
+
+def get_ipa_converter():
+    global _CONVERTER
+    if _CONVERTER is None:
+        _CONVERTER = GraphemeTrie(_with_length(GRAPHEME_IPA))
+    return _CONVERTER
+
+
+def to_ipa(text):
+    """Orthographic Tamayame → IPA (longest-match over GRAPHEME_IPA)."""
+    return get_ipa_converter().convert(text)
+
+
+# ───────────────────────── streaming ───────────────────────── #
+_SOURCES = {
+    # kind: (select, target table, key column)
+    "entries": ("""
+        SELECT entry_id, headword, ipa
+          FROM tamayame_dictionary.entries
+         WHERE headword IS NOT NULL AND headword <> ''
+         ORDER BY entry_id
+    """, "tamayame_dictionary.entries", "entry_id"),
+    "examples": ("""
+        SELECT er.example_id, COALESCE(NULLIF(btrim(er.sr), ''), x.tamayame_text), er.ipa
+          FROM tamayame_dictionary.example_realizations er
+          JOIN tamayame_dictionary.examples x ON x.example_id = er.example_id
+         WHERE COALESCE(NULLIF(btrim(er.sr), ''), x.tamayame_text) IS NOT NULL
+         ORDER BY er.example_id
+    """, "tamayame_dictionary.example_realizations", "example_id"),
+}
+
+
+def iter_ipa_sources(kind, itersize=20000):
+    """
+    Stream (id, orthographic text, stored ipa) for 'entries' or 'examples'
+    through a server-side cursor, so memory stays flat on any table size.
+    """
+    select, _, _ = _SOURCES[kind]
+    conn = get_connection()
+    cur = conn.cursor(name=f"ipa_{kind}")
+    cur.itersize = itersize
+    try:
+        cur.execute(select)
+        for row in cur:
+            yield row
+    finally:
+        cur.close(); conn.close()
+
+
+def fill_missing_ipa(cur, kind, pairs):
+    """
+    Bulk-set ipa for [(id, ipa)] with execute_values. Rows that gained an IPA
+    value since they were read are left alone. Returns the number updated.
+    Callers batch `pairs`; one statement per call keeps rowcount exact.
+    """
+    if not pairs:
+        return 0
+    _, table, key = _SOURCES[kind]
+    execute_values(cur, f"""
+        UPDATE {table} t
+           SET ipa = v.ipa
+          FROM (VALUES %s) AS v(id, ipa)
+         WHERE t.{key} = v.id
+           AND (t.ipa IS NULL OR btrim(t.ipa) = '')
+    """, pairs, page_size=len(pairs))
+    return cur.rowcount
@@ -0,0 +1,416 @@
+# db/paradigm.py
+import itertools
+from psycopg2.extras import RealDictCursor
+from .core import get_connection
+from .intransitive import _norm_number
+
+__all__ = [
+    "PARADIGM_COLUMNS",
+    "load_paradigm_inventories",
+    "iter_paradigm_cells",
+]
+
+# Flat columns for CSV output (JSON output also carries `parts`)
+PARADIGM_COLUMNS = [
+    "template_id", "template_name", "slot_order",
+    "ta_number", "voice", "stem", "gloss", "ids",
+]
+
+# Same aliases the /get-prmp-options intransitive path accepts
+_NUMBER_SCOPES = {
+    "sg": ["sg", "singular"],
+    "dl": ["dl", "du", "dual"],
+    "pl": ["pl", "plural"],
+}
+
+_SUFFIX_CATEGORY_MAP = {
+    "400": ["imperfective", "remote-state", "purposive", "passive", "reflexive"],
+    "500": ["subject-number", "agreement", "subject-agreement", "object-agreement"],
+    "600": ["conditional"],
+}
+
+
+# ───────────────────────── helpers ───────────────────────── #
+def _opt(row, gloss_key="ur_gloss", id_key="allomorph_id"):
+    return {
+        "id":       row[id_key],
+        "form":     row.get("form") or "",
+        "gloss":    (row.get(gloss_key) or "").strip(),
+        "davis_id": row.get("davis_id"),
+    }
+
+
+def _voice_of(option):
+    """301 → REFL, 302A/302B → PASS (same rule as the builder's voiceFrom300)."""
+    if not option:
+        return "NONE"
+    did = (option.get("davis_id") or "").upper()
+    if did == "301":
+        return "REFL"
+    if did in ("302A", "302B"):
+        return "PASS"
+    return "NONE"
+
+
+def _template_fits(template, transitivity):
+    if not transitivity:
+        return True
+    return (template.get("transitivity") or "").lower() == transitivity
+
+
+# ───────────────────── inventory loading ───────────────────── #
+def load_paradigm_inventories(entry_id: int):
+    """
+    Bulk-load everything the builder would fetch slot by slot for one entry:
+    roots, TA forms (filtered by the root's voice class), PRMP inventories per
+    TA number / voice / benefactive, suffix families and the B→500 map.
+
+    Returns None if the entry does not exist.
+    """
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cur.execute("""
+            SELECT entry_id, headword, transitivity, voice_class,
+                   COALESCE(primary_paradigm_class_id, 1) AS class_id,
+                   suffix_subclass_id
+              FROM tamayame_dictionary.entries
+             WHERE entry_id = %s
+        """, (entry_id,))
+        row = cur.fetchone()
+        if not row:
+            return None
+        entry = dict(row)
+        transitivity = (entry.get("transitivity") or "").strip().lower()
+
+        # ROOT
+        cur.execute("""
+            SELECT morpheme_id, segment AS form, gloss
+              FROM tamayame_dictionary.morphemes
+             WHERE entry_id = %s
+               AND LOWER(COALESCE(position,'')) = 'root'
+             ORDER BY ordering, segment
+        """, (entry_id,))
+        roots = [_opt(r, "gloss", "morpheme_id") for r in cur.fetchall()]
+        if not roots and entry.get("headword"):
+            roots = [{"id": None, "form": entry["headword"], "gloss": "", "davis_id": None}]
+
+        # TA (voice-class filtered like the builder)
+        if entry.get("voice_class"):
+            cur.execute("""
+                SELECT ta_id, form, number
+                  FROM tamayame_dictionary.ta_allomorphs
+                 WHERE voice_class::text = %s::text
+                 ORDER BY number, form
+            """, (entry["voice_class"],))
+        else:
+            cur.execute("""
+                SELECT ta_id, form, number
+                  FROM tamayame_dictionary.ta_allomorphs
+                 ORDER BY number, form
+            """)
+        ta = []
+        for r in cur.fetchall():
+            num = _norm_number(r["number"])
+            ta.append({"id": r["ta_id"], "form": r["form"], "gloss": num,
+                       "davis_id": None, "number": num})
+
+        prmp = _load_prmp_inventories(cur, entry, transitivity)
+        suffixes = _load_suffix_inventories(cur, entry)
+
+        cur.execute("""
+            SELECT b_allomorph_id, suffix500_allomorph_id
+              FROM tamayame_dictionary.benefactive_500_map
+        """)
+        b_500_map = {}
+        for r in cur.fetchall():
+            b_500_map.setdefault(r["b_allomorph_id"], set()).add(r["suffix500_allomorph_id"])
+    finally:
+        cur.close(); conn.close()
+
+    return {
+        "entry": entry,
+        "transitivity": transitivity,
+        "roots": roots,
+        "ta": ta,
+        "prmp": prmp,
+        "suffixes": suffixes,
+        "b_500_map": b_500_map,
+    }
+
+
+def _load_prmp_inventories(cur, entry, transitivity):
+    """
+    PRMP (slot 100) lists keyed the way /get-prmp-options resolves them:
+      ('voice', 'REFL'|'PASS'), ('class', class_id), ('intrans', number), 'fallback'
+    """
+    out = {}
+
+    cur.execute("""
+        SELECT p.voice, a.allomorph_id, a.davis_id, a.form, a.ur_gloss
+          FROM tamayame_dictionary.prmp_voice_membership p
+          JOIN tamayame_dictionary.allomorphs a
+            ON a.allomorph_id = p.allomorph_id
+         WHERE p.voice IN ('REFL', 'PASS')
+           AND a.category = 'PRMP'
+           AND a.ur_gloss IS NOT NULL
+           AND a.ur_gloss !~ '(^|[^0-9])[123]/[123]'
+         ORDER BY a.davis_id, length(a.form), a.allomorph_id
+    """)
+    for r in cur.fetchall():
+        out.setdefault(("voice", r["voice"]), []).append(_opt(r))
+
+    # Transitive class inventories: the entry's own class (sg objects) and A (non-sg)
+    for class_id in sorted({int(entry["class_id"]), 1}):
+        cur.execute("""
+            SELECT DISTINCT ON (a.davis_id)
+                   a.allomorph_id, a.davis_id, a.form, a.ur_gloss
+              FROM tamayame_dictionary.allomorphs a
+              JOIN tamayame_dictionary.primary_paradigm_class_paradigms p
+                ON p.class_id = %s
+               AND a.partial_paradigm = p.partial_paradigm
+             WHERE a.category = 'PRMP'
+               AND (
+                     LOWER(COALESCE(a.transitivity,'')) = 'transitive'
+                     OR (
+                          COALESCE(a.transitivity,'') = ''
+                          AND a.ur_gloss IS NOT NULL
+                          AND a.ur_gloss ~ '(^|[^0-9])[123]/[123]'
+                        )
+                   )
+             ORDER BY a.davis_id, length(a.form), a.allomorph_id
+        """, (class_id,))
+        out[("class", class_id)] = [_opt(r) for r in cur.fetchall()]
+
+    cur.execute("""
+        SELECT DISTINCT ON (a.davis_id)
+               a.allomorph_id, a.davis_id, a.form, a.ur_gloss
+          FROM tamayame_dictionary.allomorphs a
+         WHERE a.category = 'PRMP'
+           AND (
+                 LOWER(COALESCE(a.transitivity,'')) = 'transitive'
+                 OR (
+                      COALESCE(a.transitivity,'') = ''
+                      AND a.ur_gloss IS NOT NULL
+                      AND a.ur_gloss ~ '(^|[^0-9])[123]/[123]'
+                    )
+               )
+         ORDER BY a.davis_id, length(a.form), a.allomorph_id
+    """)
+    out["fallback"] = [_opt(r) for r in cur.fetchall()]
+
+    if transitivity == "intransitive":
+        cur.execute("""
+            SELECT LOWER(eic.number) AS number, ic.class_code
+              FROM tamayame_dictionary.entry_intransitive_classes eic
+              JOIN tamayame_dictionary.intransitive_classes ic
+                ON ic.class_id = eic.intransitive_class_id
+             WHERE eic.entry_id = %s
+        """, (entry["entry_id"],))
+        for r in cur.fetchall():
+            num = _norm_number(r["number"])
+            if not r["class_code"] or ("intrans", num) in out:
+                continue
+            cur.execute("""
+                WITH codes AS (
+                  SELECT v.base3, v.full4
+                    FROM tamayame_dictionary.v_intrans_class_codes_norm v
+                   WHERE v.class_code = %s
+                     AND v.scope_norm = ANY(%s)
+                   GROUP BY v.base3, v.full4
+                ),
+                joined AS (
+                  SELECT a.allomorph_id, a.davis_id, a.form, a.ur_gloss
+                    FROM tamayame_dictionary.allomorphs a
+                    JOIN codes c
+                      ON (
+                           (c.full4 IS NOT NULL AND a.davis_id = c.full4)
+                           OR
+                           (c.full4 IS NULL  AND SUBSTRING(a.davis_id FROM '^[0-9]{3}') = c.base3)
+                         )
+                   WHERE a.category = 'PRMP'
+                     AND (
+                           LOWER(COALESCE(a.transitivity,'')) = 'intransitive'
+                           OR (
+                                COALESCE(a.transitivity,'') = ''
+                                AND a.ur_gloss IS NOT NULL
+                                AND a.ur_gloss !~ '(^|[^0-9])[123]/[123]'
+                              )
+                         )
+                )
+                SELECT DISTINCT ON (davis_id)
+                       allomorph_id, davis_id, form, ur_gloss
+                  FROM joined
+                 ORDER BY davis_id, length(form), allomorph_id
+            """, (r["class_code"], _NUMBER_SCOPES.get(num, [num])))
+            out[("intrans", num)] = [_opt(x) for x in cur.fetchall()]
+
+    return out
+
+
+def _load_suffix_inventories(cur, entry):
+    """200/300/400/500/600/B lists, subclass-aware for 400/500 like /get-suffix-options."""
+    out = {}
+
+    cur.execute("""
+        SELECT allomorph_id, form, ur_gloss, davis_id
+          FROM tamayame_dictionary.allomorphs
+         WHERE LOWER(COALESCE(ur_gloss,'')) = 'fut'
+            OR LOWER(COALESCE(category,'')) = 'future'
+            OR (davis_id IS NOT NULL AND LEFT(davis_id,3) = '201')
+         ORDER BY davis_id NULLS LAST, form
+    """)
+    out["200"] = [dict(_opt(r), gloss=(r["ur_gloss"] or "FUT")) for r in cur.fetchall()]
+
+    cur.execute("""
+        SELECT allomorph_id, form, ur_gloss, davis_id
+          FROM tamayame_dictionary.allomorphs
+         WHERE davis_id IN ('301','302A','302B')
+            OR LOWER(COALESCE(category,'')) IN ('reflexive','passive')
+            OR (UPPER(COALESCE(ur_gloss,'')) IN ('REFL','PASS')
+                AND LEFT(COALESCE(davis_id,''),3)='30')
+         ORDER BY CASE davis_id
+                    WHEN '301'  THEN 1
+                    WHEN '302A' THEN 2
+                    WHEN '302B' THEN 3
+                    ELSE 99
+                  END,
+                  form
+    """)
+    out["300"] = [_opt(r) for r in cur.fetchall()]
+
+    cur.execute("""
+        SELECT allomorph_id, form, ur_gloss, davis_id
+          FROM tamayame_dictionary.allomorphs
+         WHERE LOWER(category) IN ('b','benefactive')
+         ORDER BY form
+    """)
+    out["B"] = [_opt(r) for r in cur.fetchall()]
+
+    cur.execute("""
+        SELECT allomorph_id, form, ur_gloss, davis_id
+          FROM tamayame_dictionary.allomorphs
+         WHERE (davis_id IS NOT NULL AND LEFT(davis_id,1) = '5')
+            OR LOWER(COALESCE(category,'')) IN (
+                '500','subject-number','agreement','subject-agreement','object-agreement'
+            )
+         ORDER BY COALESCE(davis_id,'ZZZ'), form
+    """)
+    out["500_any"] = [_opt(r) for r in cur.fetchall()]
+
+    subclass_rows = []
+    if entry.get("suffix_subclass_id"):
+        cur.execute("""
+            SELECT a.allomorph_id, a.form, a.ur_gloss, a.davis_id
+              FROM tamayame_dictionary.subclass_allomorphs s
+              JOIN tamayame_dictionary.allomorphs a
+                ON a.allomorph_id = s.allomorph_id
+             WHERE s.subclass_id = %s
+             ORDER BY COALESCE(a.davis_id,'ZZZ'), a.form
+        """, (int(entry["suffix_subclass_id"]),))
+        subclass_rows = cur.fetchall()
+
+    for family, cats in _SUFFIX_CATEGORY_MAP.items():
+        opts = []
+        if family in ("400", "500"):
+            opts = [_opt(r) for r in subclass_rows
+                    if (r["davis_id"] or "").startswith(family[0])]
+        if not opts:
+            cur.execute("""
+                SELECT allomorph_id, form, ur_gloss, davis_id
+                  FROM tamayame_dictionary.allomorphs
+                 WHERE LOWER(category) = ANY(%s)
+                 ORDER BY COALESCE(davis_id,'ZZZ'), form
+            """, (cats,))
+            opts = [_opt(r) for r in cur.fetchall()]
+        out[family] = opts
+
+    return out
+
+
+# ───────────────────── cell generation ───────────────────── #
+def _prmp_options(inv, number, voice, has_b):
+    """Resolve slot 100 in the same precedence as /get-prmp-options."""
+    prmp = inv["prmp"]
+    if voice in ("REFL", "PASS") and prmp.get(("voice", voice)):
+        return prmp[("voice", voice)]
+    class_id = int(inv["entry"]["class_id"])
+    if has_b:
+        return prmp.get(("class", class_id)) or []
+    if inv["transitivity"] == "intransitive":
+        return prmp.get(("intrans", number)) or []
+    # sg objects use the entry's own class; dl/pl objects use class A
+    effective = 1 if number in ("dl", "pl") else class_id
+    return prmp.get(("class", effective)) or prmp.get("fallback") or []
+
+
+def _suffix_options(inv, slot, voice, b_opt):
+    suffixes = inv["suffixes"]
+    if slot == "500":
+        if voice == "PASS":
+            return suffixes.get("500_any") or []
+        opts = suffixes.get("500") or []
+        if b_opt is not None:
+            allowed = inv["b_500_map"].get(b_opt["id"], set())
+            opts = [o for o in opts if o["id"] in allowed]
+        return opts
+    return suffixes.get(slot) or []
+
+
+def iter_paradigm_cells(inv, templates, template_id=None):
+    """
+    Lazily enumerate every candidate stem for an entry across all compatible
+    templates. Yields dicts shaped like PARADIGM_COLUMNS plus `parts`.
+
+    The TA, 300 and B choices are expanded first because they decide which
+    PRMP and 500 inventories apply; the remaining slots are a plain product.
+    """
+    none = [None]
+    for tpl in templates:
+        if template_id is not None and tpl["template_id"] != template_id:
+            continue
+        if not _template_fits(tpl, inv["transitivity"]):
+            continue
+
+        slots = tpl["slot_order"]
+        slot_label = "-".join(slots)
+        ta_opts = inv["ta"] if "TA" in slots else none
+        v_opts  = (inv["suffixes"].get("300") or []) if "300" in slots else none
+        b_opts  = (inv["suffixes"].get("B") or []) if "B" in slots else none
+
+        for ta, v, b in itertools.product(ta_opts, v_opts, b_opts):
+            number = ta["number"] if ta else "sg"
+            voice = _voice_of(v)
+
+            per_slot = []
+            for slot in slots:
+                if slot == "TA":
+                    per_slot.append([ta])
+                elif slot == "300":
+                    per_slot.append([v])
+                elif slot == "B":
+                    per_slot.append([b])
+                elif slot == "ROOT":
+                    per_slot.append(inv["roots"])
+                elif slot == "100":
+                    per_slot.append(_prmp_options(inv, number, voice, b is not None))
+                else:
+                    per_slot.append(_suffix_options(inv, slot, voice, b))
+
+            for combo in itertools.product(*per_slot):
+                yield {
+                    "template_id":   tpl["template_id"],
+                    "template_name": tpl["name"],
+                    "slot_order":    slot_label,
+                    "ta_number":     number if ta else "",
+                    "voice":         voice,
+                    "stem":          "-".join(o["form"] for o in combo),
+                    "gloss":         "-".join(o["gloss"] for o in combo if o["gloss"]),
+                    "ids":           "|".join(f"{s}:{o['id'] if o['id'] is not None else ''}"
+                                              for s, o in zip(slots, combo)),
+                    "parts": [
+                        {"slot": s, "id": o["id"], "form": o["form"],
+                         "gloss": o["gloss"], "davis_id": o["davis_id"]}
+                        for s, o in zip(slots, combo)
+                    ],
+                }
@@ -0,0 +1,193 @@
+# db/phonology.py
+import json
+import os
+import re
+from multiprocessing import Pool
+from psycopg2.extras import RealDictCursor
+from .core import get_connection
+
+__all__ = [
+    "RULES_PATH",
+    "load_rules",
+    "RuleCascade",
+    "fetch_realizations",
+    "realize_corpus",
+]
+
+# Ordered rule file (see the "_format" key inside it for the syntax)
+RULES_PATH = os.environ.get(
+    "TAMAYAME_PHONOLOGY_RULES",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "phonology_rules.json"),
+)
+
+_MACRO_RE = re.compile(r"\{(\w+)\}")
+
+
+def load_rules(path=None):
+    with open(path or RULES_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ───────────────────────── compilation ───────────────────────── #
+def _expand(fragment, classes, side=None):
+    """
+    Rule-notation fragment → regex source. {V} and other class names become
+    character classes; '#' is a word edge; '+' is a morpheme boundary ('-');
+    anything else is regex already.
+    """
+    def macro(m):
+        name = m.group(1)
+        if name not in classes:
+            raise ValueError(f"phonology: unknown class {{{name}}}")
+        return "[" + re.escape(classes[name]) + "]"
+
+    out = _MACRO_RE.sub(macro, fragment or "")
+    if side == "left":
+        out = out.replace("#", r"(?:^|(?<=\s))")
+    elif side == "right":
+        out = out.replace("#", r"(?:$|(?=\s))")
+    return out.replace("+", "-")
+
+
+class _Stage:
+    """
+    Rules that apply simultaneously, compiled into one alternation:
+      (?P<l0>left0)?(?P<r0>match0)(?=right0) | (?P<l1>…)(?P<r1>…)(?=…) | …
+    Left contexts use a lookbehind when they are fixed-width, otherwise they
+    are captured and written back unchanged.
+    """
+
+    def __init__(self, rules, classes):
+        self.names, self.outputs, alts = [], [], []
+        for i, rule in enumerate(rules):
+            left = _expand(rule.get("left"), classes, "left")
+            right = _expand(rule.get("right"), classes, "right")
+            match = _expand(rule["match"], classes)
+            try:
+                re.compile(f"(?<={left})") if left else None
+                lead = f"(?<={left})(?P<l{i}>)" if left else f"(?P<l{i}>)"
+            except re.error:
+                lead = f"(?P<l{i}>{left})"
+            alts.append(f"{lead}(?P<r{i}>{match})" + (f"(?={right})" if right else ""))
+            self.names.append(rule.get("name") or f"rule {i + 1}")
+            self.outputs.append(rule.get("map") if "map" in rule else rule.get("to", ""))
+        self.regex = re.compile("|".join(alts))
+        self._groups = [(f"l{i}", f"r{i}") for i in range(len(rules))]
+
+    def apply(self, s, fired=None):
+        def sub(m):
+            for i, (lg, rg) in enumerate(self._groups):
+                hit = m.group(rg)
+                if hit is None:
+                    continue
+                out = self.outputs[i]
+                if isinstance(out, dict):
+                    out = "".join(out.get(ch, ch) for ch in hit)
+                if fired is not None and out != hit:
+                    fired.append(self.names[i])
+                return m.group(lg) + out
+            return m.group(0)
+        return self.regex.sub(sub, s)
+
+
+class RuleCascade:
+    """
+    Ordered cascade of rewrite stages compiled from a rules dict:
+      {"classes": {...}, "sr": [stage, ...], "ipa": [stage, ...]}
+    where a stage is a rule or a list of rules applied simultaneously. SR
+    starts from the hyphenated UR. Morpheme boundaries stay visible to the
+    rules and are erased at the end unless "keep_boundaries" is set.
+    """
+
+    def __init__(self, rules):
+        classes = rules.get("classes") or {}
+        self.keep_boundaries = bool(rules.get("keep_boundaries"))
+
+        def stages(seq):
+            out = []
+            for st in seq or []:
+                group = st if isinstance(st, list) else [st]
+                group = [r for r in group if r.get("enabled", True)]
+                if group:
+                    out.append(_Stage(group, classes))
+            return out
+
+        self.sr_stages = stages(rules.get("sr"))
+        self.ipa_stages = stages(rules.get("ipa"))
+
+    def derive(self, ur, trace=False):
+        """UR → (sr, fired rule names or None)."""
+        if not ur:
+            return "", ([] if trace else None)
+        fired = [] if trace else None
+        s = " ".join(ur.split())
+        for stage in self.sr_stages:
+            s = stage.apply(s, fired)
+        if not self.keep_boundaries:
+            s = s.replace("-", "")
+        return s, fired
+
+    def to_ipa(self, sr):
+        s = sr or ""
+        for stage in self.ipa_stages:
+            s = stage.apply(s)
+        return s
+
+    def realize(self, ur, with_ipa=False):
+        sr, _ = self.derive(ur)
+        return (sr, self.to_ipa(sr)) if with_ipa else (sr, None)
+
+
+# ───────────────────────── batch ───────────────────────── #
+def fetch_realizations():
+    """Every example_realizations row that has a UR: example_id, ur, sr, ipa."""
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute("""
+        SELECT example_id, ur, sr, ipa
+          FROM tamayame_dictionary.example_realizations
+         WHERE ur IS NOT NULL AND btrim(ur) <> ''
+         ORDER BY example_id
+    """)
+    rows = [dict(r) for r in cur.fetchall()]
+    cur.close(); conn.close()
+    return rows
+
+
+_cascade = None
+
+
+def _init_worker(rules):
+    global _cascade
+    _cascade = RuleCascade(rules)
+
+
+def _realize_chunk(args):
+    rows, with_ipa = args
+    out = []
+    for example_id, ur, stored_sr in rows:
+        sr, ipa = _cascade.realize(ur, with_ipa)
+        fired = None
+        if stored_sr and sr != stored_sr:
+            fired = _cascade.derive(ur, trace=True)[1]
+        out.append((example_id, sr, ipa, fired))
+    return out
+
+
+def realize_corpus(rows, rules=None, with_ipa=False, processes=None, chunksize=2000):
+    """
+    Run the cascade over realization rows with a process pool. Each worker
+    compiles the rules once. Returns {example_id: (sr, ipa, fired)}; `fired`
+    (the rules that changed something) is filled only where the result
+    disagrees with the stored SR.
+    """
+    rules = rules if rules is not None else load_rules()
+    RuleCascade(rules)  # fail fast on a bad rule file, before forking
+    packed = [(r["example_id"], r["ur"], (r.get("sr") or "").strip()) for r in rows]
+    chunks = [(packed[i:i + chunksize], with_ipa) for i in range(0, len(packed), chunksize)]
+    results = {}
+    with Pool(processes, initializer=_init_worker, initargs=(rules,)) as pool:
+        for part in pool.imap_unordered(_realize_chunk, chunks):
+            for example_id, sr, ipa, fired in part:
+                results[example_id] = (sr, ipa, fired)
+    return results
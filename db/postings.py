@@ -0,0 +1,420 @@
+# db/postings.py
+import re
+import threading
+import time
+from .core import get_connection
+from .changes import fetch_example_change_seq, fetch_example_changes
+
+__all__ = [
+    "Bitmap",
+    "UsageIndex",
+    "parse_usage_query",
+    "get_usage_index",
+    "query_usage",
+]
+
+# Voice shorthands, matching the builder's reading of the 300 slot
+VOICE_ALIASES = {"REFL": ("301",), "PASS": ("302A", "302B")}
+
+_CHUNK_BITS = 12
+_CHUNK_MASK = (1 << _CHUNK_BITS) - 1
+
+
+# ───────────────────────── bitmap ───────────────────────── #
+class Bitmap:
+    """
+    Chunked bitmap of example ids: {chunk_no: int}, each int holding 4096
+    bits. AND/OR/AND-NOT work chunk by chunk on Python ints, so they cost
+    the number of occupied chunks, not the number of ids.
+    """
+
+    __slots__ = ("chunks",)
+
+    def __init__(self, chunks=None):
+        self.chunks = chunks or {}
+
+    @classmethod
+    def from_ids(cls, ids):
+        b = cls()
+        for i in ids:
+            b.add(i)
+        return b
+
+    def add(self, i):
+        k = i >> _CHUNK_BITS
+        self.chunks[k] = self.chunks.get(k, 0) | (1 << (i & _CHUNK_MASK))
+
+    def discard(self, i):
+        k = i >> _CHUNK_BITS
+        v = self.chunks.get(k)
+        if v is not None:
+            v &= ~(1 << (i & _CHUNK_MASK))
+            if v:
+                self.chunks[k] = v
+            else:
+                del self.chunks[k]
+
+    def __and__(self, other):
+        a, b = self.chunks, other.chunks
+        if len(a) > len(b):
+            a, b = b, a
+        out = {}
+        for k, v in a.items():
+            w = b.get(k)
+            if w is not None:
+                v &= w
+                if v:
+                    out[k] = v
+        return Bitmap(out)
+
+    def __or__(self, other):
+        out = dict(self.chunks)
+        for k, v in other.chunks.items():
+            out[k] = out.get(k, 0) | v
+        return Bitmap(out)
+
+    def __sub__(self, other):
+        out = {}
+        b = other.chunks
+        for k, v in self.chunks.items():
+            w = b.get(k)
+            if w is not None:
+                v &= ~w
+            if v:
+                out[k] = v
+        return Bitmap(out)
+
+    def __len__(self):
+        return sum(v.bit_count() for v in self.chunks.values())
+
+    def iter_ids(self, after=None):
+        """Yield set ids in ascending order, starting above `after`."""
+        start = -1 if after is None else int(after)
+        first = (start + 1) >> _CHUNK_BITS
+        for k in sorted(c for c in self.chunks if c >= first):
+            v = self.chunks[k]
+            base = k << _CHUNK_BITS
+            if k == first and start >= base:
+                v &= ~((1 << (start - base + 1)) - 1)
+            while v:
+                low = v & -v
+                yield base + low.bit_length() - 1
+                v ^= low
+
+    def page(self, after=None, limit=50):
+        ids = []
+        for i in self.iter_ids(after):
+            ids.append(i)
+            if len(ids) == limit:
+                break
+        return ids
+
+
+# ───────────────────────── query parsing ───────────────────────── #
+_QUERY_TOKEN_RE = re.compile(r"\(|\)|[^\s()]+")
+
+
+def parse_usage_query(q):
+    """
+    Parse a boolean usage query into a nested tuple tree:
+      ('term', key) | ('and', l, r) | ('or', l, r) | ('not', x)
+
+    Terms:
+      a:57      allomorph id (slot tables and legacy PRMP links)
+      ta:3      TA allomorph id
+      m:812     morpheme id
+      101A      Davis id; 4*, 10* are Davis-id prefixes
+      slot:500  any morpheme in that slot (a bare 500 means the slot too,
+                unless some allomorph carries Davis id 500)
+      REFL, PASS   voice (301 / 302A|302B)
+    Operators: AND (also implied between terms), OR, NOT / '-' prefix, parens.
+      "101A AND REFL AND NOT slot:500"   "(ta:3 OR ta:4) -5*"
+    """
+    tokens = _QUERY_TOKEN_RE.findall(q or "")
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        pos += 1
+        return tokens[pos - 1]
+
+    def parse_or():
+        node = parse_and()
+        while peek() is not None and peek().upper() == "OR":
+            take()
+            node = ("or", node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() is not None and peek() != ")" and peek().upper() != "OR":
+            if peek().upper() == "AND":
+                take()
+            node = ("and", node, parse_not())
+        return node
+
+    def parse_not():
+        t = peek()
+        if t is None:
+            raise ValueError("usage query: unexpected end")
+        if t.upper() == "NOT":
+            take()
+            return ("not", parse_not())
+        if t.startswith("-") and len(t) > 1:
+            take()
+            return ("not", ("term", t[1:]))
+        if t == "(":
+            take()
+            node = parse_or()
+            if take_if(")") is None:
+                raise ValueError("usage query: missing ')'")
+            return node
+        if t == ")":
+            raise ValueError("usage query: unexpected ')'")
+        return ("term", take())
+
+    def take_if(tok):
+        if peek() == tok:
+            return take()
+        return None
+
+    if not tokens:
+        raise ValueError("usage query is empty")
+    tree = parse_or()
+    if pos != len(tokens):
+        raise ValueError(f"usage query: unexpected {tokens[pos]!r}")
+    return tree
+
+
+# ───────────────────────── index ───────────────────────── #
+class UsageIndex:
+    """
+    Term → Bitmap of example ids, plus the reverse example → terms map used
+    to replace one example's postings when the change feed says it moved.
+    Term keys: ('a', id), ('ta', id), ('m', id), ('d', davis_id), ('slot', slot).
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.by_example = {}
+        self.universe = Bitmap()
+        self.seq = 0
+        # terms whose Bitmap this instance owns; None = all of them
+        self._owned = None
+
+    def _fork(self):
+        """
+        Copy-on-write clone: the dicts are copied, postings Bitmaps are
+        shared until _posting() first touches them. Readers holding the old
+        instance never see a half-applied change.
+        """
+        other = UsageIndex()
+        other.postings = dict(self.postings)
+        other.by_example = dict(self.by_example)
+        other.universe = Bitmap(dict(self.universe.chunks))
+        other.seq = self.seq
+        other._owned = set()
+        return other
+
+    def _posting(self, t, create=True):
+        b = self.postings.get(t)
+        if b is None:
+            if not create:
+                return None
+            b = self.postings[t] = Bitmap()
+        elif self._owned is not None and t not in self._owned:
+            b = self.postings[t] = Bitmap(dict(b.chunks))
+        if self._owned is not None:
+            self._owned.add(t)
+        return b
+
+    # ── loading ──
+    @staticmethod
+    def _fetch_rows(cur, example_ids=None):
+        where, params = "", ()
+        if example_ids is not None:
+            where = "WHERE x.example_id = ANY(%s)"
+            params = (list(example_ids),)
+        cur.execute(f"""
+            SELECT x.example_id, NULL AS slot, NULL::int AS allomorph_id,
+                   NULL::int AS ta_id, NULL::int AS morpheme_id, NULL AS davis_id
+              FROM tamayame_dictionary.examples x
+              {where}
+            UNION ALL
+            SELECT em.example_id, em.slot, em.allomorph_id, em.ta_allomorph_id,
+                   em.morpheme_id, a.davis_id
+              FROM tamayame_dictionary.example_morphemes em
+              JOIN tamayame_dictionary.examples x ON x.example_id = em.example_id
+              LEFT JOIN tamayame_dictionary.allomorphs a ON a.allomorph_id = em.allomorph_id
+              {where}
+            UNION ALL
+            SELECT epa.example_id, '100', epa.allomorph_id, NULL, NULL, a.davis_id
+              FROM tamayame_dictionary.example_prmp_allomorphs epa
+              JOIN tamayame_dictionary.examples x ON x.example_id = epa.example_id
+              LEFT JOIN tamayame_dictionary.allomorphs a ON a.allomorph_id = epa.allomorph_id
+              {where}
+        """, params * 3)
+        return cur.fetchall()
+
+    def _add_rows(self, rows):
+        touched = set()
+        for example_id, slot, aid, ta_id, mid, davis_id in rows:
+            self.universe.add(example_id)
+            touched.add(example_id)
+            terms = self.by_example.setdefault(example_id, set())
+            if slot:
+                terms.add(("slot", str(slot).strip().upper()))
+            if aid:
+                terms.add(("a", aid))
+            if ta_id:
+                terms.add(("ta", ta_id))
+            if mid:
+                terms.add(("m", mid))
+            if davis_id and davis_id.strip():
+                terms.add(("d", davis_id.strip().upper()))
+        for example_id in touched:
+            for t in self.by_example[example_id]:
+                self._posting(t).add(example_id)
+
+    def _remove_example(self, example_id):
+        for t in self.by_example.pop(example_id, ()):
+            b = self._posting(t, create=False)
+            if b is not None:
+                b.discard(example_id)
+                if not b.chunks:
+                    del self.postings[t]
+        self.universe.discard(example_id)
+
+    def load(self):
+        # seq first: anything logged while we read gets replayed next poll
+        self.seq = fetch_example_change_seq() or 0
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            self._add_rows(self._fetch_rows(cur))
+        finally:
+            cur.close(); conn.close()
+        return self
+
+    def apply_changes(self):
+        """
+        Replay the change feed since self.seq onto a copy. Returns the index
+        to publish (self when nothing changed), or None if there is no feed.
+        self is never modified, so it stays safe for concurrent readers.
+        """
+        conn = get_connection()
+        cur = conn.cursor()
+        try:
+            seq, changed = fetch_example_changes(self.seq, cur)
+            if seq is None:
+                return None
+            if not changed:
+                self.seq = seq
+                return self
+            index = self._fork()
+            for example_id in changed:
+                index._remove_example(example_id)
+            index._add_rows(index._fetch_rows(cur, changed))
+            index.seq = seq
+            index._owned = None
+            return index
+        finally:
+            cur.close(); conn.close()
+
+    # ── querying ──
+    def term(self, raw):
+        key = raw.strip()
+        up = key.upper()
+        if up in VOICE_ALIASES:
+            out = Bitmap()
+            for d in VOICE_ALIASES[up]:
+                out = out | self.postings.get(("d", d), Bitmap())
+            return out
+        if ":" in key:
+            kind, _, val = key.partition(":")
+            kind = kind.lower()
+            if kind == "slot":
+                return self.postings.get(("slot", val.upper()), Bitmap())
+            if kind in ("a", "ta", "m"):
+                try:
+                    return self.postings.get((kind, int(val)), Bitmap())
+                except ValueError:
+                    raise ValueError(f"usage query: {key!r} needs a numeric id")
+            raise ValueError(f"usage query: unknown term kind {kind!r}")
+        if up.endswith("*"):
+            prefix = up[:-1]
+            out = Bitmap()
+            for (kind, val), b in self.postings.items():
+                if kind == "d" and val.startswith(prefix):
+                    out = out | b
+            return out
+        if ("d", up) in self.postings:
+            return self.postings[("d", up)]
+        return self.postings.get(("slot", up), Bitmap())
+
+    def evaluate(self, tree):
+        op = tree[0]
+        if op == "term":
+            return self.term(tree[1])
+        if op == "and":
+            left, right = tree[1], tree[2]
+            # a AND NOT b → difference, without materialising NOT b
+            if right[0] == "not":
+                return self.evaluate(left) - self.evaluate(right[1])
+            if left[0] == "not":
+                return self.evaluate(right) - self.evaluate(left[1])
+            return self.evaluate(left) & self.evaluate(right)
+        if op == "or":
+            return self.evaluate(tree[1]) | self.evaluate(tree[2])
+        if op == "not":
+            return self.universe - self.evaluate(tree[1])
+        raise ValueError(f"usage query: bad node {op!r}")
+
+    def query(self, q, after=None, limit=50):
+        hits = self.evaluate(parse_usage_query(q))
+        ids = hits.page(after=after, limit=limit + 1)
+        next_after = ids[limit - 1] if len(ids) > limit else None
+        return {"count": len(hits), "ids": ids[:limit], "next_after": next_after}
+
+
+# ───────────────────── cached instance ───────────────────── #
+_INDEX = None
+_CHECKED = 0.0
+_BUILT = 0.0
+_CHECK_INTERVAL = 2.0
+_FALLBACK_TTL = 300
+_LOCK = threading.Lock()
+
+
+def get_usage_index(refresh=False):
+    """
+    Process-wide UsageIndex. Every couple of seconds it replays the example
+    change feed; without the feed it is rebuilt every few minutes. Updates
+    are built on a copy and published by swapping _INDEX, so callers can
+    query the instance they got without taking the lock.
+    """
+    global _INDEX, _CHECKED, _BUILT
+    now = time.time()
+    index = _INDEX
+    if not refresh and index is not None and now - _CHECKED < _CHECK_INTERVAL:
+        return index
+    with _LOCK:
+        _CHECKED = now
+        if refresh or _INDEX is None:
+            _INDEX = UsageIndex().load()
+            _BUILT = now
+        else:
+            updated = _INDEX.apply_changes()
+            if updated is not None:
+                _INDEX = updated
+            elif now - _BUILT > _FALLBACK_TTL:
+                _INDEX = UsageIndex().load()
+                _BUILT = now
+        return _INDEX
+
+
+def query_usage(q, after=None, limit=50):
+    return get_usage_index().query(q, after=after, limit=limit)
@@ -0,0 +1,52 @@
+# db/search_keys.py
+from .core import get_connection
+
+__all__ = ["SEARCH_KEY_COLUMNS", "ensure_search_keys"]
+
+# table → (source column, stored key column)
+SEARCH_KEY_COLUMNS = {
+    "entries":    ("headword",      "headword_key"),
+    "morphemes":  ("segment",       "segment_key"),
+    "allomorphs": ("form",          "form_key"),
+    "examples":   ("tamayame_text", "text_key"),
+}
+
+# SQL twin of db.core.fold_search_key (PostgreSQL 13+ for normalize()).
+# Declared IMMUTABLE so it can drive generated columns.
+_FOLD_FUNCTION = r"""
+    CREATE OR REPLACE FUNCTION tamayame_dictionary.fold_search_key(s text)
+    RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$
+        SELECT btrim(regexp_replace(
+                 lower(normalize(
+                   regexp_replace(
+                     translate(normalize(coalesce(s, ''), NFD), '''’‘`ʻ', 'ʼʼʼʼʼ'),
+                     '[\u0300-\u036f]', '', 'g'),
+                   NFC)),
+                 '\s+', ' ', 'g'))
+    $$
+"""
+
+
+def ensure_search_keys():
+    """
+    Create fold_search_key() and a generated, btree-indexed *_key column on
+    each table in SEARCH_KEY_COLUMNS. text_pattern_ops serves both equality
+    and LIKE 'prefix%'. Safe to re-run.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(_FOLD_FUNCTION)
+    for table, (source, key) in SEARCH_KEY_COLUMNS.items():
+        cur.execute(f"""
+            ALTER TABLE tamayame_dictionary.{table}
+              ADD COLUMN IF NOT EXISTS {key} text
+                  GENERATED ALWAYS AS (tamayame_dictionary.fold_search_key({source})) STORED
+        """)
+        cur.execute(f"""
+            CREATE INDEX IF NOT EXISTS {table}_{key}_idx
+                ON tamayame_dictionary.{table} ({key} text_pattern_ops)
+        """)
+    conn.commit()
+    cur.close(); conn.close()
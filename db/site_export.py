@@ -0,0 +1,310 @@
+# db/site_export.py
+from psycopg2.extras import RealDictCursor
+from .core import get_connection, normalize_morpheme, fold_search_key
+from .intransitive import intransitive_class_letter, fetch_all_entry_intransitive_classes
+from .entries_dal import _enrich_entry_example
+from .examples_dal import _assemble_example_full
+
+__all__ = [
+    "fetch_site_data",
+    "entry_page_data",
+    "example_page_data",
+]
+
+# Everything entry_detail / example_detail read, one query per table for the
+# whole dictionary, grouped in Python by the listed key. Each query mirrors
+# its per-page counterpart in entries_dal / examples_dal / app.py; keep them
+# in step when those change.
+_GROUPED = {
+    # name: (group key, sql)
+    "class_prmp": ("class_id", """
+        SELECT DISTINCT ppp.class_id, a.form, a.ur_gloss, a.davis_id, a.partial_paradigm
+        FROM tamayame_dictionary.allomorphs a
+        JOIN tamayame_dictionary.primary_paradigm_class_paradigms ppp
+          ON a.partial_paradigm = ppp.partial_paradigm
+        WHERE a.category     = 'PRMP'
+          AND a.transitivity = 'transitive'
+        ORDER BY ppp.class_id, a.partial_paradigm, a.davis_id
+    """),
+    "entry_morphemes": ("entry_id", """
+        SELECT entry_id, segment, gloss, position, ordering
+        FROM tamayame_dictionary.morphemes
+        WHERE entry_id IS NOT NULL
+        ORDER BY entry_id, ordering
+    """),
+    "entry_examples": ("entry_id", """
+        SELECT ee.entry_id,
+               e.example_id, e.tamayame_text, e.gloss_text, e.translation_en,
+               e.speaker_id, e.audio_file, e.notes, e.created_at, e.updated_at,
+               e.voice_class_id, e.comment
+        FROM tamayame_dictionary.example_entries ee
+        JOIN tamayame_dictionary.examples e
+          ON ee.example_id = e.example_id
+        ORDER BY ee.entry_id, e.example_id
+    """),
+    "ex_morphemes": ("example_id", """
+        SELECT em.example_id, m.segment, m.gloss, m.position, em.ordering
+        FROM tamayame_dictionary.example_morphemes em
+        JOIN tamayame_dictionary.morphemes m
+          ON em.morpheme_id = m.morpheme_id
+    """),
+    "ex_prmp": ("example_id", """
+        SELECT epa.example_id, a.form, a.ur_gloss, a.davis_id, 'prefix' AS position, epa.ordering
+        FROM tamayame_dictionary.example_prmp_allomorphs epa
+        JOIN tamayame_dictionary.allomorphs a
+          ON epa.allomorph_id = a.allomorph_id
+        ORDER BY epa.example_id, epa.ordering, a.form
+    """),
+    "ex_ta": ("example_id", """
+        SELECT em.example_id,
+               ta.form AS segment,
+               ta.number AS gloss,
+               'TA'      AS position,
+               em.ordering AS ordering,
+               ta.voice_class,
+               a.davis_id
+        FROM tamayame_dictionary.example_morphemes em
+        JOIN tamayame_dictionary.ta_allomorphs ta
+          ON em.ta_allomorph_id = ta.ta_id
+        LEFT JOIN tamayame_dictionary.allomorphs a
+          ON a.category = 'TA' AND a.form = ta.form
+        WHERE em.ta_allomorph_id IS NOT NULL
+        ORDER BY em.example_id, em.ordering
+    """),
+    "ex_ta_legacy": ("example_id", """
+        SELECT eta.example_id, ta.ta_id, ta.form, ta.number, ta.voice_class, eta.ordering
+          FROM tamayame_dictionary.example_ta_allomorphs eta
+          JOIN tamayame_dictionary.ta_allomorphs ta
+            ON ta.ta_id = eta.ta_id
+         ORDER BY eta.example_id, eta.ordering
+    """),
+    "ex_slots": ("example_id", """
+        SELECT em.example_id,
+               em.slot,
+               em.ordering,
+               m.segment        AS m_segment,
+               m.gloss          AS m_gloss,
+               a.form           AS a_form,
+               a.ur_gloss       AS a_gloss,
+               a.davis_id       AS a_davis,
+               ta.form          AS ta_form,
+               ta.number        AS ta_number,
+               ta.voice_class   AS ta_voice
+          FROM tamayame_dictionary.example_morphemes em
+     LEFT JOIN tamayame_dictionary.morphemes      m  ON em.morpheme_id     = m.morpheme_id
+     LEFT JOIN tamayame_dictionary.allomorphs     a  ON em.allomorph_id    = a.allomorph_id
+     LEFT JOIN tamayame_dictionary.ta_allomorphs  ta ON em.ta_allomorph_id = ta.ta_id
+         ORDER BY em.example_id, em.ordering
+    """),
+    "entry_allomorphs": ("entry_id", """
+        SELECT entry_id, form, category, davis_id
+        FROM tamayame_dictionary.allomorphs
+        WHERE entry_id IS NOT NULL
+        ORDER BY entry_id, category, form
+    """),
+    "subclass_allomorphs": ("subclass_id", """
+        SELECT s.subclass_id, a.allomorph_id, a.form, a.ur_gloss, a.davis_id
+        FROM tamayame_dictionary.subclass_allomorphs s
+        JOIN tamayame_dictionary.allomorphs a
+          ON a.allomorph_id = s.allomorph_id
+        ORDER BY s.subclass_id, COALESCE(a.davis_id,'ZZZ'), a.form
+    """),
+    "ta_forms": ("entry_id", """
+        SELECT DISTINCT ee.entry_id, ta.form
+        FROM tamayame_dictionary.example_entries ee
+        JOIN tamayame_dictionary.example_morphemes em ON em.example_id = ee.example_id
+        JOIN tamayame_dictionary.ta_allomorphs ta      ON ta.ta_id = em.ta_allomorph_id
+        WHERE em.ta_allomorph_id IS NOT NULL
+        ORDER BY ee.entry_id, ta.form
+    """),
+    "template_entries": ("template_id", """
+        SELECT et.template_id, e.entry_id, e.headword, e.transitivity
+        FROM tamayame_dictionary.entry_templates et
+        JOIN tamayame_dictionary.entries e ON e.entry_id = et.entry_id
+        ORDER BY et.template_id, e.headword
+    """),
+    "entry_media": ("entry_id", """
+        SELECT entry_id, media_id, type, filename, original_filename, notes,
+               duration_seconds, thumbnail_path, processing_status
+        FROM tamayame_dictionary.media
+        WHERE entry_id IS NOT NULL
+        ORDER BY entry_id
+    """),
+    "example_media": ("example_id", """
+        SELECT example_id, media_id, type, filename, original_filename, notes,
+               duration_seconds, thumbnail_path, processing_status
+          FROM tamayame_dictionary.media
+         WHERE example_id IS NOT NULL
+         ORDER BY example_id, filename
+    """),
+    "example_entries": ("example_id", """
+        SELECT ee.example_id, ee.entry_id, en.headword
+          FROM tamayame_dictionary.example_entries ee
+          JOIN tamayame_dictionary.entries en
+            ON en.entry_id = ee.entry_id
+         ORDER BY ee.example_id, ee.entry_id
+    """),
+}
+
+# One row per key; the flag says whether the row keeps its key column
+_KEYED = {
+    "entries": ("entry_id", True, """
+        SELECT
+            e.*,
+            ppc.name AS primary_paradigm_class,
+            sc.name  AS suffix_subclass
+        FROM tamayame_dictionary.entries e
+        LEFT JOIN tamayame_dictionary.primary_paradigm_classes ppc
+          ON e.primary_paradigm_class_id = ppc.id
+        LEFT JOIN tamayame_dictionary.suffix_subclasses sc
+          ON e.suffix_subclass_id = sc.id
+        ORDER BY e.entry_id
+    """),
+    "examples": ("example_id", True, """
+        SELECT e.example_id, e.entry_id, e.tamayame_text, e.gloss_text,
+               e.translation_en, e.comment
+          FROM tamayame_dictionary.examples e
+         ORDER BY e.example_id
+    """),
+    "ex_realization": ("example_id", False, """
+        SELECT DISTINCT ON (example_id) example_id, ur, sr, ipa
+        FROM tamayame_dictionary.example_realizations
+        ORDER BY example_id
+    """),
+    "ex_template": ("example_id", False, """
+        SELECT DISTINCT ON (et.example_id) et.example_id, t.template_id, t.name
+          FROM tamayame_dictionary.example_templates et
+          JOIN tamayame_dictionary.templates t
+            ON et.template_id = t.template_id
+         ORDER BY et.example_id
+    """),
+    "templates": ("template_id", True, """
+        SELECT * FROM tamayame_dictionary.templates
+    """),
+}
+
+
+def fetch_site_data():
+    """
+    Bulk-load everything the entry and example pages need: about twenty
+    queries in total, whatever the dictionary size. Rows are grouped by
+    id and not assembled, so the per-page work can be done in parallel by
+    entry_page_data() / example_page_data().
+    """
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    data = {}
+    try:
+        for name, (key, sql) in _GROUPED.items():
+            cur.execute(sql)
+            groups = data[name] = {}
+            for r in cur:
+                r = dict(r)
+                groups.setdefault(r.pop(key), []).append(r)
+        for name, (key, keep, sql) in _KEYED.items():
+            cur.execute(sql)
+            keyed = data[name] = {}
+            for r in cur:
+                r = dict(r)
+                keyed[r[key] if keep else r.pop(key)] = r
+    finally:
+        cur.close(); conn.close()
+    data["intransitive"] = fetch_all_entry_intransitive_classes()
+
+    # Related-entry lookup: folded segment → entries using it / with that headword
+    by_key = {}
+    entries = data["entries"]
+    for entry_id, ms in data["entry_morphemes"].items():
+        for m in ms:
+            if m.get("segment") and entry_id in entries:
+                by_key.setdefault(fold_search_key(m["segment"]), set()).add(entry_id)
+    for entry_id, e in entries.items():
+        if e.get("headword_key"):
+            by_key.setdefault(e["headword_key"], set()).add(entry_id)
+    data["related_by_key"] = by_key
+    return data
+
+
+def _related(data, entry_id, headword, limit=50):
+    """fetch_related_entries_by_segment() against the bulk-loaded tables."""
+    ids = data["related_by_key"].get(fold_search_key(normalize_morpheme(headword)), ())
+    entries = data["entries"]
+    rows = [
+        {k: entries[i].get(k) for k in ("entry_id", "headword", "affix_position", "pos", "translation_en")}
+        for i in ids if i != entry_id
+    ]
+    rows.sort(key=lambda r: (r["headword"] is None, r["headword"] or ""))
+    return rows[:limit]
+
+
+def entry_page_data(data, entry_id):
+    """
+    Same shape as fetch_entry() plus what the entry_detail route adds:
+    (entry, morphemes, examples, allomorphs, template, extras) where extras
+    holds related, ta_forms, template_entries, media and subclass_allomorphs.
+    None if there is no such entry.
+    """
+    row = data["entries"].get(entry_id)
+    if row is None:
+        return None
+    entry = dict(row)
+    transitive = entry.get("transitivity") == "transitive"
+
+    if entry.get("transitivity") == "intransitive":
+        entry["intransitive_class_letter"] = intransitive_class_letter(entry.get("intransitive_class_id"))
+    else:
+        entry["intransitive_class_letter"] = None
+    entry["primary_paradigm_allomorphs"] = (
+        data["class_prmp"].get(entry["primary_paradigm_class_id"], [])
+        if entry.get("primary_paradigm_class_id") and transitive else []
+    )
+    entry["intransitive_classes"] = data["intransitive"].get(entry_id, {})
+
+    examples = [
+        _enrich_entry_example(
+            ex,
+            data["ex_morphemes"].get(ex["example_id"], []),
+            data["ex_prmp"].get(ex["example_id"], []),
+            data["ex_ta"].get(ex["example_id"], []),
+            data["ex_realization"].get(ex["example_id"]),
+            data["ex_template"].get(ex["example_id"]),
+        )
+        for ex in data["entry_examples"].get(entry_id, [])
+    ]
+
+    template = None
+    if transitive and entry.get("template_id"):
+        template = data["templates"].get(int(entry["template_id"]))
+
+    template_entries = []
+    if template and template.get("template_id"):
+        template_entries = [e for e in data["template_entries"].get(template["template_id"], [])[:200]
+                            if e["entry_id"] != entry_id]
+
+    subclass_id = entry.get("suffix_subclass_id")
+    extras = {
+        "related": _related(data, entry_id, entry["headword"]) if entry.get("headword") else [],
+        "ta_forms": [r["form"] for r in data["ta_forms"].get(entry_id, [])],
+        "template_entries": template_entries,
+        "media": data["entry_media"].get(entry_id, []),
+        "subclass_allomorphs": (data["subclass_allomorphs"].get(subclass_id, [])
+                                if transitive and subclass_id else []),
+    }
+    return (entry, data["entry_morphemes"].get(entry_id, []), examples,
+            data["entry_allomorphs"].get(entry_id, []), template, extras)
+
+
+def example_page_data(data, example_id):
+    """(fetch_example_full() dict, linked entries, media) or None."""
+    row = data["examples"].get(example_id)
+    if row is None:
+        return None
+    example = dict(row)
+    example["template"] = data["ex_template"].get(example_id)
+    ex = _assemble_example_full(
+        example,
+        data["ex_prmp"].get(example_id, []),
+        data["ex_ta_legacy"].get(example_id, []),
+        data["ex_slots"].get(example_id, []),
+    )
+    return ex, data["example_entries"].get(example_id, []), data["example_media"].get(example_id, [])
@@ -0,0 +1,232 @@
+# db/slotsig.py
+import re
+from psycopg2.extras import RealDictCursor
+from .core import get_connection
+
+__all__ = [
+    "ensure_slot_signatures",
+    "rebuild_slot_signatures",
+    "compile_slot_query",
+    "search_slot_signatures",
+]
+
+# One token per example_morphemes row, in `ordering`, wrapped in pipes:
+#   |100:101A#57|TA:sg#3|ROOT#812|400:401#90|
+# slot, then :davis_id (affixes) or :number (TA), then #id of the
+# allomorph / TA allomorph / morpheme.
+_SIGNATURE_SQL = """
+    SELECT em.example_id,
+           '|' || string_agg(
+               em.slot
+               || CASE
+                    WHEN em.slot = 'TA' THEN coalesce(':' || CASE
+                        WHEN lower(ta.number) LIKE 'sg%' OR lower(ta.number) LIKE 'sing%' THEN 'sg'
+                        WHEN lower(ta.number) LIKE 'dl%' OR lower(ta.number) LIKE 'du%'   THEN 'dl'
+                        WHEN lower(ta.number) LIKE 'pl%'                                   THEN 'pl'
+                        ELSE nullif(lower(btrim(ta.number)), '') END, '')
+                    WHEN em.slot = 'ROOT' THEN ''
+                    ELSE coalesce(':' || nullif(btrim(a.davis_id), ''), '')
+                  END
+               || '#' || coalesce(em.allomorph_id, em.ta_allomorph_id, em.morpheme_id, 0)::text,
+               '|' ORDER BY em.ordering) || '|' AS signature,
+           COUNT(*)::int AS n_morphemes
+      FROM tamayame_dictionary.example_morphemes em
+      LEFT JOIN tamayame_dictionary.allomorphs    a  ON a.allomorph_id = em.allomorph_id
+      LEFT JOIN tamayame_dictionary.ta_allomorphs ta ON ta.ta_id       = em.ta_allomorph_id
+"""
+
+
+# ───────────────────────── schema ───────────────────────── #
+def ensure_slot_signatures():
+    """
+    Create example_slot_signatures (trigram GIN on signature) plus a row
+    trigger on example_morphemes that recomputes the affected example's
+    signature, then backfill. Needs pg_trgm. Safe to re-run.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS tamayame_dictionary.example_slot_signatures (
+            example_id   integer PRIMARY KEY
+                REFERENCES tamayame_dictionary.examples(example_id) ON DELETE CASCADE,
+            signature    text    NOT NULL,
+            n_morphemes  integer NOT NULL
+        )
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS example_slot_signatures_trgm_idx
+            ON tamayame_dictionary.example_slot_signatures USING GIN (signature gin_trgm_ops)
+    """)
+    cur.execute(f"""
+        CREATE OR REPLACE FUNCTION tamayame_dictionary.refresh_example_slot_signature(p_example_id integer)
+        RETURNS void
+        LANGUAGE sql
+        AS $$
+            DELETE FROM tamayame_dictionary.example_slot_signatures WHERE example_id = p_example_id;
+            INSERT INTO tamayame_dictionary.example_slot_signatures (example_id, signature, n_morphemes)
+            {_SIGNATURE_SQL}
+             WHERE em.example_id = p_example_id
+             GROUP BY em.example_id;
+        $$
+    """)
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION tamayame_dictionary.example_slot_signatures_sync()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM tamayame_dictionary.refresh_example_slot_signature(OLD.example_id);
+            END IF;
+            IF TG_OP IN ('UPDATE', 'INSERT')
+               AND (TG_OP = 'INSERT' OR NEW.example_id IS DISTINCT FROM OLD.example_id) THEN
+                PERFORM tamayame_dictionary.refresh_example_slot_signature(NEW.example_id);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    cur.execute("""
+        DROP TRIGGER IF EXISTS example_morphemes_slot_signature
+          ON tamayame_dictionary.example_morphemes
+    """)
+    cur.execute("""
+        CREATE TRIGGER example_morphemes_slot_signature
+        AFTER INSERT OR UPDATE OR DELETE
+          ON tamayame_dictionary.example_morphemes
+        FOR EACH ROW
+        EXECUTE FUNCTION tamayame_dictionary.example_slot_signatures_sync()
+    """)
+    conn.commit()
+    cur.close(); conn.close()
+    return rebuild_slot_signatures()
+
+
+def rebuild_slot_signatures():
+    """Recompute every signature set-based. Returns the number of examples."""
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("TRUNCATE tamayame_dictionary.example_slot_signatures")
+    cur.execute(f"""
+        INSERT INTO tamayame_dictionary.example_slot_signatures (example_id, signature, n_morphemes)
+        {_SIGNATURE_SQL}
+         GROUP BY em.example_id
+    """)
+    n = cur.rowcount
+    cur.execute("ANALYZE tamayame_dictionary.example_slot_signatures")
+    conn.commit()
+    cur.close(); conn.close()
+    return n
+
+
+# ───────────────────────── query language ───────────────────────── #
+_TOKEN_RE = re.compile(r"""
+    ^(?P<slot>[A-Za-z0-9]+?)?           # slot: TA, ROOT, B, 100, 4xx, 4*
+     (?P<slot_wild>x+|\*)?
+     (?::(?P<value>[^#*]+)(?P<value_wild>\*)?)?   # :davis_id / :number, optional prefix *
+     (?:\#(?P<id>\d+))?$                # #allomorph/ta/morpheme id
+""", re.X)
+
+_ANY_ONE = r"\|[^|]+"
+
+
+def _token_regex(tok):
+    if tok == "?":
+        return _ANY_ONE
+    m = _TOKEN_RE.match(tok)
+    if not m or not any(m.group(g) for g in ("slot", "value", "id")):
+        raise ValueError(f"slot query: can't read {tok!r}")
+
+    slot = m.group("slot") or ""
+    if m.group("slot_wild"):
+        # 4xx / 4* → any slot in that series; x's are fixed-width
+        wild = m.group("slot_wild")
+        slot_re = re.escape(slot) + ("[^|:#]*" if wild == "*" else "[0-9A-Za-z]" * len(wild))
+    elif slot:
+        slot_re = re.escape(slot)
+    else:
+        slot_re = "[^|:#]+"
+
+    if m.group("value") is not None:
+        val_re = ":" + re.escape(m.group("value")) + ("[^|#]*" if m.group("value_wild") else "")
+    else:
+        val_re = "(:[^|#]*)?"
+
+    id_re = "#" + m.group("id") if m.group("id") else "#[0-9]+"
+    return r"\|" + slot_re + val_re + id_re
+
+
+def compile_slot_query(q):
+    """
+    Compile a slot query into a POSIX regex over the stored signature.
+
+    Tokens are separated by spaces, commas or '-', and match consecutive
+    morphemes:
+      TA, ROOT, B, 100    a slot
+      4xx, 4*             any slot in a series
+      100:101A            slot with a Davis id; 100:1* is a Davis-id prefix
+      TA:sg               TA by number
+      #57, 100#57         a specific allomorph / TA / morpheme id
+      ?                   exactly one morpheme of any kind
+      *                   any run of morphemes (including none)
+    The pattern may match anywhere. A leading ^ or trailing $ anchors it to
+    the start or end of the stem. So "^100 300 TA ROOT 500$" is a full
+    template shape, and "TA * ROOT * 4xx" means TA, later ROOT, later a 4xx.
+    """
+    q = (q or "").strip()
+    anchored_start = q.startswith("^")
+    anchored_end = q.endswith("$")
+    q = q.strip("^$ ")
+    tokens = [t for t in re.split(r"[\s,]+|(?<=\S)-(?=\S)", q) if t]
+    if not tokens:
+        raise ValueError("slot query is empty")
+
+    parts = []
+    for tok in tokens:
+        if tok == "*":
+            parts.append(f"({_ANY_ONE})*")
+        else:
+            parts.append(_token_regex(tok))
+    regex = "".join(parts)
+    regex = ("^" if anchored_start else "") + regex + (r"\|$" if anchored_end else r"\|")
+    return regex
+
+
+def search_slot_signatures(q, after_id=None, limit=50, with_count=False):
+    """
+    Examples whose slot signature matches the query (see compile_slot_query).
+    The regex runs against a trigram GIN index. Pages by example_id keyset.
+    Returns: {regex, rows, next_after, total}. `total` is None unless with_count.
+    """
+    regex = compile_slot_query(q)
+    limit = int(limit)
+
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    total = None
+    if with_count:
+        cur.execute("""
+            SELECT COUNT(*) AS c
+              FROM tamayame_dictionary.example_slot_signatures
+             WHERE signature ~* %s
+        """, (regex,))
+        total = int(cur.fetchone()["c"])
+
+    cur.execute("""
+        SELECT s.example_id, s.signature, x.tamayame_text, x.translation_en
+          FROM tamayame_dictionary.example_slot_signatures s
+          JOIN tamayame_dictionary.examples x ON x.example_id = s.example_id
+         WHERE s.signature ~* %s
+           AND s.example_id > %s
+         ORDER BY s.example_id
+         LIMIT %s
+    """, (regex, int(after_id or 0), limit + 1))
+    rows = [dict(r) for r in cur.fetchall()]
+    cur.close(); conn.close()
+
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = rows[-1]["example_id"]
+    return {"regex": regex, "rows": rows, "next_after": next_after, "total": total}
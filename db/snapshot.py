@@ -0,0 +1,444 @@
+# db/snapshot.py
+import json
+import re
+import time
+from .core import get_connection
+
+__all__ = [
+    "SNAPSHOT_VERSION",
+    "SNAPSHOT_SCHEMA",
+    "write_snapshot",
+    "restore_snapshot",
+]
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SCHEMA = "tamayame_dictionary"
+
+# A snapshot is JSONL. The first line is a header holding the schema's
+# catalog: extensions, types, functions, sequences, tables (columns,
+# constraints, indexes, triggers, row counts) and views. Every later line is
+# one row, {"t": table, "r": [values]}. Values are each column's Postgres
+# text form (null as None), so COPY parses them back exactly, whatever the
+# type. Tables appear in foreign-key dependency order.
+
+
+# ───────────────────────── COPY text format ───────────────────────── #
+_UNESCAPE = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}
+_ESCAPED = re.compile(r"\\(.)")
+
+
+def _copy_fields(line):
+    """One COPY text-format line → list of str/None."""
+    return [None if f == r"\N" else _ESCAPED.sub(lambda m: _UNESCAPE.get(m.group(1), m.group(1)), f)
+            if "\\" in f else f
+            for f in line.split("\t")]
+
+
+def _copy_line(values):
+    return "\t".join(
+        r"\N" if v is None else
+        v.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+        for v in values
+    ) + "\n"
+
+
+class _CopySink:
+    """COPY TO STDOUT target: turns each output line into a snapshot row line."""
+
+    def __init__(self, out, table):
+        self.out, self.table, self.rows = out, table, 0
+        self._tail = b""
+        self._prefix = json.dumps({"t": table})[:-1] + ', "r": '
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        lines = (self._tail + data).split(b"\n")
+        self._tail = lines.pop()
+        for line in lines:
+            self.out.write(self._prefix + json.dumps(_copy_fields(line.decode("utf-8")),
+                                                     ensure_ascii=False) + "}\n")
+        self.rows += len(lines)
+
+
+class _CopyFeed:
+    """COPY FROM STDIN source: pulls this table's row lines off the shared snapshot iterator."""
+
+    def __init__(self, rows, table):
+        self._rows, self.table = rows, table
+        self._buf = b""
+        self.count = 0
+
+    def _next_line(self):
+        row = self._rows.peek()
+        if row is None or row["t"] != self.table:
+            return None
+        next(self._rows)
+        self.count += 1
+        return _copy_line(row["r"]).encode("utf-8")
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buf) < size:
+            line = self._next_line()
+            if line is None:
+                break
+            self._buf += line
+        if size < 0:
+            size = len(self._buf)
+        out, self._buf = self._buf[:size], self._buf[size:]
+        return out
+
+    readline = read
+
+
+class _Peekable:
+    def __init__(self, it):
+        self._it, self._head = it, None
+
+    def peek(self):
+        if self._head is None:
+            self._head = next(self._it, None)
+        return self._head
+
+    def __next__(self):
+        head = self.peek()
+        self._head = None
+        if head is None:
+            raise StopIteration
+        return head
+
+    def __iter__(self):
+        return self
+
+
+# ───────────────────────── catalog ───────────────────────── #
+def _rows(cur, sql, params=()):
+    cur.execute(sql, params)
+    return cur.fetchall()
+
+
+def _read_catalog(cur, schema):
+    cat = {"schema": schema}
+    cat["extensions"] = [
+        {"name": n, "schema": s} for n, s in _rows(cur, """
+            SELECT e.extname, n.nspname FROM pg_extension e
+              JOIN pg_namespace n ON n.oid = e.extnamespace
+             WHERE e.extname <> 'plpgsql' ORDER BY e.oid
+        """)
+    ]
+    cat["enums"] = [
+        {"name": n, "labels": labels} for n, labels in _rows(cur, """
+            SELECT t.typname, array_agg(e.enumlabel ORDER BY e.enumsortorder)
+              FROM pg_type t
+              JOIN pg_enum e ON e.enumtypid = t.oid
+              JOIN pg_namespace n ON n.oid = t.typnamespace
+             WHERE n.nspname = %s
+             GROUP BY t.oid, t.typname ORDER BY t.oid
+        """, (schema,))
+    ]
+    cat["domains"] = [
+        {"name": n, "type": base, "not_null": nn, "default": dflt, "checks": checks or []}
+        for n, base, nn, dflt, checks in _rows(cur, """
+            SELECT t.typname, format_type(t.typbasetype, t.typtypmod), t.typnotnull, t.typdefault,
+                   (SELECT array_agg(pg_get_constraintdef(c.oid)) FROM pg_constraint c
+                     WHERE c.contypid = t.oid AND c.contype = 'c')
+              FROM pg_type t JOIN pg_namespace n ON n.oid = t.typnamespace
+             WHERE n.nspname = %s AND t.typtype = 'd'
+             ORDER BY t.oid
+        """, (schema,))
+    ]
+    cat["functions"] = [r[0] for r in _rows(cur, """
+        SELECT pg_get_functiondef(p.oid)
+          FROM pg_proc p JOIN pg_namespace n ON n.oid = p.pronamespace
+         WHERE n.nspname = %s AND p.prokind IN ('f', 'p')
+           AND NOT EXISTS (SELECT 1 FROM pg_depend d WHERE d.objid = p.oid AND d.deptype = 'e')
+         ORDER BY p.oid
+    """, (schema,))]
+
+    seqs = []
+    for name, typ, start, inc, lo, hi, cache, cycle, owner in _rows(cur, """
+        SELECT c.relname, s.seqtypid::regtype::text, s.seqstart, s.seqincrement,
+               s.seqmin, s.seqmax, s.seqcache, s.seqcycle,
+               (SELECT quote_ident(t.relname) || '.' || quote_ident(a.attname)
+                  FROM pg_depend d
+                  JOIN pg_class t ON t.oid = d.refobjid
+                  JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+                 WHERE d.objid = c.oid AND d.classid = 'pg_class'::regclass AND d.deptype = 'a')
+          FROM pg_sequence s
+          JOIN pg_class c ON c.oid = s.seqrelid
+          JOIN pg_namespace n ON n.oid = c.relnamespace
+         WHERE n.nspname = %s
+           AND NOT EXISTS (SELECT 1 FROM pg_depend d WHERE d.objid = c.oid AND d.deptype = 'i')
+         ORDER BY c.relname
+    """, (schema,)):
+        last, called = _rows(cur, f'SELECT last_value, is_called FROM "{schema}"."{name}"')[0]
+        seqs.append({"name": name, "type": typ, "start": start, "increment": inc, "min": lo,
+                     "max": hi, "cache": cache, "cycle": cycle, "owned_by": owner,
+                     "last_value": last, "is_called": called})
+    cat["sequences"] = seqs
+
+    tables = []
+    for oid, name in _rows(cur, """
+        SELECT c.oid, c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+         WHERE n.nspname = %s AND c.relkind IN ('r', 'p') AND NOT c.relispartition
+         ORDER BY c.relname
+    """, (schema,)):
+        columns = [
+            {"name": n, "type": t, "not_null": nn, "default": d, "identity": ident, "generated": gen}
+            for n, t, nn, d, ident, gen in _rows(cur, """
+                SELECT a.attname, format_type(a.atttypid, a.atttypmod), a.attnotnull,
+                       pg_get_expr(ad.adbin, ad.adrelid), a.attidentity, a.attgenerated
+                  FROM pg_attribute a
+             LEFT JOIN pg_attrdef ad ON ad.adrelid = a.attrelid AND ad.adnum = a.attnum
+                 WHERE a.attrelid = %s AND a.attnum > 0 AND NOT a.attisdropped
+                 ORDER BY a.attnum
+            """, (oid,))
+        ]
+        constraints, fks = [], []
+        for cname, ctype, cdef, ref in _rows(cur, """
+            SELECT conname, contype, pg_get_constraintdef(oid), confrelid::regclass::text
+              FROM pg_constraint
+             WHERE conrelid = %s AND contype IN ('p', 'u', 'c', 'x', 'f')
+             ORDER BY contype, conname
+        """, (oid,)):
+            (fks if ctype == "f" else constraints).append(
+                {"name": cname, "def": cdef, "references": ref if ctype == "f" else None})
+        tables.append({
+            "name": name,
+            "columns": columns,
+            "constraints": constraints,
+            "foreign_keys": fks,
+            "indexes": _index_defs(cur, oid),
+            "triggers": [r[0] for r in _rows(cur, """
+                SELECT pg_get_triggerdef(oid) FROM pg_trigger
+                 WHERE tgrelid = %s AND NOT tgisinternal ORDER BY tgname
+            """, (oid,))],
+            "rows": _rows(cur, f'SELECT COUNT(*) FROM "{schema}"."{name}"')[0][0],
+        })
+    cat["tables"] = _dependency_order(tables, schema)
+
+    cat["views"] = [
+        {"name": n, "materialized": kind == "m", "query": q, "indexes": _index_defs(cur, oid)}
+        for oid, n, kind, q in _rows(cur, """
+            SELECT c.oid, c.relname, c.relkind, pg_get_viewdef(c.oid)
+              FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+             WHERE n.nspname = %s AND c.relkind IN ('v', 'm')
+             ORDER BY c.oid
+        """, (schema,))
+    ]
+    return cat
+
+
+def _index_defs(cur, oid):
+    return [r[0] for r in _rows(cur, """
+        SELECT pg_get_indexdef(i.indexrelid)
+          FROM pg_index i
+         WHERE i.indrelid = %s
+           AND NOT EXISTS (SELECT 1 FROM pg_constraint c
+                            WHERE c.conindid = i.indexrelid AND c.contype IN ('p', 'u', 'x'))
+         ORDER BY i.indexrelid
+    """, (oid,))]
+
+
+def _dependency_order(tables, schema):
+    """Referenced tables before the tables whose foreign keys point at them (cycles keep name order)."""
+    by_name = {t["name"]: t for t in tables}
+    deps = {}
+    for t in tables:
+        deps[t["name"]] = {
+            ref for ref in (fk["references"].split(".")[-1].strip('"') for fk in t["foreign_keys"])
+            if ref in by_name and ref != t["name"]
+        }
+    ordered, done, visiting = [], set(), set()
+
+    def visit(name):
+        if name in done or name in visiting:
+            return
+        visiting.add(name)
+        for d in sorted(deps[name]):
+            visit(d)
+        visiting.discard(name)
+        done.add(name)
+        ordered.append(by_name[name])
+
+    for name in sorted(by_name):
+        visit(name)
+    return ordered
+
+
+# ───────────────────────── dump ───────────────────────── #
+def write_snapshot(out, schema=SNAPSHOT_SCHEMA):
+    """
+    Write a snapshot of `schema` to the text stream `out`. Everything is
+    read in one REPEATABLE READ transaction, so the counts in the header
+    match the rows that follow. Returns {table: rows}.
+    """
+    conn = get_connection()
+    conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+    conn.set_client_encoding("UTF8")
+    cur = conn.cursor()
+    try:
+        cat = _read_catalog(cur, schema)
+        out.write(json.dumps({"snapshot": SNAPSHOT_VERSION, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                              **cat}, ensure_ascii=False, default=str) + "\n")
+        counts = {}
+        for t in cat["tables"]:
+            cols = ", ".join(f'"{c["name"]}"' for c in t["columns"] if not c["generated"])
+            sink = _CopySink(out, t["name"])
+            cur.copy_expert(f'COPY "{schema}"."{t["name"]}" ({cols}) TO STDOUT', sink)
+            counts[t["name"]] = sink.rows
+        conn.rollback()
+        return counts
+    finally:
+        cur.close(); conn.close()
+
+
+# ───────────────────────── restore ───────────────────────── #
+def _column_sql(c):
+    parts = [f'"{c["name"]}"', c["type"]]
+    if c["generated"]:
+        parts.append(f'GENERATED ALWAYS AS ({c["default"]}) STORED')
+    elif c["identity"]:
+        parts.append("GENERATED ALWAYS AS IDENTITY" if c["identity"] == "a" else
+                     "GENERATED BY DEFAULT AS IDENTITY")
+    elif c["default"] is not None:
+        parts.append(f'DEFAULT {c["default"]}')
+    if c["not_null"] and not c["identity"]:
+        parts.append("NOT NULL")
+    return " ".join(parts)
+
+
+def _create_structure(cur, cat):
+    s = cat["schema"]
+    cur.execute(f'CREATE SCHEMA "{s}"')
+    for e in cat["extensions"]:
+        cur.execute(f'CREATE EXTENSION IF NOT EXISTS "{e["name"]}" WITH SCHEMA "{e["schema"]}"')
+    for e in cat["enums"]:
+        labels = ", ".join("'" + label.replace("'", "''") + "'" for label in e["labels"])
+        cur.execute(f'CREATE TYPE "{s}"."{e["name"]}" AS ENUM ({labels})')
+    for d in cat["domains"]:
+        sql = f'CREATE DOMAIN "{s}"."{d["name"]}" AS {d["type"]}'
+        if d["default"] is not None:
+            sql += f' DEFAULT {d["default"]}'
+        if d["not_null"]:
+            sql += " NOT NULL"
+        sql += "".join(f" {c}" for c in d["checks"])
+        cur.execute(sql)
+    # bodies can refer to tables that don't exist yet
+    cur.execute("SET LOCAL check_function_bodies = off")
+    for fn in cat["functions"]:
+        cur.execute(fn)
+    for q in cat["sequences"]:
+        cur.execute(f'''
+            CREATE SEQUENCE "{s}"."{q["name"]}" AS {q["type"]}
+              INCREMENT {q["increment"]} MINVALUE {q["min"]} MAXVALUE {q["max"]}
+              START {q["start"]} CACHE {q["cache"]} {"CYCLE" if q["cycle"] else "NO CYCLE"}
+        ''')
+    for t in cat["tables"]:
+        cols = ",\n    ".join(_column_sql(c) for c in t["columns"])
+        cur.execute(f'CREATE TABLE "{s}"."{t["name"]}" (\n    {cols}\n)')
+
+
+def _finish_structure(cur, cat):
+    """Constraints, indexes and triggers go on after the data: one sort per index instead of per row."""
+    s = cat["schema"]
+    for q in cat["sequences"]:
+        if q["owned_by"]:
+            cur.execute(f'ALTER SEQUENCE "{s}"."{q["name"]}" OWNED BY "{s}".{q["owned_by"]}')
+    for t in cat["tables"]:
+        for c in t["constraints"]:
+            cur.execute(f'ALTER TABLE "{s}"."{t["name"]}" ADD CONSTRAINT "{c["name"]}" {c["def"]}')
+        for ix in t["indexes"]:
+            cur.execute(ix)
+    for t in cat["tables"]:
+        for c in t["foreign_keys"]:
+            cur.execute(f'ALTER TABLE "{s}"."{t["name"]}" ADD CONSTRAINT "{c["name"]}" {c["def"]}')
+    for v in cat["views"]:
+        kind = "MATERIALIZED VIEW" if v["materialized"] else "VIEW"
+        cur.execute(f'CREATE {kind} "{s}"."{v["name"]}" AS {v["query"].rstrip().rstrip(";")}')
+        for ix in v["indexes"]:
+            cur.execute(ix)
+    for t in cat["tables"]:
+        for trg in t["triggers"]:
+            cur.execute(trg)
+
+
+def _reset_sequences(cur, cat):
+    s = cat["schema"]
+    for q in cat["sequences"]:
+        if not q["owned_by"]:
+            cur.execute("SELECT setval(%s, %s, %s)", (f'"{s}"."{q["name"]}"', q["last_value"], q["is_called"]))
+    # owned and identity sequences follow the data
+    for t in cat["tables"]:
+        for c in t["columns"]:
+            cur.execute("SELECT pg_get_serial_sequence(%s, %s)", (f'"{s}"."{t["name"]}"', c["name"]))
+            seq = cur.fetchone()[0]
+            if seq:
+                cur.execute(f'''
+                    SELECT setval(%s, COALESCE(MAX("{c["name"]}"), 1), MAX("{c["name"]}") IS NOT NULL)
+                      FROM "{s}"."{t["name"]}"
+                ''', (seq,))
+
+
+def restore_snapshot(lines, drop=False, conn=None):
+    """
+    Restore a snapshot (an iterable of JSONL lines, e.g. an open file) into
+    a fresh schema in one transaction:
+      1. schema, extensions, types, functions, sequences, bare tables
+      2. COPY every table in dependency order
+      3. constraints, indexes, foreign keys, views, triggers
+      4. reset sequences, check row counts against the header, ANALYZE
+    With drop=True an existing schema of the same name is dropped first;
+    otherwise it must not exist. Pass `conn` to restore on a connection you
+    manage (e.g. a test fixture's database); it is committed on success.
+    Returns {table: rows}.
+    """
+    rows = iter(lines)
+    header = json.loads(next(rows))
+    if header.get("snapshot") != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {header.get('snapshot')!r}")
+    s = header["schema"]
+
+    own = conn is None
+    if own:
+        conn = get_connection()
+    conn.set_client_encoding("UTF8")
+    cur = conn.cursor()
+    try:
+        if drop:
+            cur.execute(f'DROP SCHEMA IF EXISTS "{s}" CASCADE')
+        _create_structure(cur, header)
+
+        data = _Peekable(json.loads(line) for line in rows if line.strip())
+        counts = {}
+        for t in header["tables"]:
+            cols = ", ".join(f'"{c["name"]}"' for c in t["columns"] if not c["generated"])
+            feed = _CopyFeed(data, t["name"])
+            cur.copy_expert(f'COPY "{s}"."{t["name"]}" ({cols}) FROM STDIN', feed)
+            counts[t["name"]] = feed.count
+        leftover = data.peek()
+        if leftover is not None:
+            raise ValueError(f"snapshot rows for {leftover['t']!r} are out of order or not in the header")
+
+        _finish_structure(cur, header)
+        _reset_sequences(cur, header)
+
+        bad = []
+        for t in header["tables"]:
+            cur.execute(f'SELECT COUNT(*) FROM "{s}"."{t["name"]}"')
+            n = cur.fetchone()[0]
+            if not (n == counts[t["name"]] == t["rows"]):
+                bad.append(f'{t["name"]}: header {t["rows"]}, read {counts[t["name"]]}, loaded {n}')
+        if bad:
+            raise ValueError("row counts don't match: " + "; ".join(bad))
+        for t in header["tables"]:
+            cur.execute(f'ANALYZE "{s}"."{t["name"]}"')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        if own:
+            conn.close()
+    return counts
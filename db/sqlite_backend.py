@@ -0,0 +1,429 @@
+# db/sqlite_backend.py
+import datetime
+import decimal
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.request import pathname2url
+from .core import fold_search_key, like_prefix
+
+__all__ = [
+    "SQLITE_PATH",
+    "sqlite_readable",
+    "use_sqlite",
+    "use_postgres",
+    "sqlite_active",
+    "compile_sqlite",
+]
+
+# Read-only snapshot for laptops without a Postgres server. Switch with
+# TAMAYAME_BACKEND=sqlite (or use_sqlite()); build with compile_sqlite.py.
+SQLITE_PATH = os.getenv("TAMAYAME_SQLITE", "dictionary.sqlite3")
+SQLITE_VERSION = 1
+
+_state = {"path": SQLITE_PATH if os.getenv("TAMAYAME_BACKEND", "postgres") == "sqlite" else None}
+_local = threading.local()
+
+# "module.function" → (undecorated function, signature), filled by @sqlite_readable
+_SERVED = {}
+# "module.function" → reader(db, **bound arguments) over the precomputed tables
+_READERS = {}
+
+_SCHEMA = """
+    CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+
+    -- page: entry_page_data() as json; row: the plain entries row
+    CREATE TABLE entries (
+        entry_id INTEGER PRIMARY KEY,
+        headword TEXT, headword_key TEXT, sort_key TEXT,
+        type TEXT, affix_position TEXT, ipa TEXT, pos TEXT, translation_en TEXT,
+        status TEXT, transitivity TEXT,
+        intransitive_class_id INTEGER, primary_paradigm_class_id INTEGER, suffix_subclass_id INTEGER,
+        row TEXT, page TEXT
+    );
+    CREATE INDEX entries_sort ON entries (sort_key, entry_id);
+    CREATE INDEX entries_headword_key ON entries (headword_key);
+
+    -- page: example_page_data() as json; row: fetch_example_by_id()
+    CREATE TABLE examples (example_id INTEGER PRIMARY KEY, row TEXT, page TEXT);
+
+    -- folded segment / headword key → entries using it (related entries)
+    CREATE TABLE entry_keys (key TEXT, entry_id INTEGER, PRIMARY KEY (key, entry_id)) WITHOUT ROWID;
+    CREATE TABLE entry_templates (template_id INTEGER, entry_id INTEGER,
+                                  PRIMARY KEY (template_id, entry_id)) WITHOUT ROWID;
+    CREATE TABLE templates (template_id INTEGER PRIMARY KEY, row TEXT);
+    CREATE TABLE subclass_allomorphs (subclass_id INTEGER PRIMARY KEY, rows TEXT);
+
+    -- results of list lookups, computed by the real function at compile time
+    CREATE TABLE calls (fn TEXT, args TEXT, result TEXT, PRIMARY KEY (fn, args)) WITHOUT ROWID;
+
+    CREATE VIRTUAL TABLE entries_fts USING fts5(
+        headword, translation_en,
+        content='entries', content_rowid='entry_id', tokenize='trigram'
+    );
+"""
+
+
+# ───────────────────────── json ───────────────────────── #
+def _default(o):
+    if isinstance(o, datetime.datetime):
+        return {"$datetime": o.isoformat()}
+    if isinstance(o, datetime.date):
+        return {"$date": o.isoformat()}
+    if isinstance(o, decimal.Decimal):
+        return {"$decimal": str(o)}
+    if isinstance(o, (set, frozenset)):
+        return sorted(o)
+    return str(o)
+
+
+_DECODE = {
+    "$datetime": datetime.datetime.fromisoformat,
+    "$date": datetime.date.fromisoformat,
+    "$decimal": decimal.Decimal,
+}
+
+
+def _hook(d):
+    if len(d) == 1:
+        (k, v), = d.items()
+        if k in _DECODE:
+            return _DECODE[k](v)
+    return d
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, default=_default, separators=(",", ":"))
+
+
+def _loads(s):
+    return None if s is None else json.loads(s, object_hook=_hook)
+
+
+# ───────────────────────── switch ───────────────────────── #
+def use_sqlite(path=SQLITE_PATH):
+    """Serve @sqlite_readable functions from the snapshot at `path` (all threads)."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    _state["path"] = path
+
+
+def use_postgres():
+    _state["path"] = None
+
+
+def sqlite_active():
+    return _state["path"] is not None
+
+
+def _db():
+    """This thread's read-only connection; reopened when the file is recompiled."""
+    path = _state["path"]
+    key = (path, os.stat(path).st_mtime_ns)
+    db = getattr(_local, "db", None)
+    if db is None or _local.key != key:
+        if db is not None:
+            db.close()
+        db = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro&immutable=1",
+                             uri=True, check_same_thread=False)
+        db.row_factory = sqlite3.Row
+        _local.db, _local.key = db, key
+    return db
+
+
+def _args_key(arguments):
+    return json.dumps(arguments, sort_keys=True, default=str)
+
+
+def _memo(db, name, arguments):
+    row = db.execute("SELECT result FROM calls WHERE fn = ? AND args = ?",
+                     (name, _args_key(arguments))).fetchone()
+    if row is None:
+        raise LookupError(f"{name}({_args_key(arguments)}) is not in the SQLite snapshot; "
+                          "add it to the compiled lookups or use the Postgres backend")
+    return _loads(row[0])
+
+
+def sqlite_readable(fn):
+    """
+    Mark a DAL read function as servable from the SQLite snapshot: a reader
+    over the precomputed tables if there is one, else the result compiled
+    for exactly these arguments. Postgres as usual when the switch is off.
+    """
+    name = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+    sig = inspect.signature(fn)
+    _SERVED[name] = (fn, sig)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _state["path"] is None:
+            return fn(*args, **kwargs)
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        reader = _READERS.get(name)
+        if reader is not None:
+            return reader(_db(), **bound.arguments)
+        return _memo(_db(), name, dict(bound.arguments))
+    return wrapper
+
+
+def _reader(*names):
+    def register(fn):
+        for name in names:
+            _READERS[name] = fn
+        return fn
+    return register
+
+
+def _value(db, sql, params):
+    row = db.execute(sql, params).fetchone()
+    return _loads(row[0]) if row else None
+
+
+def _rows(db, sql, params):
+    return [dict(r) for r in db.execute(sql, params)]
+
+
+# ───────────────────────── entries ───────────────────────── #
+def _entry_page(db, entry_id):
+    return _value(db, "SELECT page FROM entries WHERE entry_id = ?", (entry_id,))
+
+
+@_reader("entries_dal.fetch_entry")
+def _fetch_entry(db, entry_id):
+    page = _entry_page(db, entry_id)
+    if page is None:
+        return None, [], [], [], None
+    return tuple(page[:5])
+
+
+@_reader("entries_dal.get_entry_by_id")
+def _get_entry_by_id(db, entry_id):
+    return _value(db, "SELECT row FROM entries WHERE entry_id = ?", (entry_id,))
+
+
+@_reader("entries_dal.fetch_headword")
+def _fetch_headword(db, entry_id):
+    row = db.execute("SELECT headword FROM entries WHERE entry_id = ?", (entry_id,)).fetchone()
+    return row[0] if row else None
+
+
+@_reader("entries_dal.get_media_for_entry")
+def _get_media_for_entry(db, entry_id):
+    page = _entry_page(db, entry_id)
+    return page[5]["media"] if page else []
+
+
+@_reader("lookups.fetch_ta_forms")
+def _fetch_ta_forms(db, entry_id, limit, offset):
+    if not entry_id:
+        return _memo(db, "lookups.fetch_ta_forms", {"entry_id": entry_id, "limit": limit, "offset": offset})
+    page = _entry_page(db, int(entry_id))
+    return page[5]["ta_forms"] if page else []
+
+
+@_reader("entries_dal.fetch_subclass_allomorphs")
+def _fetch_subclass_allomorphs(db, subclass_id):
+    return _value(db, "SELECT rows FROM subclass_allomorphs WHERE subclass_id = ?", (subclass_id,)) or []
+
+
+@_reader("entries_dal.fetch_template_by_id", "lookups.fetch_template_by_id")
+def _fetch_template_by_id(db, template_id):
+    return _value(db, "SELECT row FROM templates WHERE template_id = ?", (template_id,))
+
+
+@_reader("entries_dal.fetch_related_entries_by_segment")
+def _fetch_related(db, segment, exclude_entry_id, limit):
+    return _rows(db, """
+        SELECT e.entry_id, e.headword, e.affix_position, e.pos, e.translation_en
+          FROM entry_keys k
+          JOIN entries e ON e.entry_id = k.entry_id
+         WHERE k.key = ? AND e.entry_id IS NOT ?
+         ORDER BY e.headword IS NULL, e.headword
+         LIMIT ?
+    """, (fold_search_key(segment), exclude_entry_id, int(limit)))
+
+
+@_reader("entries_dal.fetch_entries_with_template")
+def _fetch_entries_with_template(db, template_id, limit):
+    return _rows(db, """
+        SELECT e.entry_id, e.headword, e.transitivity, t.template_id
+          FROM entry_templates t
+          JOIN entries e ON e.entry_id = t.entry_id
+         WHERE t.template_id = ?
+         ORDER BY e.headword IS NULL, e.headword
+         LIMIT ?
+    """, (template_id, int(limit)))
+
+
+_SUMMARY_COLUMNS = ("entry_id, headword, type, affix_position, ipa, pos, "
+                    "translation_en, status, transitivity")
+
+
+def _summaries(db, columns, search, entry_type, pos, status, startswith, page, per_page, default):
+    """The entries_dal summary queries: same filters, sort_key order, FTS5 for the english match."""
+    # collation's own read path is served from here, so import it late
+    from .collation import ALPHABET, split_letters, letter_range
+
+    wheres, params = [], []
+    if search:
+        wheres.append("(headword_key LIKE ? ESCAPE '\\' OR entry_id IN "
+                      "(SELECT rowid FROM entries_fts WHERE translation_en LIKE ?))")
+        params.extend([like_prefix(fold_search_key(search)), f"%{search}%"])
+    for column, value in (("type", entry_type), ("pos", pos), ("status", status)):
+        if value:
+            wheres.append(f"{column} = ?"); params.append(value)
+    if startswith:
+        letters = split_letters(startswith)
+        if len(letters) == 1 and letters[0] in ALPHABET:
+            wheres.append("sort_key >= ? AND sort_key < ?"); params.extend(letter_range(letters[0]))
+        else:
+            wheres.append("headword_key LIKE ? ESCAPE '\\'")
+            params.append(like_prefix(fold_search_key(startswith)))
+
+    where_sql = ("WHERE " + " AND ".join(wheres)) if wheres else ""
+    limit = int(per_page or default)
+    offset = max(0, (int(page or 1) - 1) * limit)
+    total = db.execute(f"SELECT COUNT(*) FROM entries {where_sql}", params).fetchone()[0]
+    rows = _rows(db, f"""
+        SELECT {columns} FROM entries {where_sql}
+         ORDER BY sort_key, entry_id
+         LIMIT ? OFFSET ?
+    """, params + [limit, offset])
+    return rows, total
+
+
+@_reader("entries_dal.fetch_entry_summaries")
+def _fetch_entry_summaries(db, search, entry_type, pos, status, startswith, page, per_page):
+    columns = _SUMMARY_COLUMNS + ", intransitive_class_id, primary_paradigm_class_id, suffix_subclass_id"
+    return _summaries(db, columns, search, entry_type, pos, status, startswith, page, per_page, 200)
+
+
+@_reader("entries_dal.fetch_root_summaries")
+def _fetch_root_summaries(db, search, pos, status, startswith, page, per_page):
+    return _summaries(db, _SUMMARY_COLUMNS, search, "root", pos, status, startswith, page, per_page, 100)
+
+
+@_reader("entries_dal.fetch_word_summaries")
+def _fetch_word_summaries(db, search, pos, status, startswith, page, per_page):
+    return _summaries(db, _SUMMARY_COLUMNS, search, "word", pos, status, startswith, page, per_page, 100)
+
+
+# ───────────────────────── examples ───────────────────────── #
+def _example_page(db, example_id):
+    return _value(db, "SELECT page FROM examples WHERE example_id = ?", (example_id,))
+
+
+@_reader("examples_dal.fetch_example_by_id")
+def _fetch_example_by_id(db, example_id):
+    return _value(db, "SELECT row FROM examples WHERE example_id = ?", (example_id,))
+
+
+@_reader("examples_dal.fetch_example_full")
+def _fetch_example_full(db, example_id):
+    page = _example_page(db, example_id)
+    return page[0] if page else None
+
+
+@_reader("examples_dal.get_entries_for_example")
+def _get_entries_for_example(db, example_id):
+    page = _example_page(db, example_id)
+    return page[1] if page else []
+
+
+@_reader("examples_dal.get_media_for_example")
+def _get_media_for_example(db, example_id):
+    page = _example_page(db, example_id)
+    return page[2] if page else []
+
+
+# ───────────────────────── compile ───────────────────────── #
+def _warm_calls(data):
+    """(function, kwargs) pairs stored in `calls`: the list lookups the read-only pages make."""
+    yield "collation.fetch_letter_counts", {}
+    for name in ("lookups.fetch_morpheme_index", "lookups.fetch_all_allomorphs",
+                 "lookups.fetch_all_ta_allomorphs", "lookups.fetch_primary_paradigm_classes",
+                 "examples_dal.fetch_stem_report_rows"):
+        yield name, {}
+    for cls in _SERVED["lookups.fetch_primary_paradigm_classes"][0]():
+        yield "lookups.fetch_prmp_allomorphs_for_class", {"class_id": cls["id"]}
+    for template_id in sorted(data["templates"]):
+        yield "lookups.fetch_examples_using_template", {"template_id": template_id}
+
+
+def compile_sqlite(path=SQLITE_PATH):
+    """
+    Build the read-only snapshot from Postgres: every entry and example page
+    pre-joined as json, summary columns with an FTS5 index, and the list
+    lookups' results. Written to a temp file and renamed into place, so a
+    running app picks it up on its next query. Returns row counts.
+    """
+    from .site_export import fetch_site_data, entry_page_data, example_page_data
+
+    started = time.time()
+    data = fetch_site_data()
+    tmp = path + ".part"
+    if os.path.exists(tmp):
+        os.unlink(tmp)
+    db = sqlite3.connect(tmp)
+    try:
+        db.execute("PRAGMA journal_mode = OFF")
+        db.execute("PRAGMA synchronous = OFF")
+        db.executescript(_SCHEMA)
+
+        rows = []
+        for entry_id, e in data["entries"].items():
+            raw = {k: v for k, v in e.items() if k not in ("primary_paradigm_class", "suffix_subclass")}
+            rows.append((
+                entry_id, e.get("headword"), e.get("headword_key"), e.get("sort_key"),
+                e.get("type"), e.get("affix_position"), e.get("ipa"), e.get("pos"),
+                e.get("translation_en"), e.get("status"), e.get("transitivity"),
+                e.get("intransitive_class_id"), e.get("primary_paradigm_class_id"),
+                e.get("suffix_subclass_id"),
+                _dumps(raw), _dumps(entry_page_data(data, entry_id)),
+            ))
+        db.executemany(f"INSERT INTO entries VALUES ({', '.join('?' * 16)})", rows)
+        db.execute("INSERT INTO entries_fts (entries_fts) VALUES ('rebuild')")
+
+        db.executemany("INSERT INTO examples VALUES (?, ?, ?)", (
+            (example_id, _dumps(x), _dumps(example_page_data(data, example_id)))
+            for example_id, x in data["examples"].items()
+        ))
+        db.executemany("INSERT INTO entry_keys VALUES (?, ?)", (
+            (key, entry_id) for key, ids in data["related_by_key"].items() for entry_id in ids
+        ))
+        db.executemany("INSERT OR IGNORE INTO entry_templates VALUES (?, ?)", (
+            (template_id, e["entry_id"]) for template_id, es in data["template_entries"].items() for e in es
+        ))
+        db.executemany("INSERT INTO templates VALUES (?, ?)", (
+            (template_id, _dumps(t)) for template_id, t in data["templates"].items()
+        ))
+        db.executemany("INSERT INTO subclass_allomorphs VALUES (?, ?)", (
+            (subclass_id, _dumps(rs)) for subclass_id, rs in data["subclass_allomorphs"].items()
+        ))
+
+        calls = 0
+        for name, kwargs in _warm_calls(data):
+            fn, sig = _SERVED[name]
+            bound = sig.bind(**kwargs)
+            bound.apply_defaults()
+            db.execute("INSERT OR REPLACE INTO calls VALUES (?, ?, ?)",
+                       (name, _args_key(dict(bound.arguments)), _dumps(fn(**kwargs))))
+            calls += 1
+
+        db.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("version", str(SQLITE_VERSION)),
+            ("compiled_at", datetime.datetime.now(datetime.timezone.utc).isoformat()),
+            ("compile_seconds", f"{time.time() - started:.1f}"),
+        ])
+        db.commit()
+        db.execute("ANALYZE")
+        db.execute("VACUUM")
+    finally:
+        db.close()
+    os.replace(tmp, path)
+    return {"entries": len(data["entries"]), "examples": len(data["examples"]), "lookups": calls}
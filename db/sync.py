@@ -0,0 +1,261 @@
+# db/sync.py
+import hashlib
+import json
+import psycopg2
+from .core import get_connection, DEFAULT_SCHEMA
+from .search_keys import SEARCH_KEY_COLUMNS
+
+__all__ = [
+    "SYNC_TABLES",
+    "SyncEndpoint",
+    "diff_table",
+    "merge_plan",
+]
+
+# table → primary key. Row identity across copies is the key value.
+SYNC_TABLES = {
+    "entries":    "entry_id",
+    "morphemes":  "morpheme_id",
+    "allomorphs": "allomorph_id",
+    "examples":   "example_id",
+}
+
+# Columns derived from others (search keys, collation keys, tsvectors): they
+# follow the real columns, so comparing them would only repeat a difference.
+_DERIVED = sorted({key for _, key in SEARCH_KEY_COLUMNS.values()}
+                  | {"sort_key", "letter_bucket", "search_tsv", "english_tsv"})
+
+FANOUT = 16         # children per differing range
+LEAF_ROWS = 64      # ranges this small ship their (id, hash) lists
+
+_ROW_JSON = "(to_jsonb(t) - %s::text[])"
+
+
+# ───────────────────────── endpoint ───────────────────────── #
+def _connect(dsn):
+    """
+    Connect with a full libpq DSN (sslmode, connect_timeout, … pass through
+    untouched), then put our schema first on the search_path as
+    get_connection() does.
+    """
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET search_path TO %s, public;", (DEFAULT_SCHEMA,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+    return conn
+
+
+class SyncEndpoint:
+    """
+    One database copy. Row hashes are computed once per table into a temp
+    table on that server; after that only range summaries, leaf
+    (id, hash) lists and the rows that differ cross the wire.
+    `sent` counts the payload bytes received from this endpoint.
+    """
+
+    def __init__(self, dsn=None, name=None):
+        self.name = name or dsn or "local"
+        self.conn = _connect(dsn) if dsn else get_connection()
+        # one snapshot for hashes and rows alike (temp tables rule out readonly)
+        self.conn.set_session(isolation_level="REPEATABLE READ")
+        self.cur = self.conn.cursor()
+        self.sent = 0
+        self._hashed = set()
+
+    def _fetch(self, sql, params=()):
+        self.cur.execute(sql, params)
+        rows = self.cur.fetchall()
+        self.sent += sum(len(repr(r)) for r in rows)
+        return rows
+
+    def hash_table(self, table):
+        """Build sync_<table>(id, h) with one md5 per row; returns (count, min id, max id)."""
+        key = SYNC_TABLES[table]
+        if table not in self._hashed:
+            self.cur.execute(f"DROP TABLE IF EXISTS pg_temp.sync_{table}")
+            self.cur.execute(f"""
+                CREATE TEMP TABLE sync_{table} AS
+                SELECT t.{key}::bigint AS id, md5({_ROW_JSON}::text) AS h
+                  FROM tamayame_dictionary.{table} t
+            """, (_DERIVED,))
+            self.cur.execute(f"CREATE INDEX ON pg_temp.sync_{table} (id)")
+            self.cur.execute(f"ANALYZE pg_temp.sync_{table}")
+            self._hashed.add(table)
+        return self._fetch(f"SELECT COUNT(*), MIN(id), MAX(id) FROM pg_temp.sync_{table}")[0]
+
+    def summaries(self, table, ranges):
+        """
+        For each (lo, step) range, the FANOUT child buckets' row count and
+        digest: {(lo, step, bucket): (count, digest)}. Empty buckets are absent.
+        """
+        if not ranges:
+            return {}
+        los, steps = zip(*ranges)
+        rows = self._fetch(f"""
+            SELECT r.lo, r.step, (s.id - r.lo) / r.step AS b, COUNT(*),
+                   md5(string_agg(s.id::text || ':' || s.h, ',' ORDER BY s.id))
+              FROM unnest(%s::bigint[], %s::bigint[]) AS r(lo, step)
+              JOIN pg_temp.sync_{table} s
+                ON s.id >= r.lo AND s.id < r.lo + r.step * {FANOUT}
+             GROUP BY r.lo, r.step, b
+        """, (list(los), list(steps)))
+        return {(lo, step, b): (n, d) for lo, step, b, n, d in rows}
+
+    def leaf_hashes(self, table, spans):
+        """{id: hash} for rows in the given [lo, hi) spans."""
+        if not spans:
+            return {}
+        los, his = zip(*spans)
+        return dict(self._fetch(f"""
+            SELECT s.id, s.h
+              FROM unnest(%s::bigint[], %s::bigint[]) AS r(lo, hi)
+              JOIN pg_temp.sync_{table} s ON s.id >= r.lo AND s.id < r.hi
+        """, (list(los), list(his))))
+
+    def hashes_for(self, table, ids):
+        if not ids:
+            return {}
+        return dict(self._fetch(f"SELECT id, h FROM pg_temp.sync_{table} WHERE id = ANY(%s)",
+                                (list(ids),)))
+
+    def rows_for(self, table, ids):
+        """{id: row dict (derived columns dropped)} for just these ids."""
+        if not ids:
+            return {}
+        key = SYNC_TABLES[table]
+        return {i: r for i, r in self._fetch(f"""
+            SELECT t.{key}::bigint, {_ROW_JSON}
+              FROM tamayame_dictionary.{table} t
+             WHERE t.{key} = ANY(%s)
+        """, (_DERIVED, list(ids)))}
+
+    def close(self):
+        self.conn.rollback()
+        self.cur.close(); self.conn.close()
+
+
+# ───────────────────────── diff ───────────────────────── #
+def _span(n):
+    """Smallest power of FANOUT ≥ n, so every level splits evenly."""
+    step = 1
+    while step < n:
+        step *= FANOUT
+    return step
+
+
+def diff_table(table, a, b):
+    """
+    Ids whose rows differ between endpoints `a` and `b` (changed, or
+    present on one side only): {id: (hash_a or None, hash_b or None)}.
+
+    Both sides summarize the same key ranges; equal digests are pruned, and
+    differing ranges are split FANOUT ways until they hold LEAF_ROWS rows
+    or fewer, whose (id, hash) lists are then compared directly.
+    """
+    (na, lo_a, hi_a), (nb, lo_b, hi_b) = a.hash_table(table), b.hash_table(table)
+    if not na and not nb:
+        return {}
+    lo = min(x for x in (lo_a, lo_b) if x is not None)
+    hi = max(x for x in (hi_a, hi_b) if x is not None) + 1
+    step = max(1, _span(hi - lo) // FANOUT)
+
+    pending, leaves = [(lo, step)], []
+    while pending:
+        sa, sb = a.summaries(table, pending), b.summaries(table, pending)
+        nxt = []
+        for key in sa.keys() | sb.keys():
+            if sa.get(key) == sb.get(key):
+                continue
+            rlo, rstep, bucket = key
+            child_lo = rlo + bucket * rstep
+            rows = max(sa.get(key, (0,))[0], sb.get(key, (0,))[0])
+            if rows <= LEAF_ROWS or rstep == 1:
+                leaves.append((child_lo, child_lo + rstep))
+            else:
+                nxt.append((child_lo, max(1, rstep // FANOUT)))
+        pending = nxt
+
+    ha, hb = a.leaf_hashes(table, leaves), b.leaf_hashes(table, leaves)
+    return {i: (ha.get(i), hb.get(i)) for i in ha.keys() | hb.keys() if ha.get(i) != hb.get(i)}
+
+
+# ───────────────────────── three-way plan ───────────────────────── #
+def _side_change(base_row, row):
+    """Columns a side changed relative to base: {column: new value}."""
+    return {k: v for k, v in row.items() if base_row.get(k) != v}
+
+
+def merge_plan(ours, theirs, base=None, tables=None):
+    """
+    Three-way merge plan to bring `theirs`' edits into `ours`, with `base`
+    the copy both started from (e.g. a restored snapshot). Per table:
+
+      take     – only theirs changed: insert / update / delete on ours
+      merged   – both changed different columns: column-wise update on ours
+      conflict – both changed the same columns differently (or no base)
+      keep     – count of rows only ours changed (nothing to do)
+
+    Only rows in differing ranges are ever fetched.
+    """
+    plan = {"tables": {}}
+    for table in tables or SYNC_TABLES:
+        diff = diff_table(table, ours, theirs)
+        ids = sorted(diff)
+        base_h = base.hashes_for(table, ids) if base else {}
+
+        take, merged, conflict, keep = [], [], [], 0
+        need_rows = set()
+        classified = []
+        for i in ids:
+            ho, ht = diff[i]
+            hb = base_h.get(i)
+            if base and ho == hb:
+                classified.append((i, "take"))
+                if ht is not None:
+                    need_rows.add(i)
+            elif base and ht == hb:
+                keep += 1
+            else:
+                classified.append((i, "both"))
+                need_rows.add(i)
+
+        both = [i for i, kind in classified if kind == "both"]
+        rows_t = theirs.rows_for(table, need_rows)
+        rows_o = ours.rows_for(table, both)
+        rows_b = base.rows_for(table, both) if base else {}
+
+        for i, kind in classified:
+            if kind == "take":
+                if diff[i][1] is None:
+                    take.append({"id": i, "action": "delete"})
+                elif diff[i][0] is None:
+                    take.append({"id": i, "action": "insert", "row": rows_t[i]})
+                else:
+                    take.append({"id": i, "action": "update", "row": rows_t[i]})
+                continue
+            o, t, b = rows_o.get(i), rows_t.get(i), rows_b.get(i)
+            if not base or o is None or t is None or b is None:
+                conflict.append({"id": i, "ours": o, "theirs": t, "base": b})
+                continue
+            co, ct = _side_change(b, o), _side_change(b, t)
+            clash = {k for k in co.keys() & ct.keys() if co[k] != ct[k]}
+            if clash:
+                conflict.append({"id": i, "columns": sorted(clash), "ours": o, "theirs": t, "base": b})
+            else:
+                merged.append({"id": i, "set": {k: v for k, v in ct.items() if k not in co}})
+
+        plan["tables"][table] = {
+            "key": SYNC_TABLES[table],
+            "differing": len(ids),
+            "take": take,
+            "merged": [m for m in merged if m["set"]],
+            "conflict": conflict,
+            "keep": keep,
+        }
+    plan["bytes"] = {"ours": ours.sent, "theirs": theirs.sent, "base": base.sent if base else 0}
+    plan["digest"] = hashlib.sha256(json.dumps(plan["tables"], sort_keys=True, default=str)
+                                    .encode("utf-8")).hexdigest()
+    return plan
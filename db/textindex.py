@@ -0,0 +1,225 @@
+# db/textindex.py
+import re
+from psycopg2.errors import UndefinedTable
+from psycopg2.extras import RealDictCursor, execute_values
+from .core import get_connection
+from .analyzer import tokenize
+
+__all__ = [
+    "TOKEN_FIELDS",
+    "ensure_example_token_index",
+    "index_example_tokens",
+    "rebuild_example_token_index",
+    "parse_token_query",
+    "search_examples_by_tokens",
+]
+
+SCHEMA = "tamayame_dictionary"
+
+# Which examples column a posting came from (stored as a smallint)
+TOKEN_FIELDS = {
+    "tamayame_text": 1,
+    "gloss_text": 2,
+    "translation_en": 3,
+}
+
+_PHRASE_RE = re.compile(r'"([^"]*)"')
+
+
+# ───────────────────────── schema ───────────────────────── #
+def ensure_example_token_index(schema=SCHEMA):
+    """
+    Create the token → example posting table if it doesn't exist yet.
+    One row per token occurrence; `pos` is the token's position inside its
+    field, which is what phrase queries join on.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {schema}.example_tokens (
+            token       text     NOT NULL,
+            example_id  integer  NOT NULL
+                REFERENCES {schema}.examples(example_id) ON DELETE CASCADE,
+            field       smallint NOT NULL,
+            pos         integer  NOT NULL,
+            PRIMARY KEY (token, example_id, field, pos)
+        )
+    """)
+    cur.execute(f"""
+        CREATE INDEX IF NOT EXISTS example_tokens_example_idx
+            ON {schema}.example_tokens (example_id)
+    """)
+    conn.commit()
+    cur.close(); conn.close()
+
+
+# ───────────────────────── maintenance ───────────────────────── #
+def _postings(example_id, row):
+    out = []
+    for col, field in TOKEN_FIELDS.items():
+        for pos, tok in enumerate(tokenize(row.get(col))):
+            out.append((tok, example_id, field, pos))
+    # identical (token, pos) can't repeat within a field, but be safe for the PK
+    return list(dict.fromkeys(out))
+
+
+def index_example_tokens(cur, example_id, tamayame_text=None, gloss_text=None,
+                         translation_en=None, schema=SCHEMA):
+    """
+    Replace the postings for one example. Runs on the caller's cursor so it
+    commits (or rolls back) together with the example insert/update.
+    No-ops if the index table hasn't been created yet.
+    """
+    rows = _postings(example_id, {
+        "tamayame_text": tamayame_text,
+        "gloss_text": gloss_text,
+        "translation_en": translation_en,
+    })
+    cur.execute("SAVEPOINT example_tokens")
+    try:
+        cur.execute(f"DELETE FROM {schema}.example_tokens WHERE example_id = %s", (example_id,))
+        if rows:
+            execute_values(cur, f"""
+                INSERT INTO {schema}.example_tokens (token, example_id, field, pos)
+                VALUES %s
+                ON CONFLICT DO NOTHING
+            """, rows, page_size=1000)
+    except UndefinedTable:
+        cur.execute("ROLLBACK TO SAVEPOINT example_tokens")
+        return 0
+    cur.execute("RELEASE SAVEPOINT example_tokens")
+    return len(rows)
+
+
+def rebuild_example_token_index(batch_size=5000, schema=SCHEMA):
+    """
+    Rebuild the whole index from examples in one transaction.
+    Streams examples through a server-side cursor. Returns postings written.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute(f"TRUNCATE {schema}.example_tokens")
+
+    scan = conn.cursor(name="example_tokens_rebuild", cursor_factory=RealDictCursor)
+    scan.itersize = batch_size
+    scan.execute(f"""
+        SELECT example_id, tamayame_text, gloss_text, translation_en
+          FROM {schema}.examples
+    """)
+
+    written = 0
+    batch = []
+    for row in scan:
+        batch.extend(_postings(row["example_id"], row))
+        if len(batch) >= batch_size:
+            execute_values(cur, f"""
+                INSERT INTO {schema}.example_tokens (token, example_id, field, pos) VALUES %s
+            """, batch, page_size=batch_size)
+            written += len(batch)
+            batch = []
+    if batch:
+        execute_values(cur, f"""
+            INSERT INTO {schema}.example_tokens (token, example_id, field, pos) VALUES %s
+        """, batch, page_size=len(batch))
+        written += len(batch)
+
+    scan.close()
+    cur.execute(f"ANALYZE {schema}.example_tokens")
+    conn.commit()
+    cur.close(); conn.close()
+    return written
+
+
+# ───────────────────────── search ───────────────────────── #
+def parse_token_query(q):
+    """
+    Split a user query into (terms, phrases). Text inside double quotes is a
+    phrase; everything else is single terms. Both use the index tokenizer.
+      'kiʼi "hay pa"'  →  (['kiʼi'], [['hay', 'pa']])
+    """
+    q = q or ""
+    phrases = []
+    for m in _PHRASE_RE.finditer(q):
+        toks = tokenize(m.group(1))
+        if toks:
+            phrases.append(toks)
+    terms = tokenize(_PHRASE_RE.sub(" ", q).replace('"', " "))
+    # one-word phrases are just terms
+    terms += [p[0] for p in phrases if len(p) == 1]
+    phrases = [p for p in phrases if len(p) > 1]
+    return list(dict.fromkeys(terms)), phrases
+
+
+def _match_sql(terms, phrases, mode, fields, schema):
+    """
+    Build a query returning matching example_ids: one sub-select per term or
+    phrase, combined with INTERSECT (and) or UNION (or).
+    """
+    parts, params = [], []
+    field_clause = ""
+    if fields:
+        field_clause = " AND {a}.field = ANY(%s)"
+
+    for t in terms:
+        parts.append(f"SELECT t0.example_id FROM {schema}.example_tokens t0 "
+                     f"WHERE t0.token = %s" + field_clause.format(a="t0"))
+        params.append(t)
+        if fields:
+            params.append(fields)
+
+    for phrase in phrases:
+        joins, where = [], ["t0.token = %s"]
+        p = [phrase[0]]
+        for i, tok in enumerate(phrase[1:], start=1):
+            joins.append(
+                f"JOIN {schema}.example_tokens t{i} "
+                f"ON t{i}.example_id = t0.example_id AND t{i}.field = t0.field "
+                f"AND t{i}.pos = t0.pos + {i} AND t{i}.token = %s"
+            )
+            p.append(tok)
+        sql = (f"SELECT t0.example_id FROM {schema}.example_tokens t0 "
+               + " ".join(joins) + " WHERE " + " AND ".join(where)
+               + field_clause.format(a="t0"))
+        # join params come before the WHERE param in the SQL text
+        params.extend(p[1:] + p[:1])
+        if fields:
+            params.append(fields)
+        parts.append(sql)
+
+    op = " INTERSECT " if mode == "and" else " UNION "
+    return op.join(f"({s})" for s in parts), params
+
+
+def search_examples_by_tokens(q, mode="and", fields=None, page=1, per_page=50, schema=SCHEMA):
+    """
+    Token-index search over examples.
+      q:      terms and/or "quoted phrases"
+      mode:   'and' (every term/phrase) or 'or' (any of them)
+      fields: optional subset of TOKEN_FIELDS keys
+    Returns: (rows, total_count); rows are dicts with example_id,
+    tamayame_text, gloss_text, translation_en, ordered by example_id.
+    """
+    mode = "or" if (mode or "").lower() == "or" else "and"
+    terms, phrases = parse_token_query(q)
+    if not terms and not phrases:
+        return [], 0
+    field_ids = [TOKEN_FIELDS[f] for f in (fields or []) if f in TOKEN_FIELDS] or None
+
+    match_sql, params = _match_sql(terms, phrases, mode, field_ids, schema)
+    offset = max(0, (int(page or 1) - 1) * int(per_page))
+
+    conn = get_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(f"SELECT COUNT(*) AS c FROM ({match_sql}) m", params)
+    total = int(cur.fetchone()["c"])
+
+    cur.execute(f"""
+        SELECT e.example_id, e.tamayame_text, e.gloss_text, e.translation_en
+          FROM ({match_sql}) m
+          JOIN {schema}.examples e ON e.example_id = m.example_id
+         ORDER BY e.example_id
+         LIMIT %s OFFSET %s
+    """, params + [int(per_page), offset])
+    rows = [dict(r) for r in cur.fetchall()]
+    cur.close(); conn.close()
+    return rows, total
@@ -0,0 +1,29 @@
+import argparse
+import sys
+import time
+from db.export import EXPORT_FORMATS, export_chunks, gzip_chunks
+
+def run():
+    ap = argparse.ArgumentParser(description="Stream the whole dictionary to JSONL, CSV or LIFT.")
+    ap.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="jsonl")
+    ap.add_argument("--out", help="output file (default: tamayame.<ext>, '-' for stdout); "
+                                  "a .gz name is gzipped on the fly")
+    args = ap.parse_args()
+
+    out = args.out or f"tamayame.{EXPORT_FORMATS[args.format][1]}"
+    started = time.time()
+    chunks = export_chunks(args.format)
+    size = 0
+    if out == "-":
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+        return
+    with open(out, "wb") as f:
+        stream = gzip_chunks(chunks) if out.endswith(".gz") else (c.encode("utf-8") for c in chunks)
+        for data in stream:
+            f.write(data)
+            size += len(data)
+    print(f"✅ Wrote {out} ({size / 1e6:.1f} MB) in {time.time() - started:.1f}s")
+
+if __name__ == "__main__":
+    run()
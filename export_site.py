@@ -0,0 +1,225 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from flask import render_template
+from app import app, entry_view_for, example_view_for
+from db.media_store import MEDIA_ROOT, media_file_path
+from db.site_export import fetch_site_data, entry_page_data, example_page_data
+
+# Site-wide pages, rendered through the app itself (a handful of requests).
+# The home page asks for everything on one page, since ?page= links can't be
+# served statically.
+SITE_PAGES = [
+    ("/", "/?per_page=1000000&root_per_page=1000000&word_per_page=1000000"),
+    ("/morphemes", None),
+    ("/allomorph-report", None),
+    ("/stem-report", None),
+    ("/coverage", None),
+    ("/template-list", None),
+    ("/class-a", None),
+    ("/help", None),
+    ("/help/intransitive-classes", None),
+    ("/help/primary-paradigms", None),
+]
+MANIFEST = ".export-manifest.json"
+CHUNK = 250
+
+# Set in the parent before the pool forks, so workers share them copy-on-write
+_DATA = None
+_OLD = {}
+_OUT = None
+
+
+def page_path(url_path):
+    """/entry/5 → entry/5/index.html, so the app's own links work on any static server."""
+    return "/".join([p for p in url_path.split("/") if p] + ["index.html"])
+
+
+def _emit(rel, html):
+    """Write a page unless its content hash matches the last export. Returns (rel, sha, written)."""
+    body = html.encode("utf-8")
+    sha = hashlib.sha256(body).hexdigest()
+    dest = os.path.join(_OUT, *rel.split("/"))
+    if _OLD.get(rel) == sha and os.path.exists(dest):
+        return rel, sha, False
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    with open(dest + ".part", "wb") as f:
+        f.write(body)
+    os.replace(dest + ".part", dest)
+    return rel, sha, True
+
+
+def _render_entry(entry_id):
+    entry, morphemes, examples, allomorphs, template, extras = entry_page_data(_DATA, entry_id)
+    entry_view = entry_view_for(entry)
+    entry_view["suffix_subclass_allomorphs"] = extras["subclass_allomorphs"]
+    return render_template(
+        "entry_detail.html",
+        entry=entry_view,
+        morphemes=morphemes,
+        examples=examples,
+        related=extras["related"],
+        cross_examples=[],
+        allomorphs=allomorphs,
+        template=template,
+        template_entries=extras["template_entries"],
+        ta_forms=extras["ta_forms"],
+        media=extras["media"],
+    )
+
+
+def _render_example(example_id):
+    ex, entries, media = example_page_data(_DATA, example_id)
+    if entries and "entry_id" not in ex:
+        ex["entry_id"] = entries[0]["entry_id"]
+    example_view_for(ex)
+    return render_template(
+        "example_detail.html",
+        example=ex,
+        entries=entries,
+        media=media,
+        slotted_allomorphs=ex["slotted_allomorphs"],
+    )
+
+
+_RENDER = {"entry": _render_entry, "example": _render_example}
+
+
+def _init_worker():
+    # url_for() and render_template() need a request context; one per worker
+    app.test_request_context("/").push()
+
+
+def _render_chunk(task):
+    kind, ids = task
+    render = _RENDER[kind]
+    return [_emit(page_path(f"/{kind}/{i}"), render(i)) for i in ids]
+
+
+def _copy_static(out):
+    """
+    Copy the app's static assets, leaving out the media store if it lives
+    under static/; _export_media() adds just the files the pages reference.
+    """
+    src = app.static_folder
+    media = os.path.realpath(MEDIA_ROOT)
+
+    def skip(d, names):
+        return [n for n in names if os.path.realpath(os.path.join(d, n)) == media]
+
+    shutil.copytree(src, os.path.join(out, "static"), ignore=skip, dirs_exist_ok=True)
+
+
+def _export_media():
+    """
+    Hard-link (or copy, across filesystems) every media file and thumbnail
+    the pages reference to static/uploads/<store path>, where media_url()
+    points in export mode. Blobs and thumbnails are named by content, so an
+    existing one is never rewritten; legacy flat files are compared by size
+    and mtime. Returns (rel, stamp, written) like _emit.
+    """
+    results, seen = [], set()
+    for group in ("entry_media", "example_media"):
+        for rows in _DATA[group].values():
+            for m in rows:
+                for rel in (m.get("filename"), m.get("thumbnail_path")):
+                    if not rel or rel in seen:
+                        continue
+                    seen.add(rel)
+                    src = media_file_path(rel)
+                    if not src or not os.path.isfile(src):
+                        continue
+                    st = os.stat(src)
+                    stamp = (os.path.basename(rel) if rel.startswith(("sha256/", "thumbs/"))
+                             else f"{st.st_size}:{st.st_mtime_ns}")
+                    out_rel = "static/uploads/" + rel
+                    dest = os.path.join(_OUT, *out_rel.split("/"))
+                    if _OLD.get(out_rel) == stamp and os.path.exists(dest):
+                        results.append((out_rel, stamp, False))
+                        continue
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    if os.path.exists(dest + ".part"):
+                        os.unlink(dest + ".part")
+                    try:
+                        os.link(src, dest + ".part")
+                    except OSError:
+                        shutil.copy2(src, dest + ".part")
+                    os.replace(dest + ".part", dest)
+                    results.append((out_rel, stamp, True))
+    return results
+
+
+def _prune(out, stale):
+    for rel in stale:
+        path = os.path.join(out, *rel.split("/"))
+        if os.path.exists(path):
+            os.unlink(path)
+        d = os.path.dirname(path)
+        while d != out and os.path.isdir(d) and not os.listdir(d):
+            os.rmdir(d)
+            d = os.path.dirname(d)
+
+
+def export(out, processes=None):
+    global _DATA, _OLD, _OUT
+    _OUT = os.path.abspath(out)
+    os.makedirs(_OUT, exist_ok=True)
+    manifest_path = os.path.join(_OUT, MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            _OLD = json.load(f)
+
+    started = time.time()
+    # media links point at the copies _export_media() makes, not /media/<id>
+    app.config["MEDIA_STATIC_URLS"] = True
+    _DATA = fetch_site_data()
+    print(f"Loaded {len(_DATA['entries'])} entries and {len(_DATA['examples'])} examples "
+          f"in {time.time() - started:.1f}s")
+
+    results = []
+    client = app.test_client()
+    for path, url in SITE_PAGES:
+        resp = client.get(url or path)
+        if resp.status_code != 200:
+            print(f"⚠️ {path}: HTTP {resp.status_code}, skipped")
+            continue
+        results.append(_emit(page_path(path), resp.get_data(as_text=True)))
+
+    tasks = []
+    for kind, ids in (("entry", sorted(_DATA["entries"])), ("example", sorted(_DATA["examples"]))):
+        tasks.extend((kind, ids[i:i + CHUNK]) for i in range(0, len(ids), CHUNK))
+    # fork: workers inherit _DATA instead of unpickling it per task
+    with multiprocessing.get_context("fork").Pool(processes, initializer=_init_worker) as pool:
+        for chunk in pool.imap_unordered(_render_chunk, tasks):
+            results.extend(chunk)
+
+    _copy_static(_OUT)
+    results.extend(_export_media())
+    manifest = {rel: sha for rel, sha, _ in results}
+    stale = sorted(set(_OLD) - set(manifest))
+    _prune(_OUT, stale)
+    with open(manifest_path + ".part", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, sort_keys=True)
+    os.replace(manifest_path + ".part", manifest_path)
+
+    written = sum(1 for _, _, w in results if w)
+    return len(results), written, len(stale), time.time() - started
+
+
+def run():
+    ap = argparse.ArgumentParser(description="Render the dictionary to a static site.")
+    ap.add_argument("--out", default="site")
+    ap.add_argument("--processes", type=int, help="render processes (default: CPU count)")
+    args = ap.parse_args()
+
+    pages, written, removed, elapsed = export(args.out, args.processes)
+    print(f"✅ {pages} pages in {elapsed:.1f}s: {written} written, "
+          f"{pages - written} unchanged, {removed} removed.")
+    print(f"Serve with: python -m http.server -d {args.out}")
+
+if __name__ == "__main__":
+    run()
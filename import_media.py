@@ -0,0 +1,47 @@
+import argparse
+import csv
+import os
+import time
+from db.media_import import DEFAULT_MATCH_PATTERNS, MediaMatcher, import_media_files
+
+def run():
+    ap = argparse.ArgumentParser(
+        description="Import a directory of media files, attaching each to the entry or example its name points at.")
+    ap.add_argument("directory")
+    ap.add_argument("--pattern", action="append", metavar="REGEX",
+                    help="filename pattern with a named group example_id, entry_id, davis_id or headword; "
+                         "repeatable, tried in order (default: built-in set)")
+    ap.add_argument("--notes", default="", help="notes stored on every imported media row")
+    ap.add_argument("--threads", type=int, default=8, help="hashing/copy threads")
+    ap.add_argument("--batch-size", type=int, default=500, help="files per insert transaction")
+    ap.add_argument("--state", help="JSONL progress file (default: <directory>/.media_import_state.jsonl)")
+    ap.add_argument("--report", default="media_unmatched.tsv")
+    ap.add_argument("--dry-run", action="store_true", help="match and report only; copy nothing")
+    args = ap.parse_args()
+
+    state = args.state or os.path.join(args.directory, ".media_import_state.jsonl")
+    started = time.time()
+    matcher = MediaMatcher(args.pattern or DEFAULT_MATCH_PATTERNS)
+    with open(args.report, "w", encoding="utf-8", newline="") as f:
+        report = csv.writer(f, delimiter="\t")
+        report.writerow(["path", "reason"])
+        counts = import_media_files(
+            args.directory, matcher,
+            state_path=None if args.dry_run else state,
+            notes=args.notes, threads=args.threads, batch_size=args.batch_size,
+            dry_run=args.dry_run, on_unmatched=lambda path, reason: report.writerow([path, reason]))
+    elapsed = time.time() - started
+
+    if args.dry_run:
+        print(f"✅ {counts['seen']} files: {counts['matched']} would be imported, "
+              f"{counts['unmatched']} unmatched ({elapsed:.1f}s).")
+    else:
+        print(f"✅ {counts['seen']} files in {elapsed:.1f}s: {counts['imported']} imported, "
+              f"{counts['duplicates']} already attached, {counts['skipped']} done in an earlier run, "
+              f"{counts['unmatched']} unmatched.")
+        if counts["imported"]:
+            print("Run process_media.py to extract durations and thumbnails.")
+    print(f"Wrote {args.report}")
+
+if __name__ == "__main__":
+    run()
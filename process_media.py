@@ -0,0 +1,14 @@
+import sys
+import time
+from db.media_worker import process_pending_media
+
+def run(include_failed=False):
+    started = time.time()
+    counts = process_pending_media(include_failed=include_failed)
+    elapsed = time.time() - started
+    total = sum(counts.values())
+    print(f"✅ Processed {total} media rows in {elapsed:.1f}s: "
+          f"{counts.get('done', 0)} done, {counts.get('failed', 0)} failed.")
+
+if __name__ == "__main__":
+    run(include_failed="--retry-failed" in sys.argv[1:])
@@ -0,0 +1,82 @@
+import argparse
+import csv
+import time
+from collections import Counter
+from psycopg2.extras import execute_values
+from db import get_connection
+from db.phonology import RULES_PATH, load_rules, fetch_realizations, realize_corpus
+
+def write_report(rows, results, out_path):
+    """TSV of every example whose computed SR differs from the stored one (or fills a blank)."""
+    stats = Counter()
+    fired_totals = Counter()
+    with open(out_path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, delimiter="\t")
+        w.writerow(["example_id", "status", "ur", "stored_sr", "computed_sr", "computed_ipa", "rules_fired"])
+        for r in rows:
+            sr, ipa, fired = results[r["example_id"]]
+            stored = (r.get("sr") or "").strip()
+            if not stored:
+                status = "missing"
+            elif stored == sr:
+                stats["match"] += 1
+                continue
+            else:
+                status = "differs"
+                fired_totals.update(set(fired or ()))
+            stats[status] += 1
+            w.writerow([r["example_id"], status, r["ur"], stored, sr, ipa or "",
+                        ", ".join(dict.fromkeys(fired or ()))])
+    return stats, fired_totals
+
+def fill_missing(rows, results, with_ipa):
+    """Write computed SR (and IPA) only where the stored value is blank."""
+    sr_updates = [(r["example_id"], results[r["example_id"]][0]) for r in rows
+                  if not (r.get("sr") or "").strip() and results[r["example_id"]][0]]
+    ipa_updates = [(r["example_id"], results[r["example_id"]][1]) for r in rows
+                   if with_ipa and not (r.get("ipa") or "").strip() and results[r["example_id"]][1]]
+    conn = get_connection()
+    cur = conn.cursor()
+    for column, updates in (("sr", sr_updates), ("ipa", ipa_updates)):
+        if updates:
+            execute_values(cur, f"""
+                UPDATE tamayame_dictionary.example_realizations er
+                   SET {column} = v.val
+                  FROM (VALUES %s) AS v(example_id, val)
+                 WHERE er.example_id = v.example_id
+                   AND (er.{column} IS NULL OR btrim(er.{column}) = '')
+            """, updates, page_size=1000)
+    conn.commit()
+    cur.close(); conn.close()
+    return len(sr_updates), len(ipa_updates)
+
+def run():
+    ap = argparse.ArgumentParser(description="Derive SR (and IPA) from UR with the phonology rule cascade.")
+    ap.add_argument("--rules", default=RULES_PATH, help="rule file (default: phonology_rules.json)")
+    ap.add_argument("--out", default="realization_diff.tsv", help="diff report path")
+    ap.add_argument("--ipa", action="store_true", help="also run the IPA stages")
+    ap.add_argument("--write", action="store_true", help="fill blank SR/IPA values in the database")
+    ap.add_argument("--processes", type=int, default=None)
+    args = ap.parse_args()
+
+    rules = load_rules(args.rules)
+    rows = fetch_realizations()
+    print(f"Realizing {len(rows)} URs with {args.rules}...")
+
+    started = time.time()
+    results = realize_corpus(rows, rules=rules, with_ipa=args.ipa, processes=args.processes)
+    elapsed = time.time() - started
+
+    stats, fired = write_report(rows, results, args.out)
+    print(f"✅ {len(rows)} examples in {elapsed:.1f}s: "
+          f"{stats['match']} match, {stats['differs']} differ, {stats['missing']} without a stored SR.")
+    for name, n in fired.most_common(10):
+        print(f"   {n:6d} mismatches involve: {name}")
+    print(f"Wrote {args.out}")
+
+    if args.write:
+        n_sr, n_ipa = fill_missing(rows, results, args.ipa)
+        print(f"✅ Filled {n_sr} blank SR and {n_ipa} blank IPA values.")
+
+if __name__ == "__main__":
+    run()
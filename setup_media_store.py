@@ -0,0 +1,8 @@
+from db.media_store import ensure_media_store
+
+def run():
+    ensure_media_store()
+    print("✅ Content-addressed media columns, media_blobs and ref-count trigger are in place.")
+
+if __name__ == "__main__":
+    run()
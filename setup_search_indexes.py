@@ -0,0 +1,25 @@
+from db.fts import ensure_fulltext_search
+from db.search_keys import ensure_search_keys
+from db.fuzzy import ensure_trigram_indexes
+from db.changes import ensure_change_counters, ensure_example_change_log
+from db.collation import ensure_collation
+from db.slotsig import ensure_slot_signatures
+
+def run():
+    ensure_change_counters()
+    print("✅ Change counters (refresh the in-process autocomplete index) are in place.")
+    ensure_example_change_log()
+    print("✅ Example change log (feeds the in-process usage postings) is in place.")
+    ensure_search_keys()
+    print("✅ Folded search-key columns (headword_key, segment_key, form_key, text_key) are in place.")
+    ensure_collation()
+    print("✅ Alphabet sort keys, letter buckets and letter counts are in place.")
+    ensure_trigram_indexes()
+    print("✅ pg_trgm indexes for suggestions and substring matches are in place.")
+    n = ensure_slot_signatures()
+    print(f"✅ Slot signatures built for {n} examples.")
+    ensure_fulltext_search()
+    print("✅ Full-text search columns and GIN indexes are in place.")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,40 @@
+import argparse
+import gzip
+import sys
+import time
+from db.snapshot import SNAPSHOT_SCHEMA, write_snapshot, restore_snapshot
+
+def _open(path, mode):
+    if path == "-":
+        return sys.stdout if "w" in mode else sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8", newline="\n")
+
+def run():
+    ap = argparse.ArgumentParser(description="Dump the dictionary schema to a JSONL snapshot, or restore one.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    dump = sub.add_parser("dump", help="write a snapshot")
+    dump.add_argument("out", help="snapshot file (.gz to compress, '-' for stdout)")
+    dump.add_argument("--schema", default=SNAPSHOT_SCHEMA)
+    restore = sub.add_parser("restore", help="load a snapshot into a fresh schema")
+    restore.add_argument("snapshot", help="snapshot file (.gz ok, '-' for stdin)")
+    restore.add_argument("--drop", action="store_true", help="drop the existing schema first")
+    args = ap.parse_args()
+
+    started = time.time()
+    if args.command == "dump":
+        with _open(args.out, "w") as f:
+            counts = write_snapshot(f, args.schema)
+        verb = "Dumped"
+    else:
+        with _open(args.snapshot, "r") as f:
+            counts = restore_snapshot(f, drop=args.drop)
+        verb = "Restored"
+    # keep stdout clean when the snapshot itself goes there
+    log = sys.stderr if getattr(args, "out", None) == "-" else sys.stdout
+    print(f"✅ {verb} {sum(counts.values())} rows in {len(counts)} tables "
+          f"in {time.time() - started:.1f}s", file=log)
+
+if __name__ == "__main__":
+    run()
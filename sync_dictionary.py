@@ -0,0 +1,39 @@
+import argparse
+import json
+import time
+from db.sync import SYNC_TABLES, SyncEndpoint, merge_plan
+
+def run():
+    ap = argparse.ArgumentParser(
+        description="Diff two dictionary databases by range hashes and write a three-way merge plan.")
+    ap.add_argument("--theirs", required=True, help="libpq DSN of the other copy")
+    ap.add_argument("--ours", help="libpq DSN of this copy (default: local settings)")
+    ap.add_argument("--base", help="DSN of the common ancestor, e.g. a restored snapshot")
+    ap.add_argument("--tables", nargs="+", choices=list(SYNC_TABLES), help="default: all")
+    ap.add_argument("--out", default="merge_plan.json")
+    args = ap.parse_args()
+
+    started = time.time()
+    ours = SyncEndpoint(args.ours, "ours")
+    theirs = SyncEndpoint(args.theirs, "theirs")
+    base = SyncEndpoint(args.base, "base") if args.base else None
+    try:
+        plan = merge_plan(ours, theirs, base, args.tables)
+    finally:
+        for ep in (ours, theirs, base):
+            if ep:
+                ep.close()
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=1, default=str)
+
+    for table, t in plan["tables"].items():
+        print(f"✅ {table}: {t['differing']} differing — {len(t['take'])} to take, "
+              f"{len(t['merged'])} merged, {len(t['conflict'])} conflicts, {t['keep']} ours only")
+    if not base:
+        print("⚠️ No --base given: every differing row is reported as a conflict.")
+    received = sum(plan["bytes"].values())
+    print(f"Received {received / 1024:.1f} KiB in {time.time() - started:.1f}s; plan written to {args.out}")
+
+if __name__ == "__main__":
+    run()